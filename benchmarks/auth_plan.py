@@ -0,0 +1,121 @@
+"""
+Measures what caching auth plans saves FancyAuthPruningExtension: executing a query (as an anonymous viewer, so every
+protected field is pruned) with the plan cache, vs building the plan for every execution. Also times building a plan
+vs looking it up.
+
+    python -m benchmarks.auth_plan [iterations]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from typing import Any
+from typing import Optional
+
+import strawberry
+from graphql import parse
+
+from fancy_auth import FancyAuthPruningExtension
+from fancy_auth import fancy_auth
+from fancy_auth.auth_plan import AuthPlanCache
+from fancy_auth.auth_plan import build_auth_plan
+from fancy_auth.context import Context
+from fancy_auth.decision_log import DecisionSink
+from fancy_auth.decision_log import set_decision_sink
+from fancy_auth.roles import UserMatches
+
+NUM_FIELDS = 50
+
+
+class NullSink(DecisionSink):
+    """(so we're not measuring log I/O)"""
+
+    def should_emit(self, schema_coordinate: str, decision: Any) -> bool:
+        return False
+
+    def emit(self, record: Any) -> None:
+        pass
+
+
+User = fancy_auth(UserMatches())(
+    strawberry.type(
+        type(
+            "User",
+            (),
+            {
+                "__annotations__": {
+                    "fancy_auth_user_owner_id": strawberry.Private[str],
+                    **{f"field_{i}": Optional[str] for i in range(NUM_FIELDS)},
+                }
+            },
+        )
+    )
+)
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def user(self) -> User:  # type: ignore[valid-type]
+        return User(  # type: ignore[operator]
+            fancy_auth_user_owner_id="abc123",
+            **{f"field_{i}": "value" for i in range(NUM_FIELDS)},
+        )
+
+
+class QuietSchema(strawberry.Schema):
+    """(so we're not measuring error logging)"""
+
+    def process_errors(self, errors: Any, execution_context: Any = None) -> None:
+        pass
+
+
+def get_schema(plan_cache: AuthPlanCache) -> strawberry.Schema:
+    class PruningExtension(FancyAuthPruningExtension):
+        pass
+
+    PruningExtension.plan_cache = plan_cache
+    return QuietSchema(query=Query, extensions=[PruningExtension])
+
+
+def time_us(fn: Any, iterations: int) -> float:
+    return min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    set_decision_sink(NullSink())
+
+    query = "{ user { " + " ".join(f"field{i}" for i in range(NUM_FIELDS)) + " } }"
+    cached = get_schema(AuthPlanCache())
+    uncached = get_schema(AuthPlanCache(max_size=0))
+
+    def execute(schema: strawberry.Schema) -> None:
+        result = schema.execute_sync(query, context_value=Context(trace_id="aaa"))
+        assert result.errors
+
+    cached_us = time_us(lambda: execute(cached), iterations)
+    uncached_us = time_us(lambda: execute(uncached), iterations)
+
+    print(f"{'':24} {'per query':>12}")
+    print(f"{'plan built every time':24} {uncached_us:10.1f}us")
+    print(f"{'plan cached':24} {cached_us:10.1f}us  ({uncached_us - cached_us:.1f}us saved)")
+
+    graphql_schema = cached._schema
+    document = parse(query)
+    plan_cache = AuthPlanCache()
+    plan_cache.get_plan(graphql_schema, document, query)
+
+    build_us = time_us(lambda: build_auth_plan(graphql_schema, document), iterations)
+    # (a new str each time, as with a real request - so its hash isn't cached. Includes copying it.)
+    lookup_us = time_us(
+        lambda: plan_cache.get_plan(graphql_schema, document, query.encode().decode()), iterations
+    )
+    print(f"\n{'build plan':24} {build_us:10.1f}us")
+    print(f"{'look up plan':24} {lookup_us:10.1f}us")
+    print(f"\n({NUM_FIELDS} protected fields per query)")
+
+
+if __name__ == "__main__":
+    main()
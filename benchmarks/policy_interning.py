@@ -0,0 +1,119 @@
+"""
+Measures the memory used by FancyAuth's per-field state on a large schema, with and without policy interning.
+
+    python -m benchmarks.policy_interning [num_types] [fields_per_type]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from unittest import mock
+
+import strawberry
+
+from fancy_auth import FancyAuthExtension
+from fancy_auth import fancy_auth
+from fancy_auth import directives
+from fancy_auth import policy as policy_module
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+
+class _NeverStores(dict):  # type: ignore[type-arg]
+    """Stands in for the intern tables, to measure what things cost without interning"""
+
+    def setdefault(self, key, default=None):  # type: ignore[no-untyped-def]
+        return default
+
+
+def _uninterned_fancy_auth(*args, **kwargs):  # type: ignore[no-untyped-def]
+    """How `@fancy_auth` worked before: a fresh policy, directive and description for each field."""
+    decorate = fancy_auth(*args, **kwargs)
+
+    def wrapper(strawberry_type):  # type: ignore[no-untyped-def]
+        with mock.patch.object(
+            FancyAuthExtension,
+            "from_policy",
+            lambda policy, **kw: FancyAuthExtension(*args, **kwargs, **kw),
+        ):
+            return decorate(strawberry_type)
+
+    return wrapper
+
+
+def build_types(decorator, num_types: int, fields_per_type: int) -> list[type]:  # type: ignore[no-untyped-def]
+    types = []
+
+    for i in range(num_types):
+        annotations = {f"field_{j}": str for j in range(fields_per_type)}
+        cls = type(f"Type{i}", (), {"__annotations__": annotations})
+
+        # (a typical schema reuses a handful of policies)
+        if i % 2:
+            role_args = {"match_any": [UserMatches(), UserIsDog(scopes=["CAN_EAT_BONES"])]}
+        else:
+            role_args = {"role": UserMatches()}
+
+        types.append(decorator(**role_args)(strawberry.type(cls)))
+
+    return types
+
+
+def measure(interned: bool, num_types: int, fields_per_type: int) -> int:
+    policy_module.clear_interned_policies()
+    directives._descriptions.clear()
+    directives._directives.clear()
+
+    patches = []
+    if not interned:
+        patches = [
+            mock.patch.object(policy_module, "_interned_policies", _NeverStores()),
+            mock.patch.object(directives, "_descriptions", _NeverStores()),
+            mock.patch.object(directives, "_directives", _NeverStores()),
+        ]
+
+    for patch in patches:
+        patch.start()
+
+    try:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        types = build_types(
+            fancy_auth if interned else _uninterned_fancy_auth,
+            num_types,
+            fields_per_type,
+        )
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    finally:
+        for patch in patches:
+            patch.stop()
+
+    stats = after.compare_to(before, "filename")
+    fancy_auth_bytes = sum(
+        stat.size_diff for stat in stats if "fancy_auth" in stat.traceback[0].filename
+    )
+
+    del types
+    return fancy_auth_bytes
+
+
+def main() -> None:
+    num_types = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    fields_per_type = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print(f"{num_types} types x {fields_per_type} fields")
+    uninterned = measure(False, num_types, fields_per_type)
+    interned = measure(True, num_types, fields_per_type)
+
+    print(f"  without interning: {uninterned / 1024:10.1f} KiB allocated by fancy_auth")
+    print(f"  with interning:    {interned / 1024:10.1f} KiB allocated by fancy_auth")
+    print(f"  saved:             {(1 - interned / uninterned) * 100:9.1f}%")
+
+
+if __name__ == "__main__":
+    main()
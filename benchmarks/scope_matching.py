@@ -0,0 +1,70 @@
+"""
+Compares matching scopes as sets of strings (`any(scope in held for scope in scopes)`) with the bitmask representation
+(see ScopeIndex), for a role with hundreds of possible scopes.
+
+    python -m benchmarks.scope_matching [iterations]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import timeit
+from typing import Any
+
+from fancy_auth.base_role import BaseRole
+from fancy_auth.context import Context
+
+NUM_POSSIBLE_SCOPES = 500
+
+
+class HasManyScopes(BaseRole):
+    role_owner = "benchmarks"
+    comparison_key = None
+    possible_scopes = {f"scope_{i}" for i in range(NUM_POSSIBLE_SCOPES)}
+
+    def is_role_valid(self, scopes, source: Any, context: Any, input_arg: Any) -> bool:
+        return True
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    possible = sorted(HasManyScopes.possible_scopes)
+
+    print(f"{NUM_POSSIBLE_SCOPES} possible scopes")
+    print(f"{'applied':>8} {'held':>6} {'set':>10} {'mask':>10} {'convert':>10} {'speedup':>8}")
+
+    for num_applied, num_held in [(1, 5), (10, 50), (50, 200), (200, 300)]:
+        role = HasManyScopes(scopes=rng.sample(possible, num_applied))
+        scopes = role._scopes_applied
+        # (make sure neither side can stop early: the viewer holds none of the scopes)
+        held = set(rng.sample([s for s in possible if s not in scopes], num_held))
+        context = Context(trace_id="aaa")
+
+        def with_sets() -> bool:
+            return any(scope in held for scope in scopes)
+
+        def with_mask() -> bool:
+            return role.holds_any_scope(scopes, held, context)
+
+        def convert() -> int:
+            return role.scope_index.get_mask(held)
+
+        # (warm up - the viewer's scopes are converted once per request)
+        with_mask()
+
+        set_ns = min(timeit.repeat(with_sets, number=iterations, repeat=3)) / iterations * 1e9
+        mask_ns = min(timeit.repeat(with_mask, number=iterations, repeat=3)) / iterations * 1e9
+        convert_ns = min(timeit.repeat(convert, number=iterations // 10, repeat=3)) / (iterations // 10) * 1e9
+
+        print(
+            f"{num_applied:>8} {num_held:>6} {set_ns:8.0f}ns {mask_ns:8.0f}ns {convert_ns:8.0f}ns "
+            f"{set_ns / mask_ns:7.2f}x"
+        )
+
+    print("\n(convert: the once-per-request cost of turning the viewer's scopes into a mask)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares verifying a scope token from scratch (cold: a token the verifier hasn't seen) with verifying one that's
+already in the verification cache (warm: e.g. the same token sent with every request), for tokens carrying a growing
+number of scopes.
+
+    python -m benchmarks.scope_token [iterations]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import timeit
+
+from fancy_auth.scope_token import ScopeTokenVerifier
+from fancy_auth.scope_token import sign_scope_token
+
+KEY = b"benchmark signing key"
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    expires_at = time.time() + 3600
+
+    print(f"{'scopes':>6} {'cold':>10} {'warm':>10} {'speedup':>8}")
+
+    for num_scopes in [1, 10, 100]:
+        scopes = [f"service:read:resource_{i}" for i in range(num_scopes)]
+        # (a different token for every cold verification - so none of them are cached)
+        tokens = [
+            sign_scope_token(
+                key_id="bench",
+                key=KEY,
+                scopes=scopes,
+                subject=f"user_{i}",
+                expires_at=expires_at,
+            )
+            for i in range(iterations)
+        ]
+
+        cold_verifier = ScopeTokenVerifier({"bench": KEY}, max_size=iterations)
+        start = time.perf_counter()
+        for token in tokens:
+            cold_verifier.verify(token)
+        cold_ns = (time.perf_counter() - start) / iterations * 1e9
+
+        warm_verifier = ScopeTokenVerifier({"bench": KEY})
+        token = tokens[0]
+        warm_verifier.verify(token)
+        warm_ns = (
+            min(timeit.repeat(lambda: warm_verifier.verify(token), number=iterations, repeat=3))
+            / iterations
+            * 1e9
+        )
+
+        print(f"{num_scopes:>6} {cold_ns:8.0f}ns {warm_ns:8.0f}ns {cold_ns / warm_ns:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
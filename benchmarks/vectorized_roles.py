@@ -0,0 +1,64 @@
+"""
+Compares authorizing a list of objects one at a time (`evaluate_policy` per object) with evaluating the whole list at
+once (`get_decisions_vectorized`), for `UserMatches`. Also times the comparison itself.
+
+    python -m benchmarks.vectorized_roles [iterations]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from types import SimpleNamespace
+from typing import Any
+
+from fancy_auth import FancyAuthExtension
+from fancy_auth.context import Context
+from fancy_auth.roles import UserMatches
+
+
+def time_ms(fn: Any, iterations: int) -> float:
+    return min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations * 1e3
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    role = UserMatches()
+    extension = FancyAuthExtension(role)
+    context = Context(trace_id="aaa", user_id="user_7")
+    info: Any = SimpleNamespace(context=context)
+
+    print(
+        f"{'objects':>8} {'per object':>12} {'vectorized':>12} {'speedup':>8} "
+        f"{'compare':>10}"
+    )
+
+    for num_objects in [100, 1_000, 10_000, 50_000]:
+        sources = [
+            SimpleNamespace(fancy_auth_user_owner_id=f"user_{i % 1_000}")
+            for i in range(num_objects)
+        ]
+        values = role.get_comparison_values(sources)
+
+        def per_object() -> None:
+            for source in sources:
+                extension.evaluate_policy(source, info, {})
+
+        def vectorized() -> None:
+            extension.get_decisions_vectorized(sources, info)
+
+        def compare_list() -> None:
+            role.is_role_valid_vectorized(None, values, context)
+
+        per_object_ms = time_ms(per_object, iterations)
+        vectorized_ms = time_ms(vectorized, iterations)
+        compare_ms = time_ms(compare_list, iterations)
+
+        print(
+            f"{num_objects:>8} {per_object_ms:10.2f}ms {vectorized_ms:10.2f}ms "
+            f"{per_object_ms / vectorized_ms:7.2f}x {compare_ms:8.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,17 @@
+from fancy_auth.comparison_loader import comparison_key_loader
+from fancy_auth.deadlines import FancyAuthDeadlineExtension
 from fancy_auth.decorator import fancy_auth
 from fancy_auth.field_extension import FancyAuthExtension
+from fancy_auth.list_filter import FancyAuthListExtension
+from fancy_auth.pruning import FancyAuthPruningExtension
+from fancy_auth.request_state import FancyAuthRequestExtension
 
-__all__ = ["FancyAuthExtension", "fancy_auth"]
+__all__ = [
+    "FancyAuthDeadlineExtension",
+    "FancyAuthExtension",
+    "FancyAuthListExtension",
+    "FancyAuthPruningExtension",
+    "FancyAuthRequestExtension",
+    "comparison_key_loader",
+    "fancy_auth",
+]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from graphql import DocumentNode
+from graphql import FieldNode
+from graphql import GraphQLSchema
+from graphql import TypeInfo
+from graphql import TypeInfoVisitor
+from graphql import Visitor
+from graphql import is_abstract_type
+from graphql import visit
+from strawberry.types.field import StrawberryField
+
+from fancy_auth.field_extension import FancyAuthExtension
+
+# (see strawberry's GraphQLCoreConverter)
+_STRAWBERRY_DEFINITION = "strawberry-definition"
+
+
+@dataclass(frozen=True)
+class AuthPlan:
+    """Everything FancyAuth needs to know about an operation document, worked out once per document."""
+
+    # (held so that the schema's id can't be reused while the plan is cached)
+    schema: GraphQLSchema
+    # the extensions (of fields the document may resolve) whose policy could be decided by prechecks alone (see
+    # `FancyAuthExtension.get_precheck_decision`)
+    prunable_extensions: tuple[FancyAuthExtension, ...]
+
+
+def _get_fancy_auth_extensions(
+    schema: GraphQLSchema, type_name: str, field_name: str
+) -> list[FancyAuthExtension]:
+    graphql_type = schema.get_type(type_name)
+    fields = getattr(graphql_type, "fields", None)
+    graphql_field = fields.get(field_name) if fields else None
+    if graphql_field is None:
+        return []
+
+    strawberry_field = (graphql_field.extensions or {}).get(_STRAWBERRY_DEFINITION)
+    if not isinstance(strawberry_field, StrawberryField):
+        return []
+
+    return [
+        extension
+        for extension in strawberry_field.extensions
+        if isinstance(extension, FancyAuthExtension)
+    ]
+
+
+class _SelectedFieldsVisitor(Visitor):
+    def __init__(self, schema: GraphQLSchema, type_info: TypeInfo):
+        super().__init__()
+        self.schema = schema
+        self.type_info = type_info
+        # (type name, field name)
+        self.selected: set[tuple[str, str]] = set()
+
+    def enter_field(self, node: FieldNode, *_: Any) -> None:
+        parent_type = self.type_info.get_parent_type()
+        if parent_type is None:
+            return
+
+        # (fields selected on an interface or union may be resolved by any of its implementations)
+        possible_types = (
+            self.schema.get_possible_types(parent_type)
+            if is_abstract_type(parent_type)
+            else [parent_type]
+        )
+        for possible_type in possible_types:
+            self.selected.add((possible_type.name, node.name.value))
+
+
+def build_auth_plan(schema: GraphQLSchema, document: DocumentNode) -> AuthPlan:
+    type_info = TypeInfo(schema)
+    visitor = _SelectedFieldsVisitor(schema, type_info)
+    visit(document, TypeInfoVisitor(type_info, visitor))
+
+    extensions: dict[int, FancyAuthExtension] = {}
+
+    for type_name, field_name in sorted(visitor.selected):
+        for extension in _get_fancy_auth_extensions(schema, type_name, field_name):
+            extensions[id(extension)] = extension
+
+    return AuthPlan(
+        schema=schema,
+        prunable_extensions=tuple(
+            extension
+            for extension in extensions.values()
+            if extension.policy.evaluation_order[0].has_precheck
+            and extension.policy.evaluation_order[0]._input_arg is None
+        ),
+    )
+
+
+@dataclass
+class AuthPlanCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AuthPlanCache:
+    """A size bounded (LRU) cache of auth plans, keyed by schema and query text. Safe to use from multiple threads."""
+
+    def __init__(self, *, max_size: int = 1_000):
+        self.max_size = max_size
+        self.stats = AuthPlanCacheStats()
+        # (keyed by the query text itself - hashing a str is much cheaper than a digest, and is what the dict needs)
+        self._plans: OrderedDict[tuple[int, str], AuthPlan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get_plan(
+        self, schema: GraphQLSchema, document: DocumentNode, query: str | None
+    ) -> AuthPlan:
+        """Returns the plan for `document` (building it, if this is the first time we've seen it)"""
+        if query is None:
+            # (e.g. the document was parsed elsewhere - we don't have anything to key it on)
+            self.stats.misses += 1
+            return build_auth_plan(schema, document)
+
+        key = (id(schema), query)
+
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.stats.hits += 1
+                return plan
+
+            self.stats.misses += 1
+
+        plan = build_auth_plan(schema, document)
+
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+                self.stats.evictions += 1
+
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+
+# The plan cache used by FancyAuthPruningExtension (shared by every schema in the process)
+AUTH_PLAN_CACHE = AuthPlanCache()
@@ -1,22 +1,134 @@
 from __future__ import annotations
 
+import inspect
 from abc import ABC
 from abc import abstractmethod
 from collections.abc import Collection
-from typing import Any, TypeVar
+from collections.abc import Sequence
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Hashable, TypeVar
 
 from fancy_auth.context import Context
+from fancy_auth.get_input_arg import compile_input_arg_getter
+from fancy_auth.role_cache import RoleResultCache
+from fancy_auth.role_cache import RoleResultCacheKey
+from fancy_auth.scopes import ScopeIndex
+from fancy_auth.scopes import get_held_scope_mask
+
+if TYPE_CHECKING:
+    from fancy_auth.circuit_breaker import CircuitBreaker
+    from fancy_auth.offload import RoleExecutor
+
+
+class RoleDeniedError(Exception):
+    """Raised (or attached to FancyAuthAccessDeniedError) when a role denies access."""
+
+    def __init__(self, role_name: str, reason: str, message: str):
+        super().__init__(message)
+        self.role_name = role_name
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class RoleDenial:
+    """
+    A lightweight description of why a role denied access.
+
+    Returning one of these from `BaseRole.check_role` is much cheaper than raising an exception (no traceback is
+    captured or unwound). An exception is only created if it's needed for the error returned to the client.
+    """
+
+    role_name: str
+    # a short, machine readable reason code (e.g. "not_logged_in")
+    reason: str
+    # a human readable description of the reason
+    message: str
+    # set if the role signalled the denial by raising
+    exception: Exception | None = None
+
+    @classmethod
+    def from_exception(cls, role_name: str, exception: Exception) -> RoleDenial:
+        return cls(role_name, "raised", str(exception), exception)
+
+    def to_exception(self) -> Exception:
+        if self.exception is not None:
+            return self.exception
+
+        return RoleDeniedError(self.role_name, self.reason, self.message)
+
 
 class BaseRole(ABC):
     """Base class that all FancyAuth roles must inherit from."""
 
     _scopes_applied: set[str] | None
     _input_arg: str | None
+    _input_arg_getter: Callable[[Any], Any] | None
+    # the applied scopes, as a mask of `scope_index` bits (0 if no scopes were applied)
+    _scope_mask: int
 
     role_owner: str
     comparison_key: str | None
+    # The scopes the role accepts. Scopes may be hierarchical ("billing:read:invoices"), in which case roles can also
+    # be applied with wildcards ("billing:*"). See ScopeIndex.
     possible_scopes: set[str] | None
 
+    # The attributes of the context that `is_role_valid` reads (e.g. `("user_id",)`).
+    # Roles that declare this promise that their result depends *only* on these context attributes, the applied scopes
+    # and the comparison value - which lets FancyAuth cache decisions. Leave as None to opt out of caching.
+    context_keys: tuple[str, ...] | None = None
+
+    # A rough hint of how expensive `is_role_valid` is to call. Cheaper roles are evaluated first, so e.g. a policy of
+    # `match_any=[ExpensiveRole(), CheapRole()]` can often be decided without calling ExpensiveRole at all.
+    cost: int = 10
+
+    # Set this to share the role's results between requests (see RoleResultCache). Requires `context_keys`.
+    result_cache: RoleResultCache | None = None
+
+    # The longest (in seconds) that an async role may take to evaluate, before access is denied with the reason
+    # "deadline_exceeded". (See also FancyAuthDeadlineExtension, for a deadline covering the whole request.)
+    timeout: float | None = None
+
+    # Set this to stop calling the role while its backend is failing (see CircuitBreaker).
+    circuit_breaker: CircuitBreaker | None = None
+
+    # Set this if the role blocks (e.g. CPU-heavy crypto, or a sync SDK call), to evaluate it in a pool of workers
+    # rather than on the event loop in async resolvers (see RoleExecutor). Ignored for async roles.
+    executor: RoleExecutor | None = None
+
+    # True if the role implements `is_role_valid` (or `check_role`) as a coroutine. Async roles may only be used on
+    # fields that are resolved asynchronously. (This is set automatically.)
+    is_async: bool = False
+
+    # True if the role implements `batch_is_role_valid`. (This is set automatically.)
+    supports_batching: bool = False
+
+    # True if the role implements `precheck`. (This is set automatically.)
+    has_precheck: bool = False
+
+    # True if the role implements `is_role_valid_vectorized`. (This is set automatically.)
+    supports_vectorized: bool = False
+
+    # Maps `possible_scopes` to bits (see ScopeIndex). (This is set automatically.)
+    scope_index: ScopeIndex | None = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.is_async = inspect.iscoroutinefunction(
+            cls.is_role_valid
+        ) or inspect.iscoroutinefunction(cls.check_role)
+        cls.supports_batching = (
+            cls.batch_is_role_valid is not BaseRole.batch_is_role_valid
+        )
+        cls.has_precheck = cls.precheck is not BaseRole.precheck
+        cls.supports_vectorized = (
+            cls.is_role_valid_vectorized is not BaseRole.is_role_valid_vectorized
+        )
+        possible_scopes = getattr(cls, "possible_scopes", None)
+        cls.scope_index = (
+            ScopeIndex(possible_scopes) if possible_scopes is not None else None
+        )
+
     def __init__(
         self,
         *,
@@ -26,17 +138,282 @@ class BaseRole(ABC):
         if scopes is not None and self.possible_scopes is None:
             raise ValueError(f"{self.__class__.__name__} does not accept scopes")
 
-        if scopes is not None and self.possible_scopes is not None:
-            for scope in scopes:
-                if scope not in self.possible_scopes:
-                    raise ValueError(
-                        f"{scope} is not a valid scope allowed for {self.__class__.__name__}"
-                    )
+        if scopes is not None and self.scope_index is not None:
+            for scope in self.scope_index.get_unknown_scopes(scopes):
+                raise ValueError(
+                    f"{scope} is not a valid scope allowed for {self.__class__.__name__}"
+                )
 
         self._input_arg = input_arg
+        # (parse `input_arg` once, rather than every time the role is evaluated)
+        self._input_arg_getter = (
+            compile_input_arg_getter(input_arg) if input_arg is not None else None
+        )
         self._scopes_applied = set(scopes) if scopes is not None else None
+        self._scope_mask = (
+            self.scope_index.get_mask(scopes)
+            if scopes is not None and self.scope_index is not None
+            else 0
+        )
+
+    def __getstate__(self) -> dict[str, Any]:
+        # (roles are pickled to be evaluated in a process pool - see RoleExecutor. The input arg getter is a closure.)
+        state = self.__dict__.copy()
+        state["_input_arg_getter"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+        if self._input_arg is not None:
+            self._input_arg_getter = compile_input_arg_getter(self._input_arg)
 
     @abstractmethod
     def is_role_valid(
         self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
     ) -> bool: ...
+
+    def check_role(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> RoleDenial | None:
+        """
+        Returns None if the role is valid, or a RoleDenial explaining why it isn't.
+
+        This is what FancyAuth calls at runtime. By default, it wraps `is_role_valid` (converting raised errors into
+        denials). Roles can override this to deny access without raising (see `deny`), and implement
+        `is_role_valid` with `raise_for_denial(self.check_role(...))`.
+        """
+        try:
+            result = self.is_role_valid(
+                scopes=scopes, source=source, context=context, input_arg=input_arg
+            )
+        except Exception as e:
+            return RoleDenial.from_exception(self.__class__.__name__, e)
+
+        if inspect.isawaitable(result):
+            # `async def is_role_valid` - hand back something that `check_role_async` can await
+            return self._await_is_role_valid(result)  # type: ignore[return-value]
+
+        return self._denial_from_result(result)
+
+    def precheck(
+        self, scopes: set[str] | None, context: Context
+    ) -> RoleDenial | None:
+        """
+        Optional. The part of `check_role` that depends only on the context (e.g. "is anyone logged in?").
+
+        FancyAuth evaluates this once per request for each role configuration (see `get_intern_key`) - if it returns a
+        RoleDenial, access is denied without calling `check_role` at all. `check_role` is only called once the precheck
+        has passed, so it shouldn't repeat it. (`is_role_valid`, which may be called directly, should check both.)
+        """
+        return None
+
+    async def check_role_async(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> RoleDenial | None:
+        """The equivalent of `check_role` for async resolvers. Works for both sync and async roles."""
+        try:
+            result = self.check_role(
+                scopes=scopes, source=source, context=context, input_arg=input_arg
+            )
+
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            return RoleDenial.from_exception(self.__class__.__name__, e)
+
+        return result
+
+    async def _await_is_role_valid(self, result: Awaitable[bool]) -> RoleDenial | None:
+        try:
+            return self._denial_from_result(await result)
+        except Exception as e:
+            return RoleDenial.from_exception(self.__class__.__name__, e)
+
+    def _denial_from_result(self, result: bool) -> RoleDenial | None:
+        if (
+            result is False
+        ):  # pragma: no cover (sanity check -- roles shouldn't ever return False)
+            return self.deny(
+                "returned_false",
+                f"{self.__class__.__name__}.is_role_valid(...) returned False. (You should raise an error instead!)",
+            )
+
+        return None
+
+    def holds_any_scope(
+        self, scopes: set[str] | None, held_scopes: Collection[str], context: Context
+    ) -> bool:
+        """
+        True if `held_scopes` (e.g. the viewer's scopes, from the context) include any of `scopes` (the scopes applied
+        to the role). Either side may use wildcards - e.g. holding "billing:*" matches a role applied with
+        "billing:read:invoices", and vice versa.
+
+        The viewer's scopes are converted to a mask once per request, so this is a single AND.
+        """
+        if self.scope_index is None or not scopes:
+            return False
+
+        mask = (
+            self._scope_mask
+            if scopes is self._scopes_applied
+            else self.scope_index.get_mask(scopes)
+        )
+        return bool(get_held_scope_mask(self.scope_index, held_scopes, context) & mask)
+
+    def deny(self, reason: str, message: str) -> RoleDenial:
+        return RoleDenial(self.__class__.__name__, reason, message)
+
+    def raise_for_denial(self, denial: RoleDenial | None) -> bool:
+        """Helper for implementing `is_role_valid` in terms of `check_role`."""
+        if denial is not None:
+            raise denial.to_exception()
+
+        return True
+
+    def get_comparison_value(self, source: Any, input_arg: Any) -> Any:
+        """
+        Returns the value the role compares the viewer against: the `input_arg` value if there is one, otherwise the
+        `comparison_key` attribute of the object being returned. (Returns MISSING if the attribute doesn't exist.)
+        """
+        # (mirrors how roles read the comparison value)
+        if input_arg or self.comparison_key is None:
+            return input_arg
+
+        return getattr(source, self.comparison_key, MISSING)
+
+    def batch_is_role_valid(
+        self, keys: list[Any], context: Context
+    ) -> list[RoleDenial | None] | Awaitable[list[RoleDenial | None]]:
+        """
+        Optional. Evaluates the role for many comparison values at once (e.g. with a single call to a backend that
+        knows which objects the viewer owns).
+
+        `keys` are the (de-duplicated) comparison values of all the objects being checked in the same event loop tick
+        (see `get_comparison_value`). Return a list of the same length, with None for each key that passes or a
+        RoleDenial for each key that doesn't. May be implemented as a coroutine.
+
+        This is used by async resolvers. Sync resolvers still call `check_role` for each object.
+        """
+        raise NotImplementedError
+
+    def get_comparison_values(self, sources: Sequence[Any]) -> list[Any]:
+        """`get_comparison_value` for many objects at once (for roles without an `input_arg`)"""
+        if self.comparison_key is None:
+            return [None] * len(sources)
+
+        try:
+            return list(map(attrgetter(self.comparison_key), sources))
+        except AttributeError:
+            return [getattr(source, self.comparison_key, MISSING) for source in sources]
+
+    def is_role_valid_vectorized(
+        self, scopes: set[str] | None, comparison_values: Sequence[Any], context: Context
+    ) -> Sequence[bool]:
+        """
+        Optional. Evaluates the role for many comparison values at once (see `get_comparison_values`), and returns a
+        boolean mask - True where the role passes. Values the role fails are denied with `get_vectorized_denial`.
+
+        This is used to authorize large lists (see FancyAuthListExtension), so implementations should avoid per-value
+        Python work where possible (e.g. by comparing with `map(operator.eq, ...)`). The precheck (if any) has already passed. Async and
+        batched roles are evaluated through `check_role`/`batch_is_role_valid` instead.
+        """
+        raise NotImplementedError
+
+    def get_vectorized_denial(
+        self, scopes: set[str] | None, context: Context
+    ) -> RoleDenial:
+        """The denial for values that `is_role_valid_vectorized` fails"""
+        return self.deny("denied", f"{self.__class__.__name__} denied access")
+
+    def get_decision_cache_key(
+        self, source: Any, context: Context, input_arg: Any
+    ) -> Hashable | None:
+        """
+        Returns a hashable key that uniquely identifies the outcome of `is_role_valid` for these arguments, or None
+        if the decision can't be cached.
+        """
+        if self.context_keys is None:
+            return None
+
+        comparison_value = self.get_comparison_value(source, input_arg)
+        if comparison_value is MISSING:
+            # let is_role_valid raise the appropriate error
+            return None
+
+        key = (
+            comparison_value,
+            *(_freeze(getattr(context, name, None)) for name in self.context_keys),
+        )
+
+        try:
+            hash(key)
+        except TypeError:
+            return None
+
+        return key
+
+    def get_intern_key(self) -> Hashable:
+        """
+        Identifies how this role is configured: its class, and every attribute set on the instance (the applied
+        scopes, `input_arg`, and any arguments of the role's own constructor). Policies whose roles all have the same
+        keys are interchangeable, and are shared across the schema (see `intern_policy`).
+
+        Roles whose configuration can't be hashed are never shared with another instance. (The key is worked out on
+        first use - roles shouldn't be reconfigured after they've been applied.)
+        """
+        key = self.__dict__.get("_intern_key")
+        if key is not None:
+            return key
+
+        config = tuple(
+            (name, _freeze(value))
+            for name, value in sorted(vars(self).items())
+            if name not in _DERIVED_ATTRIBUTES
+        )
+        key = (type(self), config)
+
+        try:
+            hash(key)
+        except TypeError:
+            # (roles hash by identity)
+            key = (type(self), self)
+
+        self._intern_key = key
+        return key
+
+    def get_result_cache_key(
+        self, source: Any, context: Context, input_arg: Any
+    ) -> RoleResultCacheKey | None:
+        """Returns the key for this role's result in `result_cache` (or None if it can't be cached)"""
+        if self.result_cache is None:
+            return None
+
+        decision_key = self.get_decision_cache_key(source, context, input_arg)
+        if decision_key is None:
+            return None
+
+        comparison_value, *subject = decision_key
+
+        return RoleResultCacheKey(
+            role_class=type(self),
+            config=self.get_intern_key(),
+            comparison_value=comparison_value,
+            subject=tuple(subject),
+        )
+
+
+# returned by get_comparison_value if the object being returned doesn't have the role's comparison_key attribute
+MISSING: Any = object()
+
+# instance attributes that are worked out from the role's configuration (rather than being part of it)
+_DERIVED_ATTRIBUTES = frozenset({"_input_arg_getter", "_scope_mask", "_intern_key"})
+
+
+def _freeze(value: Any) -> Any:
+    """make common unhashable context values (e.g. a set of scopes) usable in a cache key"""
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
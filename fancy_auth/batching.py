@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import inspect
+from typing import Any
+from typing import Hashable
+
+from fancy_auth.base_role import BaseRole
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.context import Context
+from fancy_auth.tick_batcher import TickBatcher
+
+
+class RoleBatcher(TickBatcher["RoleDenial | None"]):
+    """
+    Collects the comparison values that a role is asked about during one event loop tick, and evaluates them all with
+    a single call to `role.batch_is_role_valid`.
+
+    One of these exists per role, per request (see `RequestState.get_role_batcher`). Results are remembered for the
+    rest of the request, so each comparison value is only looked up once.
+    """
+
+    def __init__(self, role: BaseRole):
+        super().__init__()
+        self.role = role
+
+    async def _run_batch(self, keys: list[Hashable], context: Context) -> None:
+        role_name = self.role.__class__.__name__
+        results: Any = []
+
+        try:
+            results = self.role.batch_is_role_valid(keys, context)
+            if inspect.isawaitable(results):
+                results = await results
+
+            if len(results) != len(keys):
+                raise ValueError(
+                    f"{role_name}.batch_is_role_valid(...) returned {len(results)} results for {len(keys)} keys"
+                )
+        except Exception as e:
+            # (the traceback references this frame - and so the context. Results live for the whole request.)
+            e.__traceback__ = None
+            results = [RoleDenial.from_exception(role_name, e)] * len(keys)
+        except BaseException:
+            # e.g. we were cancelled - make sure nobody is left waiting forever
+            results = [
+                self.role.deny("batch_cancelled", f"{role_name} batch was cancelled")
+            ] * len(keys)
+            raise
+        finally:
+            for key, result in zip(keys, results):
+                future = self.get_future(key)
+                if not future.done():
+                    future.set_result(result)
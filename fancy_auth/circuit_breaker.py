@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Literal
+
+from fancy_auth.base_role import RoleDenial
+
+if TYPE_CHECKING:
+    from fancy_auth.base_role import BaseRole
+
+# "closed": the role is called as usual
+# "open": the role's backend is failing - calls are rejected until `cool_down` has passed
+# "half_open": the cool down has passed - a single trial call decides whether to close (or re-open) the circuit
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpenError(Exception):
+    """Attached to the denial returned while a role's circuit is open"""
+
+
+@dataclass
+class CircuitBreakerStats:
+    successes: int = 0
+    failures: int = 0
+    # calls that weren't made because the circuit was open
+    rejected: int = 0
+    # rejected calls answered with a stale grant from the role's result cache
+    stale_grants_served: int = 0
+    times_opened: int = 0
+
+
+class CircuitBreaker:
+    """
+    Stops calling a role whose backend is failing (i.e. the role raised, or didn't finish within its deadline) for
+    `cool_down` seconds, once it has failed `failure_threshold` times in a row.
+
+    Roles opt in by setting `circuit_breaker` - one breaker is shared by every instance of the role class:
+
+        class UserIsInGroup(BaseRole):
+            circuit_breaker = CircuitBreaker(failure_threshold=5, cool_down=30)
+
+    While the circuit is open, the role denies access with the reason "circuit_open". With
+    `serve_stale_grants=True`, grants that recently expired from the role's `result_cache` (see
+    `RoleResultCache(stale_ttl=...)`) are served instead. Ordinary denials don't count as failures.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        cool_down: float = 30.0,
+        serve_stale_grants: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cool_down = cool_down
+        self.serve_stale_grants = serve_stale_grants
+        self.clock = clock
+        self.stats = CircuitBreakerStats()
+
+        self._state: CircuitState = "closed"
+        self._consecutive_failures = 0
+        # when the circuit was opened (or when the current half-open trial call started)
+        self._since = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == "open" and self.clock() - self._since >= self.cool_down:
+                return "half_open"
+            return self._state
+
+    def allow_call(self) -> bool:
+        """Returns True if the role should be called now (if not, the call counts as rejected)"""
+        with self._lock:
+            if self._state == "closed":
+                return True
+
+            now = self.clock()
+            # (a trial call that never reported back - e.g. it was cancelled - doesn't hold the circuit forever)
+            if now - self._since >= self.cool_down:
+                self._state = "half_open"
+                self._since = now
+                return True
+
+            self.stats.rejected += 1
+            return False
+
+    def record(self, denial: RoleDenial | None) -> None:
+        """Records the outcome of a call that `allow_call` allowed"""
+        failed = denial is not None and denial.exception is not None
+
+        with self._lock:
+            if not failed:
+                self.stats.successes += 1
+                self._consecutive_failures = 0
+                self._state = "closed"
+                return
+
+            self.stats.failures += 1
+            self._consecutive_failures += 1
+
+            if (
+                self._state == "half_open"
+                or self._consecutive_failures >= self.failure_threshold
+            ):
+                if self._state != "open":
+                    self.stats.times_opened += 1
+                self._state = "open"
+                self._since = self.clock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._consecutive_failures = 0
+
+    def get_rejected_result(
+        self, role: BaseRole, source: Any, context: Any, input_arg: Any
+    ) -> RoleDenial | None:
+        """The result of a call that was rejected: a recently cached grant (if allowed), otherwise a denial"""
+        if self.serve_stale_grants and role.result_cache is not None:
+            cache_key = role.get_result_cache_key(source, context, input_arg)
+            if cache_key is not None:
+                found, result = role.result_cache.get_stale(cache_key)
+                if found and result is None:
+                    self.stats.stale_grants_served += 1
+                    return None
+
+        role_name = role.__class__.__name__
+        message = f"{role_name} is unavailable (circuit open)"
+        return RoleDenial(role_name, "circuit_open", message, CircuitOpenError(message))
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import inspect
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Collection
+from typing import Hashable
+
+from fancy_auth.tick_batcher import TickBatcher
+
+if TYPE_CHECKING:
+    from fancy_auth.base_role import BaseRole
+    from fancy_auth.context import Context
+
+# (sources, context) -> the comparison value of each source
+LoadFn = Callable[[list[Any], Any], "Awaitable[list[Any]] | list[Any]"]
+
+
+class ComparisonKeyLoader:
+    """
+    A comparison key whose values have to be fetched (e.g. from the database), declared on the protected type in
+    place of a `strawberry.Private` attribute or a `@property`. See `comparison_key_loader`.
+    """
+
+    def __init__(self, load_fn: LoadFn):
+        self.load_fn = load_fn
+        self.name = getattr(load_fn, "__name__", "comparison_key")
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+
+        raise TypeError(
+            f"{self.name} is loaded asynchronously, and can only be read by FancyAuth roles on fields that are "
+            f"resolved asynchronously"
+        )
+
+
+def comparison_key_loader(load_fn: LoadFn) -> ComparisonKeyLoader:
+    """
+    Declares a role's comparison key as a batch loader, for when the value isn't already on the object:
+
+        @fancy_auth(UserMatches())
+        @strawberry.type
+        class Review:
+            id: strawberry.ID
+
+            @comparison_key_loader
+            async def fancy_auth_user_owner_id(reviews: list[Review], context: Context) -> list[str]:
+                return await db.get_review_owner_ids([review.id for review in reviews])
+
+    The loader is called with every object whose comparison key is needed during one event loop tick, and returns
+    their values in the same order. Each object is loaded at most once per request, and the values are awaited
+    before the roles run - so protected fields must be resolved asynchronously.
+    """
+    return ComparisonKeyLoader(load_fn)
+
+
+def get_comparison_loaders(
+    origin: Any, roles: Collection[BaseRole]
+) -> dict[str, ComparisonKeyLoader]:
+    """Returns the loaders declared on `origin` (a protected type) for the roles' comparison keys"""
+    loaders = {}
+
+    for role in roles:
+        if role.comparison_key is None or role._input_arg is not None:
+            continue
+
+        loader = getattr(origin, role.comparison_key, None)
+        if isinstance(loader, ComparisonKeyLoader):
+            loaders[role.comparison_key] = loader
+
+    return loaders
+
+
+class ComparisonKeyLoadError(AttributeError):
+    """Raised when reading a comparison key whose loader failed (the loader's error is the `__cause__`)"""
+
+
+class LoadedSource:
+    """
+    Stands in for the object being checked while its roles run: the loaded comparison keys are read from here, and
+    everything else from the object itself.
+    """
+
+    __slots__ = ("_source", "_values", "_errors")
+
+    def __init__(
+        self, source: Any, values: dict[str, Any], errors: dict[str, BaseException]
+    ):
+        object.__setattr__(self, "_source", source)
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_errors", errors)
+
+    def __getattribute__(self, name: str) -> Any:
+        # (overridden rather than `__getattr__`, as roles read with `source.__getattribute__(comparison_key)`)
+        if name == "__getattribute__":
+            return object.__getattribute__(self, name)
+
+        values = object.__getattribute__(self, "_values")
+        if name in values:
+            return values[name]
+
+        error = object.__getattribute__(self, "_errors").get(name)
+        if error is not None:
+            raise ComparisonKeyLoadError(f"Could not load {name}: {error}") from error
+
+        return getattr(object.__getattribute__(self, "_source"), name)
+
+
+class ComparisonKeyBatcher(TickBatcher[Any]):
+    """
+    Collects the objects whose comparison key is needed during one event loop tick, and loads them all with a single
+    call to the loader.
+
+    One of these exists per loader, per request (see `RequestState.get_comparison_key_batcher`). Each object is only
+    loaded once per request.
+    """
+
+    def __init__(self, loader: ComparisonKeyLoader):
+        super().__init__()
+        self.loader = loader
+
+    def get_key(self, item: Any) -> Hashable:
+        # (objects are often unhashable - the batcher holds on to them, so their id() can't be reused)
+        return id(item)
+
+    async def _run_batch(self, sources: list[Any], context: Context) -> None:
+        results: Any = None
+        error: BaseException | None = None
+
+        try:
+            results = self.loader.load_fn(sources, context)
+            if inspect.isawaitable(results):
+                results = await results
+
+            if len(results) != len(sources):
+                raise ValueError(
+                    f"{self.loader.name} loader returned {len(results)} values for {len(sources)} objects"
+                )
+        except Exception as e:
+            # (the traceback references this frame - and so the context. Results live for the whole request.)
+            e.__traceback__ = None
+            error = e
+        except BaseException as e:
+            # e.g. we were cancelled - make sure nobody is left waiting forever
+            error = RuntimeError(f"{self.loader.name} loader was interrupted ({e!r})")
+            raise
+        finally:
+            for index, source in enumerate(sources):
+                future = self.get_future(source)
+                if future.done():
+                    continue
+
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[index])
@@ -14,4 +14,7 @@ class Context:
     user_id: Optional[str] = None
 
     # If the user is logged in as a dog, this will be set to their allowed scopes.
-    dog_scopes: Optional[set[str]] = None
\ No newline at end of file
+    dog_scopes: Optional[set[str]] = None
+
+    # If the user is logged in, this will be set to a signed token carrying their scopes (see UserHasScopeToken).
+    scope_token: Optional[str] = None
\ No newline at end of file
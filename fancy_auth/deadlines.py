@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Awaitable
+from typing import Iterator
+
+from strawberry.extensions import SchemaExtension
+
+from fancy_auth.base_role import BaseRole
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.request_state import get_request_state
+
+
+@dataclass
+class RoleTimingStats:
+    """How long a role class takes to evaluate (see ROLE_TIMINGS)"""
+
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    # evaluations that denied access because they raised (or hit a deadline)
+    failures: int = 0
+    deadlines_exceeded: int = 0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+# Role class name -> timings, across every request served by this process (e.g. to export as a metric). Covers the
+# evaluations of async roles, and of roles with a `timeout` or `circuit_breaker`.
+ROLE_TIMINGS: dict[str, RoleTimingStats] = {}
+
+
+def record_role_timing(role: BaseRole, seconds: float, denial: RoleDenial | None) -> None:
+    role_name = role.__class__.__name__
+    stats = ROLE_TIMINGS.get(role_name)
+    if stats is None:
+        stats = ROLE_TIMINGS[role_name] = RoleTimingStats()
+
+    stats.calls += 1
+    stats.total_seconds += seconds
+    stats.max_seconds = max(stats.max_seconds, seconds)
+
+    if denial is not None and denial.exception is not None:
+        stats.failures += 1
+        if denial.reason == "deadline_exceeded":
+            stats.deadlines_exceeded += 1
+
+
+def deny_deadline_exceeded(role: BaseRole, timeout: float) -> RoleDenial:
+    """
+    Access is denied (fail closed) when a role doesn't finish in time. The denial carries a TimeoutError, so it's
+    treated like a role error: it's not cached between requests, and counts as a failure for the role's circuit breaker.
+    """
+    role_name = role.__class__.__name__
+    message = f"{role_name} did not finish within its deadline ({max(timeout, 0):.3g}s)"
+    return RoleDenial(role_name, "deadline_exceeded", message, TimeoutError(message))
+
+
+def get_role_timeout(role: BaseRole, context: Any) -> float | None:
+    """
+    Returns how long `role` may take to evaluate: the smaller of the role's `timeout`, and the time left until the
+    request's deadline (see FancyAuthDeadlineExtension). None if there's no limit.
+    """
+    timeout = role.timeout
+    deadline = get_request_state(context).deadline
+
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        timeout = remaining if timeout is None else min(timeout, remaining)
+
+    return timeout
+
+
+async def await_with_deadline(
+    role: BaseRole, awaitable: Awaitable[RoleDenial | None], timeout: float
+) -> RoleDenial | None:
+    """Awaits a role's result, giving up (and denying access) after `timeout` seconds"""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        return deny_deadline_exceeded(role, timeout)
+
+
+class FancyAuthDeadlineExtension(SchemaExtension):
+    """
+    Limits the total time that async role evaluation may take during a request - so that a slow identity provider
+    can't stall every protected field. Roles still running at the deadline deny access with the reason
+    "deadline_exceeded" (as do any that start after it).
+
+        schema = strawberry.Schema(query=Query, extensions=[FancyAuthDeadlineExtension(seconds=0.5)])
+
+    Individual roles can also set their own `timeout`. (Sync roles can't be interrupted, so they aren't limited.)
+    """
+
+    def __init__(self, *, seconds: float):
+        self.seconds = seconds
+
+    def on_execute(self) -> Iterator[None]:
+        context = self.execution_context.context
+
+        if context is not None:
+            get_request_state(context).deadline = time.monotonic() + self.seconds
+
+        yield
@@ -0,0 +1,571 @@
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import random
+import sys
+import threading
+import time
+import weakref
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from typing import IO
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Literal
+from typing import NamedTuple
+from typing import Union
+
+OverflowPolicy = Literal["drop", "block"]
+
+
+class DecisionRecord(NamedTuple):
+    """A single access decision made by FancyAuth (see `FancyAuthExtension.log_access_decision`)"""
+
+    trace_id: str
+    schema_coordinate: str
+    # [(role name, scopes applied), ...]
+    roles: list[tuple[str, set[str] | None]]
+    policy_eval_logic: Literal["any", "all"]
+    decision: Literal["granted", "denied"]
+    # [(role name, reason code, message), ...] or None if access was granted
+    reasons_denied: list[tuple[str, str, str]] | None
+
+    def as_dict(self) -> dict[str, Any]:
+        return self._asdict()
+
+
+class DecisionSummary(NamedTuple):
+    """The number of identical decisions made during a time window (or a single request). See `AggregatingSink`."""
+
+    # set when aggregating per request
+    trace_id: str | None
+    window_start: float
+    window_end: float
+    schema_coordinate: str
+    roles: list[tuple[str, set[str] | None]]
+    policy_eval_logic: Literal["any", "all"]
+    decision: Literal["granted", "denied"]
+    count: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return self._asdict()
+
+
+LogRecord = Union[DecisionRecord, DecisionSummary]
+
+
+def _json_default(value: Any) -> Any:
+    # scopes are stored as sets
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def serialize_records(records: list[LogRecord]) -> str:
+    """Serializes records as NDJSON (one JSON object per line)"""
+    return "".join(
+        json.dumps(record.as_dict(), default=_json_default) + "\n" for record in records
+    )
+
+
+class NDJSONWriter:
+    """
+    Writes batches of records as NDJSON to a stream or a file path. (Defaults to stdout.)
+
+    `close` closes the file if the writer opened it (from a path) - streams that were passed in are left open.
+    """
+
+    def __init__(self, stream_or_path: IO[str] | str | None = None):
+        self.stream: IO[str] | None
+        if isinstance(stream_or_path, str):
+            self.stream = open(stream_or_path, "a", encoding="utf-8")
+            self._owns_stream = True
+        else:
+            self.stream = stream_or_path
+            self._owns_stream = False
+
+    def __call__(self, records: list[LogRecord]) -> None:
+        # (look up stdout when writing, in case it's been swapped out since we were created)
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(serialize_records(records))
+        stream.flush()
+
+    def close(self) -> None:
+        if self._owns_stream and self.stream is not None:
+            self.stream.close()
+
+
+def _close_at_exit(ref: weakref.ref[DecisionSink]) -> None:
+    sink = ref()
+    if sink is not None:
+        sink.close()
+
+
+def _register_close_at_exit(sink: DecisionSink) -> None:
+    # (by weak reference, so sinks that are swapped out can still be garbage collected). Exit handlers run in reverse
+    # order - wrapping sinks are created after their inner sink, so they're closed (and flushed into it) first.
+    atexit.register(_close_at_exit, weakref.ref(sink))
+
+
+class DecisionSink(ABC):
+    """Receives every access decision made by FancyAuth."""
+
+    def should_emit(
+        self, schema_coordinate: str, decision: Literal["granted", "denied"]
+    ) -> bool:
+        """
+        Called before each record is built. Return False to skip the decision entirely (e.g. for sampling), which
+        saves building and serializing the record.
+        """
+        return True
+
+    @abstractmethod
+    def emit(self, record: LogRecord) -> None: ...
+
+    def end_request(self, trace_id: str) -> None:
+        """Called once a request (that logged at least one decision) has ended."""
+
+    def flush(self) -> None:
+        """Blocks until all emitted records have been written."""
+
+    def close(self) -> None:
+        """Flushes, and releases any resources held by the sink."""
+        self.flush()
+
+
+class PrintSink(DecisionSink):
+    """Prints each record synchronously. (Handy for local development - but this blocks the resolver on stdout!)"""
+
+    def emit(self, record: LogRecord) -> None:
+        print(record.as_dict())
+
+
+# Put on the queue to tell the writer thread to exit
+_STOP = object()
+
+
+class QueuedSink(DecisionSink):
+    """
+    Hands records off to a bounded in-memory queue, which is drained in batches by a background thread.
+
+    This keeps log I/O (and serialization) off the resolver's hot path - `emit` only has to enqueue the record.
+
+    When the queue is full, `overflow` decides what happens:
+    - "drop": the record is discarded (and counted in `dropped`). Resolvers never wait on logging.
+    - "block": `emit` waits for space in the queue. No records are lost.
+
+    Any records still queued are written when the process exits. Closing the sink also closes `writer` (if it has a
+    `close` method).
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[list[LogRecord]], None],
+        *,
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        overflow: OverflowPolicy = "drop",
+    ):
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"overflow must be 'drop' or 'block' (got {overflow!r})")
+
+        self.writer = writer
+        self.batch_size = batch_size
+        self.overflow = overflow
+
+        # metrics
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        _register_close_at_exit(self)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(
+                target=self._run, name="fancy-auth-decision-log", daemon=True
+            )
+            self._thread.start()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def emit(self, record: LogRecord) -> None:
+        if self._closed:
+            self._count("dropped")
+            return
+
+        if self._thread is None:
+            self._ensure_started()
+
+        if self.overflow == "block":
+            self._queue.put(record)
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self._count("dropped")
+                return
+
+        self._count("emitted")
+
+    def _write(self, batch: list[LogRecord]) -> None:
+        try:
+            self.writer(batch)
+            self.written += len(batch)
+        except Exception:
+            # Never let a logging failure kill the writer thread.
+            self.write_errors += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            stop = item is _STOP
+            batch = [] if stop else [item]
+            taken = 1
+
+            # take whatever else is already waiting (up to batch_size)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                taken += 1
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._write(batch)
+
+            for _ in range(taken):
+                self._queue.task_done()
+
+            if stop:
+                return
+
+    def flush(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+        close_writer = getattr(self.writer, "close", None)
+        if close_writer is not None:
+            close_writer()
+
+
+class SampledSink(DecisionSink):
+    """
+    Forwards every denial, but only a sample of grants, to `inner`.
+
+    `grant_sample_rate` is the fraction of grants to keep (e.g. 0.01 keeps 1%). Busy (or especially interesting) schema
+    coordinates can be given their own rate with `grant_sample_rates={"User.name": 0.001}`.
+    """
+
+    def __init__(
+        self,
+        inner: DecisionSink,
+        *,
+        grant_sample_rate: float = 0.01,
+        grant_sample_rates: dict[str, float] | None = None,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.inner = inner
+        self.grant_sample_rate = grant_sample_rate
+        self.grant_sample_rates = grant_sample_rates or {}
+        self.rng = rng
+
+    def should_emit(
+        self, schema_coordinate: str, decision: Literal["granted", "denied"]
+    ) -> bool:
+        if decision == "denied":
+            # denials are always kept, so they remain fully auditable
+            return self.inner.should_emit(schema_coordinate, decision)
+
+        rate = self.grant_sample_rates.get(schema_coordinate, self.grant_sample_rate)
+        if rate < 1 and self.rng() >= rate:
+            return False
+
+        return self.inner.should_emit(schema_coordinate, decision)
+
+    def emit(self, record: LogRecord) -> None:
+        self.inner.emit(record)
+
+    def end_request(self, trace_id: str) -> None:
+        self.inner.end_request(trace_id)
+
+    def flush(self) -> None:
+        self.inner.flush()
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+# (schema_coordinate, roles, policy_eval_logic, decision)
+_SummaryKey = tuple[str, tuple[tuple[str, Any], ...], str, str]
+
+
+class AggregatingSink(DecisionSink):
+    """
+    Counts identical decisions, and forwards one DecisionSummary per (schema_coordinate, roles, decision) to `inner`.
+
+    - `per_request=False` (default): summaries cover a time window of `window_seconds`. A window's summaries are sent
+      once it closes (by a background timer, or the first decision after it closes), or on `flush`.
+    - `per_request=True`: summaries cover a single request, and are sent when the request ends. Requests that haven't
+      ended after `window_seconds` (e.g. their end couldn't be detected - see FancyAuthRequestExtension) are sent by
+      the timer too.
+
+    With `keep_denials=True` (default), each denial is also forwarded as-is so that denials remain fully auditable.
+    Anything still pending is sent when the process exits.
+
+    `end_request` may be called from a garbage collection finalizer - i.e. in the middle of `emit` on the same thread.
+    It then only queues the request, and `emit` sends its summaries once it's done.
+    """
+
+    def __init__(
+        self,
+        inner: DecisionSink,
+        *,
+        window_seconds: float = 60.0,
+        per_request: bool = False,
+        keep_denials: bool = True,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.inner = inner
+        self.window_seconds = window_seconds
+        self.per_request = per_request
+        self.keep_denials = keep_denials
+        self.clock = clock
+
+        # (reentrant, so a finalizer that fires while we hold it can't deadlock - see `end_request`)
+        self._lock = threading.RLock()
+        # the thread currently holding `_lock`
+        self._owner: int | None = None
+        self._window_start = clock()
+        # trace_id (or None when aggregating by time window) -> (window start, counts)
+        self._counts: dict[
+            str | None, tuple[float, dict[_SummaryKey, list[Any]]]
+        ] = {}
+        # trace_ids of ended requests, waiting for their summaries to be sent (deque operations don't need the lock)
+        self._ended: deque[str] = deque()
+
+        self._timer: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+        _register_close_at_exit(self)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            previous, self._owner = self._owner, threading.get_ident()
+            try:
+                yield
+            finally:
+                self._owner = previous
+
+    def _ensure_timer_started(self) -> None:
+        with self._locked():
+            if self._timer is not None or self._stopped.is_set():
+                return
+
+            self._timer = threading.Thread(
+                target=_run_timer,
+                args=(weakref.ref(self), self._stopped, self.window_seconds),
+                name="fancy-auth-decision-aggregator",
+                daemon=True,
+            )
+            self._timer.start()
+
+    def emit(self, record: LogRecord) -> None:
+        if not isinstance(record, DecisionRecord):
+            self.inner.emit(record)
+            return
+
+        if self.keep_denials and record.decision == "denied":
+            self.inner.emit(record)
+
+        now = self.clock()
+        bucket = record.trace_id if self.per_request else None
+        key = (
+            record.schema_coordinate,
+            tuple(
+                (name, frozenset(scopes) if scopes is not None else None)
+                for name, scopes in record.roles
+            ),
+            record.policy_eval_logic,
+            record.decision,
+        )
+
+        if self._timer is None:
+            self._ensure_timer_started()
+
+        with self._locked():
+            if not self.per_request and now - self._window_start >= self.window_seconds:
+                expired = self._counts.pop(None, None)
+                self._window_start = now
+            else:
+                expired = None
+
+            _, counts = self._counts.setdefault(bucket, (now, {}))
+            entry = counts.get(key)
+            if entry is None:
+                counts[key] = [record, 1]
+            else:
+                entry[1] += 1
+
+        if expired is not None:
+            self._emit_summaries(None, *expired, window_end=now)
+
+        if self._ended:
+            self._emit_ended()
+
+    def _emit_ended(self) -> None:
+        while True:
+            try:
+                trace_id = self._ended.popleft()
+            except IndexError:
+                return
+
+            with self._locked():
+                ended = self._counts.pop(trace_id, None)
+
+            if ended is not None:
+                self._emit_summaries(trace_id, *ended, window_end=self.clock())
+
+    def _flush_expired(self) -> None:
+        """Sends the summaries of windows (or requests) that are older than `window_seconds`. Called by the timer."""
+        now = self.clock()
+
+        with self._locked():
+            if self.per_request:
+                expired = {
+                    bucket: pending
+                    for bucket, pending in self._counts.items()
+                    if now - pending[0] >= self.window_seconds
+                }
+                for bucket in expired:
+                    del self._counts[bucket]
+            elif now - self._window_start >= self.window_seconds:
+                expired = {None: self._counts.pop(None)} if None in self._counts else {}
+                self._window_start = now
+            else:
+                expired = {}
+
+        for bucket, (window_start, counts) in expired.items():
+            self._emit_summaries(bucket, window_start, counts, window_end=now)
+
+    def _emit_summaries(
+        self,
+        trace_id: str | None,
+        window_start: float,
+        counts: dict[_SummaryKey, list[Any]],
+        window_end: float,
+    ) -> None:
+        for record, count in counts.values():
+            self.inner.emit(
+                DecisionSummary(
+                    trace_id=trace_id,
+                    window_start=window_start,
+                    window_end=window_end,
+                    schema_coordinate=record.schema_coordinate,
+                    roles=record.roles,
+                    policy_eval_logic=record.policy_eval_logic,
+                    decision=record.decision,
+                    count=count,
+                )
+            )
+
+    def end_request(self, trace_id: str) -> None:
+        if self.per_request:
+            self._ended.append(trace_id)
+
+            # (if this thread is in the middle of `emit`, it'll send the summaries once it's done)
+            if self._owner != threading.get_ident():
+                self._emit_ended()
+
+        self.inner.end_request(trace_id)
+
+    def flush(self) -> None:
+        now = self.clock()
+
+        with self._locked():
+            self._ended.clear()
+            pending = self._counts
+            self._counts = {}
+            self._window_start = now
+
+        for bucket, (window_start, counts) in pending.items():
+            self._emit_summaries(bucket, window_start, counts, window_end=now)
+
+        self.inner.flush()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self.flush()
+        self.inner.close()
+
+
+def _run_timer(
+    ref: weakref.ref[AggregatingSink], stopped: threading.Event, interval: float
+) -> None:
+    # (only holds on to the sink while flushing - so it can still be garbage collected)
+    while not stopped.wait(interval):
+        sink = ref()
+        if sink is None:
+            return
+
+        try:
+            sink._flush_expired()
+        except Exception:
+            # Never let a logging failure kill the timer.
+            pass
+
+        del sink
+
+
+_sink: DecisionSink | None = None
+_sink_lock = threading.Lock()
+
+
+def get_decision_sink() -> DecisionSink:
+    """Returns the sink that access decisions are sent to. Defaults to queued NDJSON on stdout."""
+    global _sink
+
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = QueuedSink(NDJSONWriter())
+
+    return _sink
+
+
+def set_decision_sink(sink: DecisionSink) -> None:
+    """Sets where access decisions are sent to (e.g. `QueuedSink(NDJSONWriter("/var/log/fancy_auth.ndjson"))`)"""
+    global _sink
+    _sink = sink
@@ -11,6 +11,8 @@ from fancy_auth.directives import (
     get_directive_description_from_policy,
 )
 from fancy_auth.field_extension import FancyAuthExtension
+from fancy_auth.list_filter import FancyAuthListExtension
+from fancy_auth.list_filter import ListMode
 from fancy_auth.policy import get_policy_from_role_args
 
 T = TypeVar(
@@ -34,6 +36,9 @@ def fancy_auth(
     *,
     match_all: list[BaseRole] | None = None,
     match_any: list[BaseRole] | None = None,
+    detailed_reasons: bool = False,
+    list_mode: ListMode | None = None,
+    speculative: bool = False,
 ) -> Callable[[T], T]:
     """
     Apply this as a decorator to a Strawberry type to protect all fields with fancy_auth:
@@ -55,9 +60,43 @@ def fancy_auth(
                 return 'hunter2'
 
     (Reminder: we reccomend applying to whole types where possible!)
+
+    By default, role evaluation stops as soon as the outcome is known. Pass `detailed_reasons=True` to evaluate (and
+    log) every role failure.
+
+    List fields returning a protected type can authorize all of their items at once, and drop (or null out) the items
+    the viewer can't access - see `FancyAuthListExtension`:
+
+        @strawberry.type
+        class Query:
+            @fancy_auth(list_mode="drop")
+            @strawberry.field
+            def saved_credit_cards(self) -> list[CreditCardDetails]:
+                ...
+
+    Pass `speculative=True` to start an async resolver at the same time as the policy check (rather than after it),
+    for side-effect free fields protected by slow (e.g. async) roles. If access is denied, the resolver is cancelled and
+    its result thrown away. This only applies to queries - mutations are always checked first.
     """
 
     def wrapper(strawberry_type_or_field: T) -> T:
+        if list_mode is not None:
+            if not isinstance(strawberry_type_or_field, StrawberryField):
+                raise TypeError("list_mode can only be used on fields")
+
+            if role is not None or match_all is not None or match_any is not None:
+                raise ValueError(
+                    "list_mode uses the policy of the list's item type - don't pass roles as well"
+                )
+
+            if speculative:
+                raise ValueError("speculative can't be used with list_mode")
+
+            strawberry_type_or_field.extensions.append(
+                FancyAuthListExtension(mode=list_mode)
+            )
+            return strawberry_type_or_field
+
         if isinstance(strawberry_type_or_field, StrawberryField):
             # apply the extension to the field.
             strawberry_type_or_field.extensions.append(
@@ -65,6 +104,8 @@ def fancy_auth(
                     role=role,
                     match_all=match_all,
                     match_any=match_any,
+                    detailed_reasons=detailed_reasons,
+                    speculative=speculative,
                 )
             )
         else:
@@ -75,6 +116,14 @@ def fancy_auth(
                 match_any=match_any,
             )
 
+            # Built once, and shared by every field of the type.
+            field_policy = get_policy_from_role_args(
+                applied_to="field",
+                role=role,
+                match_all=match_all,
+                match_any=match_any,
+            )
+
             strawberry_type = strawberry_type_or_field
 
             # @fancy_auth must be applied before @strawberry.type.
@@ -88,11 +137,14 @@ def fancy_auth(
                 # ...or maybe it's duplicated by mistake.
                 #
                 # Either way, it's ok - if this happens, we'll evaluate all instances of fancy_auth on the field.
+                #
+                # All fields share the type's policy, so it is evaluated once per object (rather than per field).
                 field.extensions.append(
-                    FancyAuthExtension(
-                        role=role,
-                        match_all=match_all,
-                        match_any=match_any,
+                    FancyAuthExtension.from_policy(
+                        field_policy,
+                        detailed_reasons=detailed_reasons,
+                        type_policy=policy,
+                        speculative=speculative,
                     )
                 )
 
@@ -11,10 +11,13 @@ from strawberry.schema_directive import (  # noqa: F403 - (why is flake8 complai
 
 from fancy_auth.base_role import BaseRole
 from fancy_auth.policy import FancyAuthPolicy
+from fancy_auth.policy import PolicyKey
+from fancy_auth.policy import get_policy_key
 
 
 @strawberry.enum
 class RoleName(Enum):
+    UserHasScopeToken = "UserHasScopeToken"
     UserIsDog = "UserIsDog"
     UserMatches = "UserMatches"
 
@@ -51,9 +54,26 @@ def _serialize_role_sdl(role: BaseRole) -> str:
     return f"{{{serialized}}}"
 
 
+# Structurally identical policies share a description and directive instance (see `intern_policy`)
+_descriptions: dict[PolicyKey, str] = {}
+_directives: dict[PolicyKey, FancyAuthDirective] = {}
+
+
 def get_directive_description_from_policy(
     policy: FancyAuthPolicy,
 ) -> str:
+    key = get_policy_key(policy)
+    description = _descriptions.get(key)
+
+    if description is None:
+        description = _descriptions.setdefault(
+            key, _build_directive_description(policy)
+        )
+
+    return description
+
+
+def _build_directive_description(policy: FancyAuthPolicy) -> str:
     serialized_roles = ", ".join([_serialize_role_sdl(role) for role in policy.roles])
 
     if len(policy.roles) == 1:
@@ -77,6 +97,16 @@ def get_fancy_auth_directive_from_policy(
     policy: FancyAuthPolicy,
 ) -> FancyAuthDirective:
     """Translates a `FancyAuthPolicy` dict to a `FancyAuthDirective` Strawberry directive."""
+    key = get_policy_key(policy)
+    directive = _directives.get(key)
+
+    if directive is None:
+        directive = _directives.setdefault(key, _build_fancy_auth_directive(policy))
+
+    return directive
+
+
+def _build_fancy_auth_directive(policy: FancyAuthPolicy) -> FancyAuthDirective:
 
     # Translate a fancy_auth role (i.e. inhereted from BaseRole) into a FancyAuthDirectiveRoleInput
     get_role_input: Callable[[BaseRole], FancyAuthDirectiveRoleInput] = (
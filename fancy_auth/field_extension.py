@@ -1,26 +1,43 @@
 from __future__ import annotations
 
+import asyncio
 import dataclasses as dataclasses
 import inspect
 import sys
+import time
 from typing import Any
 from typing import Awaitable
 from typing import Callable
+from typing import Hashable
 from typing import Literal
 
 import strawberry
+from graphql import OperationType
 from strawberry.extensions import FieldExtension
 from strawberry.types.base import has_object_definition
 from strawberry.types.field import StrawberryField
 
+from fancy_auth.base_role import MISSING
 from fancy_auth.base_role import BaseRole
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.comparison_loader import ComparisonKeyLoader
+from fancy_auth.comparison_loader import LoadedSource
+from fancy_auth.comparison_loader import get_comparison_loaders
+from fancy_auth.deadlines import await_with_deadline
+from fancy_auth.deadlines import deny_deadline_exceeded
+from fancy_auth.deadlines import get_role_timeout
+from fancy_auth.deadlines import record_role_timing
+from fancy_auth.decision_log import DecisionRecord
+from fancy_auth.decision_log import get_decision_sink
 from fancy_auth.directives import (
     get_directive_description_from_policy,
 )
 from fancy_auth.directives import get_fancy_auth_directive_from_policy
-from fancy_auth.get_input_arg import get_input_arg_from_field
 from fancy_auth.policy import FancyAuthPolicy
 from fancy_auth.policy import get_policy_from_role_args
+from fancy_auth.policy import is_offloaded
+from fancy_auth.request_state import ObjectDecision
+from fancy_auth.request_state import get_request_state
 
 if sys.version_info < (3, 11):  # pragma: no cover
     from exceptiongroup import ExceptionGroup
@@ -32,16 +49,41 @@ class FancyAuthAccessDeniedError(Exception):
     pass
 
 
+def _clear_tracebacks(exception: BaseException) -> None:
+    seen: set[int] = set()
+    current: BaseException | None = exception
+
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        current.__traceback__ = None
+        current = current.__cause__ or current.__context__
+
+
+def _discard_result(task: asyncio.Future[Any]) -> None:
+    # (retrieve the exception, so asyncio doesn't warn that it was never retrieved)
+    if not task.cancelled():
+        task.exception()
+
+
 class FancyAuthExtension(FieldExtension):
     # this object stores all roles declared on the field and the associated evaluation logic (and/or)
     policy: FancyAuthPolicy
 
+    # when applied via `@fancy_auth` on a whole type, this is the policy of the type (shared by all of its fields)
+    type_policy: FancyAuthPolicy | None
+
+    # comparison key -> the loader declared for it on the parent type (see `comparison_key_loader`). Set by `apply`.
+    comparison_loaders: dict[str, ComparisonKeyLoader]
+
     def __init__(
         self,
         role: BaseRole | None = None,
         *,
         match_all: list[BaseRole] | None = None,
         match_any: list[BaseRole] | None = None,
+        detailed_reasons: bool = False,
+        type_policy: FancyAuthPolicy | None = None,
+        speculative: bool = False,
     ):
         self.policy = get_policy_from_role_args(
             applied_to="field",
@@ -49,11 +91,57 @@ class FancyAuthExtension(FieldExtension):
             match_all=match_all,
             match_any=match_any,
         )
+        self.type_policy = type_policy
+
+        # evaluate every role (rather than stopping once the outcome is known) so all failures are logged
+        self.detailed_reasons = detailed_reasons
+
+        # start the (async) resolver while the policy is still being evaluated - for queries only
+        self.speculative = speculative
+
+        self.comparison_loaders = {}
 
         self.directive = get_fancy_auth_directive_from_policy(self.policy)
         self.description = get_directive_description_from_policy(self.policy)
 
+    @classmethod
+    def from_policy(
+        cls,
+        policy: FancyAuthPolicy,
+        *,
+        detailed_reasons: bool = False,
+        type_policy: FancyAuthPolicy | None = None,
+        speculative: bool = False,
+    ) -> FancyAuthExtension:
+        """
+        Creates an extension for an already built policy - e.g. `@fancy_auth` on a type builds the policy once and
+        shares it (and its directive and description) between every field.
+        """
+        extension = cls.__new__(cls)
+        extension.policy = policy
+        extension.type_policy = type_policy
+        extension.detailed_reasons = detailed_reasons
+        extension.speculative = speculative
+        extension.comparison_loaders = {}
+        extension.directive = get_fancy_auth_directive_from_policy(policy)
+        extension.description = get_directive_description_from_policy(policy)
+        return extension
+
     def apply(self, field: StrawberryField) -> None:
+        self.comparison_loaders = get_comparison_loaders(field.origin, self.policy.roles)
+        # Only async resolvers can run alongside the policy check - a sync resolver would run to completion first.
+        self.resolves_speculatively = self.speculative and field.is_async
+
+        if (
+            self.policy.has_async_roles
+            or self.policy.has_batched_roles
+            or self.comparison_loaders
+        ):
+            # Async roles (and comparison keys) can only be evaluated by `resolve_async` - and batching only happens
+            # there. Opting out of sync resolution makes Strawberry run sync resolvers through the async extension
+            # chain too.
+            self.supports_sync = False
+
         field.directives.append(self.directive)
 
         if field.description is None:
@@ -95,9 +183,10 @@ class FancyAuthExtension(FieldExtension):
                 )
 
                 # The comparison key might also be defined as a class property method (i.e. a method using `@property`)
+                # - or loaded (see `comparison_key_loader`)
                 has_comparison_property_method = isinstance(
                     getattr(field.origin, role.comparison_key, None), property
-                )
+                ) or role.comparison_key in self.comparison_loaders
 
                 if not comparison_field and not has_comparison_property_method:
                     # Get the parent type name (so we can print it in the error message)
@@ -116,123 +205,703 @@ class FancyAuthExtension(FieldExtension):
                         f"{role.comparison_key} was not found as an attribute on the type."
                     )
 
-    def evaluate_role(
-        self, role: BaseRole, source: Any, info: strawberry.Info, inputs: Any
-    ) -> bool:
-        input_arg = (
-            get_input_arg_from_field(role._input_arg, inputs)
-            if role._input_arg is not None
+    def get_role_input_arg(self, role: BaseRole, inputs: Any) -> Any:
+        return (
+            role._input_arg_getter(inputs)
+            if role._input_arg_getter is not None
             else None
         )
 
-        return role.is_role_valid(
-            scopes=role._scopes_applied,
-            source=source,
-            context=info.context,
-            input_arg=input_arg,
-        )
+    def evaluate_role(
+        self, role: BaseRole, source: Any, info: strawberry.Info, inputs: Any
+    ) -> RoleDenial | None:
+        """Returns None if the role passed, or a RoleDenial describing why it didn't."""
+        try:
+            input_arg = self.get_role_input_arg(role, inputs)
+
+            if role.has_precheck:
+                # (the context-only part of the role - decided once per request)
+                denial = get_request_state(info.context).get_precheck(role, info.context)
+                if denial is not None:
+                    return denial
+
+            # Roles may opt in to sharing their results between requests
+            result_cache = role.result_cache
+            cache_key = (
+                role.get_result_cache_key(source, info.context, input_arg)
+                if result_cache is not None
+                else None
+            )
+            if cache_key is not None:
+                found, denial = result_cache.get(cache_key)  # type: ignore[union-attr]
+                if found:
+                    return denial
+
+            breaker = role.circuit_breaker
+            if breaker is None:
+                denial = role.check_role(
+                    scopes=role._scopes_applied,
+                    source=source,
+                    context=info.context,
+                    input_arg=input_arg,
+                )
+            elif not breaker.allow_call():
+                return breaker.get_rejected_result(role, source, info.context, input_arg)
+            else:
+                start = time.perf_counter()
+                try:
+                    denial = role.check_role(
+                        scopes=role._scopes_applied,
+                        source=source,
+                        context=info.context,
+                        input_arg=input_arg,
+                    )
+                except Exception as e:
+                    denial = RoleDenial.from_exception(role.__class__.__name__, e)
+
+                record_role_timing(role, time.perf_counter() - start, denial)
+                breaker.record(denial)
+
+            if cache_key is not None:
+                result_cache.set(cache_key, denial)  # type: ignore[union-attr]
+
+            return denial
+        except Exception as e:
+            return RoleDenial.from_exception(role.__class__.__name__, e)
 
     def evaluate_roles(
         self, source: Any, info: strawberry.Info, inputs: Any
-    ) -> list[tuple[str, Exception]]:
+    ) -> list[RoleDenial]:
         """
         Evaluates the set of policies provided to @fancy_auth(...)
 
-        Returns a list of tuples of evaluate_policy failures: [[role_name, reason], ...]
+        Roles are tried cheapest first (see `BaseRole.cost`), and we stop as soon as the outcome is known - i.e. at
+        the first passing role of an `any` policy, or the first failing role of an `all` policy. Set
+        `detailed_reasons=True` to evaluate every role and collect the full list of failures.
+
+        Returns the list of role denials.
         """
-        failures: list[tuple[str, Exception]] = []
+        failures: list[RoleDenial] = []
+        short_circuit = not self.detailed_reasons
+        match_any = self.policy.evaluation_logic == "any"
 
-        for role in self.policy.roles:
-            try:
-                result = self.evaluate_role(role, source, info, inputs)
-            except Exception as e:
-                failures.append((role.__class__.__name__, e))
+        for role in self.policy.evaluation_order:
+            denial = self.evaluate_role(role, source, info, inputs)
+
+            if denial is None:
+                if short_circuit and match_any:
+                    # one passing role is enough
+                    break
                 continue
 
-            if (
-                result is False
-            ):  # pragma: no cover (sanity check -- roles shouldn't ever return False)
-                failures.append(
-                    (
-                        role.__class__.__name__,
-                        Exception(
-                            f"{role.__class__.__name__}.is_role_valid(...) returned False. (You should raise an error instead!)"
-                        ),
-                    )
-                )
+            failures.append(denial)
+
+            if short_circuit and not match_any:
+                # one failing role is enough
+                break
 
         return failures
 
+    async def evaluate_role_async(
+        self, role: BaseRole, source: Any, info: strawberry.Info, inputs: Any
+    ) -> RoleDenial | None:
+        try:
+            input_arg = self.get_role_input_arg(role, inputs)
+
+            if role.has_precheck:
+                denial = get_request_state(info.context).get_precheck(role, info.context)
+                if denial is not None:
+                    return denial
+
+            result_cache = role.result_cache
+            cache_key = (
+                role.get_result_cache_key(source, info.context, input_arg)
+                if result_cache is not None
+                else None
+            )
+            if cache_key is not None:
+                found, denial = result_cache.get(cache_key)  # type: ignore[union-attr]
+                if found:
+                    return denial
+
+            breaker = role.circuit_breaker
+            if breaker is not None and not breaker.allow_call():
+                return breaker.get_rejected_result(role, source, info.context, input_arg)
+
+            timeout = get_role_timeout(role, info.context)
+            if timeout is not None and timeout <= 0:
+                # (the request's deadline has already passed - don't even start)
+                denial = deny_deadline_exceeded(role, timeout)
+                record_role_timing(role, 0.0, denial)
+                if breaker is not None:
+                    breaker.record(denial)
+                return denial
+
+            key = (
+                role.get_comparison_value(source, input_arg)
+                if role.supports_batching
+                else MISSING
+            )
+
+            result: Awaitable[RoleDenial | None]
+            if key is not MISSING and isinstance(key, Hashable):
+                # Wait for our slice of the batch. (shield - other fields may be waiting on the same result)
+                result = asyncio.shield(
+                    get_request_state(info.context)
+                    .get_role_batcher(role)
+                    .load(key, info.context)
+                )
+            elif is_offloaded(role):
+                # (a blocking role - keep it off the event loop)
+                result = role.executor.check_role(  # type: ignore[union-attr]
+                    role, source, info.context, input_arg
+                )
+            else:
+                result = role.check_role_async(
+                    scopes=role._scopes_applied,
+                    source=source,
+                    context=info.context,
+                    input_arg=input_arg,
+                )
+
+            start = time.perf_counter()
+            denial = (
+                await result
+                if timeout is None
+                else await await_with_deadline(role, result, timeout)
+            )
+            record_role_timing(role, time.perf_counter() - start, denial)
+
+            if breaker is not None:
+                breaker.record(denial)
+
+            if cache_key is not None:
+                result_cache.set(cache_key, denial)  # type: ignore[union-attr]
+
+            return denial
+        except Exception as e:
+            return RoleDenial.from_exception(role.__class__.__name__, e)
+
+    async def evaluate_roles_async(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> list[RoleDenial]:
+        """
+        The async equivalent of `evaluate_roles`.
+
+        Sync roles are evaluated first (inline, cheapest first) since they may decide the outcome without us having to
+        await anything. The remaining async (and batched) roles are then evaluated concurrently - and as soon as the
+        outcome is known, any that are still running are cancelled.
+        """
+        if not (
+            self.policy.has_async_roles
+            or self.policy.has_batched_roles
+            or self.policy.has_offloaded_roles
+        ):
+            return self.evaluate_roles(source, info, inputs)
+
+        # role index (in evaluation order) -> denial
+        denials: dict[int, RoleDenial] = {}
+        short_circuit = not self.detailed_reasons
+        match_any = self.policy.evaluation_logic == "any"
+        async_roles: list[tuple[int, BaseRole]] = []
+
+        def is_decided(index: int, denial: RoleDenial | None) -> bool:
+            if denial is not None:
+                denials[index] = denial
+                # one failing role is enough
+                return short_circuit and not match_any
+
+            # one passing role is enough
+            return short_circuit and match_any
+
+        for index, role in enumerate(self.policy.evaluation_order):
+            if role.is_async or role.supports_batching or is_offloaded(role):
+                async_roles.append((index, role))
+            elif is_decided(index, self.evaluate_role(role, source, info, inputs)):
+                return [denials[i] for i in sorted(denials)]
+
+        tasks = {
+            asyncio.ensure_future(
+                self.evaluate_role_async(role, source, info, inputs)
+            ): index
+            for index, role in async_roles
+        }
+
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if any(is_decided(tasks[task], task.result()) for task in done):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return [denials[i] for i in sorted(denials)]
+
+    def _get_outcome(self, denials: list[RoleDenial]) -> bool:
+        if self.policy.evaluation_logic == "all":
+            # ALL roles must pass
+            did_pass = len(denials) == 0
+        else:
+            assert self.policy.evaluation_logic == "any"  # sanity check
+            # ANY role may pass
+            # i.e. some (but not all!) policies are allowed to error
+            did_pass = len(self.policy.roles) - len(denials) > 0
+
+        return did_pass
+
+    def evaluate_policy(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> tuple[bool, list[RoleDenial]]:
+        """Returns whether access is granted, and the list of role denials (see `evaluate_roles`)"""
+        if self.policy.has_async_roles:
+            async_roles = [
+                role.__class__.__name__ for role in self.policy.roles if role.is_async
+            ]
+            raise TypeError(
+                f"Cannot evaluate async role(s) {', '.join(async_roles)} from a sync resolver. "
+                f"Async roles may only be used on fields that are resolved asynchronously."
+            )
+
+        denials = self.evaluate_roles(source, info, inputs)
+        return self._get_outcome(denials), denials
+
+    async def evaluate_policy_async(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> tuple[bool, list[RoleDenial]]:
+        denials = await self.evaluate_roles_async(source, info, inputs)
+        return self._get_outcome(denials), denials
+
+    def get_decision_cache_key(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> Hashable | None:
+        """
+        Builds the key for this policy's decision in the per-request decision cache.
+
+        The key is made up of the policy's identity, whether every denial is collected (see `detailed_reasons`), and
+        each role's comparison value + the context attributes it depends on. Returns None if any of the roles can't be
+        cached.
+        """
+        role_keys = []
+
+        for role in self.policy.roles:
+            try:
+                input_arg = self.get_role_input_arg(role, inputs)
+            except Exception:
+                # Don't cache - let evaluate_roles report the error.
+                return None
+
+            role_key = role.get_decision_cache_key(source, info.context, input_arg)
+            if role_key is None:
+                return None
+
+            role_keys.append(role_key)
+
+        # Fields of a type protected with @fancy_auth all share the type's decisions
+        policy = self.type_policy if self.type_policy is not None else self.policy
+
+        return (id(policy), self.detailed_reasons, *role_keys)
+
     def log_access_decision(
         self,
         source: Any,
         info: strawberry.Info,
         did_pass: bool,
-        exceptions: list[tuple[str, Exception]],
+        denials: list[RoleDenial],
     ) -> None:
+        state = get_request_state(info.context)
         schema_coordinate = f"{info.path.typename}.{info.path.key}"
+        decision: Literal["granted", "denied"] = (
+            "granted" if did_pass is True else "denied"
+        )
+
+        sink = get_decision_sink()
+        if not sink.should_emit(schema_coordinate, decision):
+            # e.g. this grant wasn't sampled
+            return
+
         roles = [
             (role.__class__.__name__, role._scopes_applied)
             for role in self.policy.roles
         ]
         policy_eval_logic = self.policy.evaluation_logic
-        decision: Literal["granted", "denied"] = (
-            "granted" if did_pass is True else "denied"
-        )
 
-        # Note: in the case of an `any` policy, there might be exceptions present within this array.
+        # Note: in the case of an `any` policy, there might be denials present within this array.
         # ...but overall, access was granted! therefore these don't count as a "reasons denied" and so we null this out.
-        reasons_denied = exceptions if did_pass is False else None
+        reasons_denied = (
+            [(denial.role_name, denial.reason, denial.message) for denial in denials]
+            if did_pass is False
+            else None
+        )
 
         trace_id = info.context.trace_id
 
-        log_line = {
-            'trace_id': trace_id,
-            'schema_coordinate': schema_coordinate,
-            'roles': roles,
-            'policy_eval_logic': policy_eval_logic,
-            'decision': decision,
-            'reasons_denied': reasons_denied,
-        }
+        # Let the sink know when the request is over (e.g. so it can emit per-request summaries)
+        state.call_when_ended(
+            "decision_log", lambda: get_decision_sink().end_request(trace_id)
+        )
+
+        # The sink takes care of serializing and writing the record (off the resolver's hot path by default).
+        # See `set_decision_sink` to send these to some real logging system.
+        sink.emit(
+            DecisionRecord(
+                trace_id=trace_id,
+                schema_coordinate=schema_coordinate,
+                roles=roles,
+                policy_eval_logic=policy_eval_logic,
+                decision=decision,
+                reasons_denied=reasons_denied,
+            )
+        )
+
+    def _lookup_decision(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> tuple[Hashable | None, tuple[bool, list[RoleDenial]] | None]:
+        # The same policy is often checked many times per request with identical arguments (e.g. every protected
+        # field on every item in a list). Reuse the decision if we've already made it during this request.
+        cache_key = self.get_decision_cache_key(source, info, inputs)
+        decision = (
+            get_request_state(info.context).get_decision(cache_key)
+            if cache_key is not None
+            else None
+        )
+        return cache_key, decision
+
+    def _store_decision(
+        self,
+        info: strawberry.Info,
+        cache_key: Hashable,
+        decision: tuple[bool, list[RoleDenial]],
+    ) -> None:
+        # If a role raised, the exception's traceback references the frames of this call (and therefore
+        # the context). Drop it so the cached decision doesn't keep the request alive.
+        for denial in decision[1]:
+            if denial.exception is not None:
+                _clear_tracebacks(denial.exception)
+
+        get_request_state(info.context).set_decision(cache_key, decision)
+
+    def get_precheck_decision(
+        self, context: Any
+    ) -> tuple[bool, list[RoleDenial]] | None:
+        """
+        Returns the policy's decision if the roles' prechecks alone deny access (for any object), otherwise None.
+
+        The decision is exactly what `evaluate_policy` would return: the roles are walked in evaluation order, and we
+        give up at the first role whose outcome depends on the object (or on the field's arguments).
+        """
+        state = get_request_state(context)
+        match_any = self.policy.evaluation_logic == "any"
+        denials: list[RoleDenial] = []
 
-        print(log_line) # or write to some real logging system
+        for role in self.policy.evaluation_order:
+            if not role.has_precheck or role._input_arg is not None:
+                return None
+
+            try:
+                denial = state.get_precheck(role, context)
+            except Exception:
+                # (let the role report this as usual)
+                return None
+
+            if denial is None:
+                # check_role decides
+                return None
+
+            denials.append(denial)
+
+            if not match_any and not self.detailed_reasons:
+                break
+
+        return False, denials
+
+    def get_decision(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> tuple[bool, list[RoleDenial]]:
+        """Like `evaluate_policy`, but reuses the decision if it was already made during this request."""
+        planned = get_request_state(info.context).planned_decisions.get(id(self))
+        if planned is not None:
+            return planned
+
+        cache_key, decision = self._lookup_decision(source, info, inputs)
+
+        if decision is None:
+            decision = self.evaluate_policy(source, info, inputs)
+
+            if cache_key is not None:
+                self._store_decision(info, cache_key, decision)
+
+        return decision
+
+    async def load_comparison_values(self, source: Any, info: strawberry.Info) -> Any:
+        """
+        Awaits the comparison keys of `source` that are declared as loaders (see `comparison_key_loader`), and returns
+        the object for the roles to check. (`source` itself, if there's nothing to load.)
+        """
+        if not self.comparison_loaders or source is None:
+            return source
+
+        state = get_request_state(info.context)
+        names = list(self.comparison_loaders)
+
+        # (shield - other fields may be waiting on the same objects)
+        results = await asyncio.gather(
+            *(
+                asyncio.shield(
+                    state.get_comparison_key_batcher(loader).load(source, info.context)
+                )
+                for loader in self.comparison_loaders.values()
+            ),
+            return_exceptions=True,
+        )
+
+        values = {}
+        errors = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                # (the roles that read this key are denied with the error)
+                errors[name] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                values[name] = result
+
+        return LoadedSource(source, values, errors)
+
+    async def get_decision_async(
+        self, source: Any, info: strawberry.Info, inputs: Any
+    ) -> tuple[bool, list[RoleDenial]]:
+        planned = get_request_state(info.context).planned_decisions.get(id(self))
+        if planned is not None:
+            return planned
+
+        source = await self.load_comparison_values(source, info)
+        cache_key, decision = self._lookup_decision(source, info, inputs)
+
+        if decision is None:
+            decision = await self.evaluate_policy_async(source, info, inputs)
+
+            if cache_key is not None:
+                self._store_decision(info, cache_key, decision)
+
+        return decision
+
+    def can_vectorize(self) -> bool:
+        """True if every role in the policy can be evaluated for many objects at once (see `get_decisions_vectorized`)"""
+        return all(
+            role.supports_vectorized
+            and not role.is_async
+            and not role.supports_batching
+            and role._input_arg is None
+            and role.result_cache is None
+            and role.circuit_breaker is None
+            and role.executor is None
+            for role in self.policy.roles
+        ) and not self.comparison_loaders
+
+    def get_decisions_vectorized(
+        self, sources: list[Any], info: strawberry.Info
+    ) -> list[tuple[bool, list[RoleDenial]]]:
+        """
+        Decides the policy for every object in `sources` at once, with each role's `is_role_valid_vectorized`. The
+        outcomes match what `evaluate_policy` would decide for each object. (Requires `can_vectorize()`.)
+        """
+        context = info.context
+        state = get_request_state(context)
+        num_sources = len(sources)
+
+        # for each role (in evaluation order): (a mask - or None if the role denied every object, denial)
+        results: list[tuple[list[bool] | None, RoleDenial]] = []
+
+        for role in self.policy.evaluation_order:
+            role_name = role.__class__.__name__
+            mask: Any = None
+
+            try:
+                denial = (
+                    state.get_precheck(role, context) if role.has_precheck else None
+                )
+
+                if denial is None:
+                    mask = role.is_role_valid_vectorized(
+                        role._scopes_applied, role.get_comparison_values(sources), context
+                    )
+                    if len(mask) != num_sources:
+                        raise ValueError(
+                            f"{role_name}.is_role_valid_vectorized(...) returned {len(mask)} results for "
+                            f"{num_sources} values"
+                        )
+
+                    # (e.g. a NumPy array - plain bools are much quicker to index one at a time)
+                    mask = mask.tolist() if hasattr(mask, "tolist") else list(mask)
+                    denial = role.get_vectorized_denial(role._scopes_applied, context)
+            except Exception as e:
+                mask = None
+                denial = RoleDenial.from_exception(role_name, e)
+
+            results.append((mask, denial))
+
+        if len(results) == 1:
+            (mask, denial), = results
+            # (decisions are only ever read, so identical ones can be shared)
+            granted: tuple[bool, list[RoleDenial]] = (True, [])
+            denied: tuple[bool, list[RoleDenial]] = (False, [denial])
+
+            if mask is None:
+                return [denied] * num_sources
+
+            return [granted if passed else denied for passed in mask]
+
+        short_circuit = not self.detailed_reasons
+        match_any = self.policy.evaluation_logic == "any"
+        decisions = []
+
+        for index in range(num_sources):
+            denials = []
+            for mask, denial in results:
+                if mask is not None and mask[index]:
+                    if short_circuit and match_any:
+                        break
+                    continue
+
+                denials.append(denial)
+                if short_circuit and not match_any:
+                    break
+
+            decisions.append((self._get_outcome(denials), denials))
+
+        return decisions
+
+    def _report_decision(
+        self,
+        source: Any,
+        info: strawberry.Info,
+        decision: tuple[bool, list[RoleDenial]],
+    ) -> bool:
+        did_pass, denials = decision
+
+        self.log_access_decision(
+            source=source,
+            info=info,
+            did_pass=did_pass,
+            denials=denials,
+        )
+
+        if not did_pass:
+            # This is the only point where denials are turned into exceptions (for the GraphQL error).
+            raise FancyAuthAccessDeniedError(
+                "Access denied to field"
+            ) from ExceptionGroup(
+                "Role failures", [denial.to_exception() for denial in denials]
+            )
+
+        return True
 
     def check_policy(
         self,
         source: Any,
         info: strawberry.Info,
         **kwargs: Any,
-    ) -> Any:
+    ) -> bool:
         """
         Reads the policy supplied in the schema and evaluates them against the user's context.
         Raises an error if the user does not have access to the field.
+
+        Returns False if access was denied to the object this field belongs to, and that denial has already been
+        reported by one of its sibling fields (the field should resolve to null without adding another error).
         """
         # Any arguments to the resolver are passed as kwargs. Rename to clarify.
         # We need to pass this along in order to crunch the policy's `input_arg` parameter.
         inputs = kwargs
 
-        exceptions = self.evaluate_roles(source, info, inputs)
+        # Type-level policies are decided once per object. The first field selected on the object evaluates, logs
+        # and (if denied) reports the decision - the rest of its fields just reuse it. (Unless the policy reads field
+        # arguments - each field may have been passed different ones.)
+        if self.type_policy is not None and not self.type_policy.has_input_args:
+            object_decisions = get_request_state(info.context).object_decisions
+            object_key = (id(source), id(self.type_policy))
+            object_decision = object_decisions.get(object_key)
 
-        if self.policy.evaluation_logic == "all":
-            # ALL roles must pass
-            did_pass = len(exceptions) == 0
+            if object_decision is not None and object_decision.did_pass is not None:
+                return object_decision.did_pass
+
+            decision = self.get_decision(source, info, inputs)
+            object_decisions[object_key] = ObjectDecision(source, decision[0])
         else:
-            assert self.policy.evaluation_logic == "any"  # sanity check
-            # ANY role may pass
-            # i.e. some (but not all!) policies are allowed to error
-            did_pass = len(self.policy.roles) - len(exceptions) > 0
+            decision = self.get_decision(source, info, inputs)
 
-        self.log_access_decision(
-            source=source,
-            info=info,
-            did_pass=did_pass,
-            exceptions=exceptions,
+        return self._report_decision(source, info, decision)
+
+    async def check_policy_async(
+        self,
+        source: Any,
+        info: strawberry.Info,
+        **kwargs: Any,
+    ) -> bool:
+        """The async equivalent of `check_policy` (which also supports async roles)."""
+        inputs = kwargs
+
+        if self.type_policy is None or self.type_policy.has_input_args:
+            decision = await self.get_decision_async(source, info, inputs)
+            return self._report_decision(source, info, decision)
+
+        object_decisions = get_request_state(info.context).object_decisions
+        object_key = (id(source), id(self.type_policy))
+        object_decision = object_decisions.get(object_key)
+
+        if object_decision is not None:
+            if object_decision.pending is not None:
+                # A sibling field is still evaluating the policy for this object - wait for its decision.
+                await asyncio.shield(object_decision.pending)
+
+            if object_decision.did_pass is not None:
+                return object_decision.did_pass
+
+        # (let sibling fields know we're working on it)
+        object_decision = ObjectDecision(
+            source, None, asyncio.get_running_loop().create_future()
         )
+        object_decisions[object_key] = object_decision
 
-        if not did_pass:
-            raise FancyAuthAccessDeniedError(
-                "Access denied to field"
-            ) from ExceptionGroup("Role failures", [e for [_, e] in exceptions])
+        try:
+            decision = await self.get_decision_async(source, info, inputs)
+            object_decision.did_pass = decision[0]
+        finally:
+            # If we didn't reach a decision (e.g. we were cancelled), waiting siblings will evaluate it themselves.
+            if object_decision.did_pass is None:
+                object_decisions.pop(object_key, None)
+
+            object_decision.pending.set_result(None)  # type: ignore[union-attr]
+            object_decision.pending = None
+
+        return self._report_decision(source, info, decision)
+
+    async def _resolve_speculatively(
+        self,
+        next_: Callable[..., Awaitable[Any]],
+        source: Any,
+        info: strawberry.Info,
+        **kwargs: Any,
+    ) -> Any:
+        resolver = asyncio.ensure_future(next_(source, info, **kwargs))
+        # If access is denied, nobody will look at the resolver's result (or error)
+        resolver.add_done_callback(_discard_result)
+
+        try:
+            allowed = await self.check_policy_async(source, info, **kwargs)
+        except BaseException:
+            resolver.cancel()
+            raise
+
+        if not allowed:
+            resolver.cancel()
+            return None
+
+        return await resolver
 
     async def resolve_async(
         self,
@@ -241,7 +910,13 @@ class FancyAuthExtension(FieldExtension):
         info: strawberry.Info,
         **kwargs: Any,
     ) -> Any:
-        self.check_policy(source, info, **kwargs)
+        if self.resolves_speculatively and info.operation.operation is OperationType.QUERY:
+            # Mutations (and subscriptions) always check first - their resolvers have side effects.
+            return await self._resolve_speculatively(next_, source, info, **kwargs)
+
+        if not await self.check_policy_async(source, info, **kwargs):
+            return None
+
         retval = next_(source, info, **kwargs)
         # If the resolve_nodes method is not async, retval will not actually
         # be awaitable. We still need the `resolve_async` in here because
@@ -257,5 +932,7 @@ class FancyAuthExtension(FieldExtension):
         info: strawberry.Info,
         **kwargs: Any,
     ) -> Any:
-        self.check_policy(source, info, **kwargs)
+        if not self.check_policy(source, info, **kwargs):
+            return None
+
         return next_(source, info, **kwargs)
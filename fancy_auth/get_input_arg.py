@@ -1,7 +1,8 @@
 import dataclasses as dataclasses
-from functools import reduce
+from collections.abc import Mapping
 from textwrap import dedent
 from typing import Any
+from typing import Callable
 
 
 def removeprefix(s: str, prefix: str) -> str:  # pragma: no cover
@@ -28,12 +29,64 @@ def _get_error_string(expected_key: str) -> str:
     )
 
 
-def _get_nested_dict_value(d: Any, key: str) -> str:
-    try:
-        return reduce(lambda d, k: d[k], key.split("."), d)
-    except KeyError as e:
-        # reraising to provide a helpful error message
-        raise KeyError(_get_error_string(key)) from e
+def _compile_path_getter(key: str) -> Callable[[Any], Any]:
+    """
+    Returns a function that reads a dotted path (e.g. "address.zip_code") from a (nested) input object.
+
+    Each step reads a dataclass field (i.e. a strawberry input type) or a dict key directly, so nothing is copied.
+    """
+    path = tuple(key.split("."))
+
+    def get_path(value: Any) -> Any:
+        try:
+            for k in path:
+                if isinstance(value, Mapping):
+                    value = value[k]
+                elif dataclasses.is_dataclass(value) and k in value.__dataclass_fields__:
+                    value = getattr(value, k)
+                else:
+                    raise KeyError(k)
+        except KeyError as e:
+            # reraising to provide a helpful error message
+            raise KeyError(_get_error_string(key)) from e
+
+        return value
+
+    return get_path
+
+
+def compile_input_arg_getter(policy_input_arg: str) -> Callable[[Any], Any]:
+    """
+    Parses a policy's `input_arg` once, and returns a function that reads it from the resolver arguments.
+
+    See `get_input_arg_from_field` for the supported formats.
+    """
+    # When using InputMutationExtension, the name of the input field is always 'input'
+    if policy_input_arg.startswith("input."):
+        get_path = _compile_path_getter(removeprefix(policy_input_arg, "input."))
+
+        def get_input_arg(inputs: Any) -> Any:
+            assert (
+                inputs is not None
+            ), "`inputs` is None (did you pass any field arguments?)"
+            input_arg = get_path(inputs["input"])
+            assert input_arg is not None, _get_error_string(policy_input_arg)
+            return input_arg
+
+    else:
+
+        def get_input_arg(inputs: Any) -> Any:
+            assert (
+                inputs is not None
+            ), "`inputs` is None (did you pass any field arguments?)"
+            assert (
+                "." not in policy_input_arg
+            ), "nested input_key values are only valid with auto-generated input types"
+            input_arg = inputs.get(policy_input_arg)
+            assert input_arg is not None, _get_error_string(policy_input_arg)
+            return input_arg
+
+    return get_input_arg
 
 
 def get_input_arg_from_field(policy_input_arg: str, inputs: Any) -> str:
@@ -79,18 +132,4 @@ def get_input_arg_from_field(policy_input_arg: str, inputs: Any) -> str:
         def draft_reviews_for_user(self, user_id: str) -> Optional[List[DraftReview]]:
             return [DraftReview()]
     """
-    assert inputs is not None, "`inputs` is None (did you pass any field arguments?)"
-
-    # When using InputMutationExtension, the name of the input field is always 'input'
-    if policy_input_arg.startswith("input."):
-        input_dict = dataclasses.asdict(inputs["input"])
-        input_field_lookup_key = removeprefix(policy_input_arg, "input.")
-        input_arg = _get_nested_dict_value(d=input_dict, key=input_field_lookup_key)
-    else:
-        assert (
-            "." not in policy_input_arg
-        ), "nested input_key values are only valid with auto-generated input types"
-        input_arg = inputs.get(policy_input_arg)
-
-    assert input_arg is not None, _get_error_string(policy_input_arg)
-    return input_arg
+    return compile_input_arg_getter(policy_input_arg)(inputs)
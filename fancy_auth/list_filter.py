@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Literal
+
+import strawberry
+from strawberry.extensions import FieldExtension
+from strawberry.types.base import StrawberryList
+from strawberry.types.base import StrawberryOptional
+from strawberry.types.base import has_object_definition
+from strawberry.types.field import StrawberryField
+
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.comparison_loader import get_comparison_loaders
+from fancy_auth.field_extension import FancyAuthExtension
+from fancy_auth.request_state import ObjectDecision
+from fancy_auth.request_state import get_request_state
+
+# "drop": denied items are removed from the list
+# "null": denied items are replaced with null (the list's items must be nullable)
+ListMode = Literal["drop", "null"]
+
+
+def _get_list_item_type(field: StrawberryField) -> tuple[Any, bool]:
+    """Returns the type of the items returned by a list field, and whether the items are nullable"""
+    field_type = field.type
+    if isinstance(field_type, StrawberryOptional):
+        field_type = field_type.of_type
+
+    if not isinstance(field_type, StrawberryList):
+        raise TypeError(f"list_mode can only be used on list fields ({field.name})")
+
+    item_type = field_type.of_type
+    if isinstance(item_type, StrawberryOptional):
+        return item_type.of_type, True
+
+    return item_type, False
+
+
+class FancyAuthListExtension(FieldExtension):
+    """
+    Authorizes all items returned by a list field in one pass (right after the list resolver returns), against the
+    policy of the items' `@fancy_auth` protected type. Denied items are dropped (or replaced with null) - rather than
+    returned with every protected field nulled out, each with its own "Access denied" error.
+
+        @strawberry.field(extensions=[FancyAuthListExtension(mode="drop")])
+        def feed(self) -> list[Post]:
+            ...
+
+    (or equivalently, `@fancy_auth(list_mode="drop")`)
+
+    Every item's decision is still logged. Fields of the items that are kept don't re-evaluate the policy.
+    """
+
+    def __init__(self, mode: ListMode = "drop"):
+        if mode not in ("drop", "null"):
+            raise ValueError(f"mode must be 'drop' or 'null' (got {mode!r})")
+
+        self.mode = mode
+        # one per type-level policy applied to the item type
+        self.item_extensions: list[FancyAuthExtension] = []
+
+    def apply(self, field: StrawberryField) -> None:
+        item_type, items_are_nullable = _get_list_item_type(field)
+
+        if self.mode == "null" and not items_are_nullable:
+            raise TypeError(
+                f"list_mode='null' requires the items of {field.name} to be nullable (e.g. list[Optional[...]])"
+            )
+
+        if has_object_definition(item_type) and item_type.__strawberry_definition__.fields:
+            # (every field of a protected type has an extension for each type-level policy)
+            first_field = item_type.__strawberry_definition__.fields[0]
+            self.item_extensions = [
+                extension
+                for extension in first_field.extensions
+                if isinstance(extension, FancyAuthExtension)
+                and extension.type_policy is not None
+            ]
+
+        if not self.item_extensions:
+            raise TypeError(
+                f"list_mode can only be used on lists of types protected with @fancy_auth ({field.name})"
+            )
+
+        if any(
+            extension.policy.has_async_roles
+            or extension.policy.has_batched_roles
+            # (the item type's fields may not have been applied yet - so look for loaders ourselves)
+            or get_comparison_loaders(item_type, extension.policy.roles)
+            for extension in self.item_extensions
+        ):
+            # (see FancyAuthExtension.apply)
+            self.supports_sync = False
+
+    def _record_decision(
+        self,
+        extension: FancyAuthExtension,
+        item: Any,
+        info: strawberry.Info,
+        decision: tuple[bool, list[RoleDenial]],
+    ) -> None:
+        did_pass, denials = decision
+        extension.log_access_decision(
+            source=item, info=info, did_pass=did_pass, denials=denials
+        )
+
+        if did_pass:
+            # The item's fields reuse this decision (see FancyAuthExtension.check_policy)
+            get_request_state(info.context).object_decisions[
+                (id(item), id(extension.type_policy))
+            ] = ObjectDecision(item, True)
+
+    def _filter_items(self, items: list[Any], allowed: list[bool]) -> list[Any]:
+        if self.mode == "drop":
+            return [item for item, did_pass in zip(items, allowed) if did_pass]
+
+        return [item if did_pass else None for item, did_pass in zip(items, allowed)]
+
+    def _filter_vectorized(
+        self,
+        extension: FancyAuthExtension,
+        items: list[Any],
+        allowed: list[bool],
+        info: strawberry.Info,
+    ) -> None:
+        indexes = [
+            index
+            for index, item in enumerate(items)
+            if allowed[index] and item is not None
+        ]
+        decisions = extension.get_decisions_vectorized(
+            [items[index] for index in indexes], info
+        )
+
+        for index, decision in zip(indexes, decisions):
+            self._record_decision(extension, items[index], info, decision)
+            allowed[index] = decision[0]
+
+    def filter_items(self, items: Any, info: strawberry.Info) -> list[Any]:
+        items = list(items)
+        allowed = [True] * len(items)
+
+        for extension in self.item_extensions:
+            if extension.can_vectorize():
+                self._filter_vectorized(extension, items, allowed, info)
+                continue
+
+            for index, item in enumerate(items):
+                if not allowed[index] or item is None:
+                    continue
+
+                decision = extension.get_decision(item, info, {})
+                self._record_decision(extension, item, info, decision)
+                allowed[index] = decision[0]
+
+        return self._filter_items(items, allowed)
+
+    async def filter_items_async(self, items: Any, info: strawberry.Info) -> list[Any]:
+        items = list(items)
+        allowed = [True] * len(items)
+
+        for extension in self.item_extensions:
+            if extension.can_vectorize():
+                self._filter_vectorized(extension, items, allowed, info)
+                continue
+
+            indexes = [
+                index
+                for index, item in enumerate(items)
+                if allowed[index] and item is not None
+            ]
+
+            # (all at once - so batched roles see every item in a single batch)
+            decisions = await asyncio.gather(
+                *(extension.get_decision_async(items[index], info, {}) for index in indexes)
+            )
+
+            for index, decision in zip(indexes, decisions):
+                self._record_decision(extension, items[index], info, decision)
+                allowed[index] = decision[0]
+
+        return self._filter_items(items, allowed)
+
+    def resolve(
+        self,
+        next_: Callable[..., Any],
+        source: Any,
+        info: strawberry.Info,
+        **kwargs: Any,
+    ) -> Any:
+        items = next_(source, info, **kwargs)
+        if items is None:
+            return None
+
+        return self.filter_items(items, info)
+
+    async def resolve_async(
+        self,
+        next_: Callable[..., Awaitable[Any]],
+        source: Any,
+        info: strawberry.Info,
+        **kwargs: Any,
+    ) -> Any:
+        items = next_(source, info, **kwargs)
+        if inspect.isawaitable(items):
+            items = await items
+
+        if items is None:
+            return None
+
+        return await self.filter_items_async(items, info)
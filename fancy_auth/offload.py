@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
+
+from fancy_auth.base_role import RoleDenial
+
+if TYPE_CHECKING:
+    from fancy_auth.base_role import BaseRole
+
+ExecutorKind = Literal["thread", "process"]
+
+
+@dataclass
+class OffloadStats:
+    """How long offloaded role evaluations waited for a worker, vs how long they ran for"""
+
+    calls: int = 0
+    total_queue_seconds: float = 0.0
+    max_queue_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+    max_run_seconds: float = 0.0
+    # evaluations that were cancelled (e.g. the outcome was already known). Not counted in `calls`.
+    cancelled: int = 0
+
+    @property
+    def mean_queue_seconds(self) -> float:
+        return self.total_queue_seconds / self.calls if self.calls else 0.0
+
+    @property
+    def mean_run_seconds(self) -> float:
+        return self.total_run_seconds / self.calls if self.calls else 0.0
+
+
+def _check_role(
+    role: BaseRole, scopes: set[str] | None, source: Any, context: Any, input_arg: Any
+) -> tuple[RoleDenial | None, float, float]:
+    """Runs in the worker. Returns the role's result, and when it started and finished (time.time, for processes)"""
+    started = time.time()
+
+    try:
+        denial = role.check_role(
+            scopes=scopes, source=source, context=context, input_arg=input_arg
+        )
+    except Exception as e:
+        # (the traceback can't be sent back from a process - and we don't need it)
+        e.__traceback__ = None
+        denial = RoleDenial.from_exception(role.__class__.__name__, e)
+
+    return denial, started, time.time()
+
+
+class RoleExecutor:
+    """
+    Evaluates blocking sync roles (e.g. signature verification, or calls to a sync SDK) in a pool of workers, so that
+    they don't stall the event loop in async resolvers:
+
+        class UserHasValidSignature(BaseRole):
+            executor = RoleExecutor(max_workers=4)
+
+    Use `kind="process"` for CPU-bound roles. The role, the object being checked, the context and the input argument
+    are then pickled and sent to the worker - so they must all be picklable (and comparison key loaders can't be used).
+
+    Sync resolvers (and `schema.execute_sync`) still evaluate the role inline. The pool is created on first use, and
+    can be shared by several roles. `stats` tracks how long evaluations waited for a worker vs how long they ran for.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int | None = None,
+        kind: ExecutorKind = "thread",
+        executor: Executor | None = None,
+    ):
+        """`executor` may be an existing pool to run roles in (in which case `max_workers` and `kind` are ignored)"""
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.kind = kind
+        self.stats = OffloadStats()
+
+        self._executor = executor
+        self._lock = threading.Lock()
+
+    def get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = (
+                        ProcessPoolExecutor(max_workers=self.max_workers)
+                        if self.kind == "process"
+                        else ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="fancy-auth-role",
+                        )
+                    )
+
+        return self._executor
+
+    async def check_role(
+        self, role: BaseRole, source: Any, context: Any, input_arg: Any
+    ) -> RoleDenial | None:
+        """The equivalent of `role.check_role_async`, evaluated by one of the pool's workers"""
+        submitted = time.time()
+        future = asyncio.get_running_loop().run_in_executor(
+            self.get_executor(),
+            _check_role,
+            role,
+            role._scopes_applied,
+            source,
+            context,
+            input_arg,
+        )
+
+        try:
+            denial, started, finished = await future
+        except asyncio.CancelledError:
+            # (a worker may still run it, if it had already been picked up - its result is thrown away)
+            self.stats.cancelled += 1
+            raise
+        except Exception as e:
+            # e.g. the arguments couldn't be pickled, or the pool was shut down
+            return RoleDenial.from_exception(role.__class__.__name__, e)
+
+        self._record(max(started - submitted, 0.0), max(finished - started, 0.0))
+        return denial
+
+    def _record(self, queue_seconds: float, run_seconds: float) -> None:
+        with self._lock:
+            stats = self.stats
+            stats.calls += 1
+            stats.total_queue_seconds += queue_seconds
+            stats.max_queue_seconds = max(stats.max_queue_seconds, queue_seconds)
+            stats.total_run_seconds += run_seconds
+            stats.max_run_seconds = max(stats.max_run_seconds, run_seconds)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
+from dataclasses import field
+from typing import Hashable
 from typing import Literal
 
 from fancy_auth.base_role import BaseRole
@@ -14,6 +17,38 @@ class FancyAuthPolicy:
     evaluation_logic: Literal["any", "all"]
     applied_to: FieldOrType
 
+    # the order in which roles are evaluated: cheapest first (see `BaseRole.cost`)
+    evaluation_order: list[BaseRole] = field(init=False, repr=False, compare=False)
+
+    # True if any of the roles are async (and so the policy can only be evaluated by async resolvers)
+    has_async_roles: bool = field(init=False, repr=False, compare=False)
+
+    # True if any of the roles can be evaluated in batches (see `BaseRole.batch_is_role_valid`)
+    has_batched_roles: bool = field(init=False, repr=False, compare=False)
+
+    # True if any of the (sync) roles are evaluated in a pool of workers by async resolvers (see `BaseRole.executor`)
+    has_offloaded_roles: bool = field(init=False, repr=False, compare=False)
+
+    # True if any of the roles read a field argument (and so a decision only holds for the arguments it was made with)
+    has_input_args: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # (sorted() is stable, so roles with the same cost keep their declared order)
+        self.evaluation_order = sorted(self.roles, key=lambda role: role.cost)
+        self.has_async_roles = any(role.is_async for role in self.roles)
+        self.has_batched_roles = any(role.supports_batching for role in self.roles)
+        self.has_offloaded_roles = any(is_offloaded(role) for role in self.roles)
+        self.has_input_args = any(role._input_arg is not None for role in self.roles)
+
+
+def is_offloaded(role: BaseRole) -> bool:
+    """True if async resolvers evaluate `role` in its executor (rather than inline)"""
+    return (
+        role.executor is not None
+        and not role.is_async
+        and not role.supports_batching
+    )
+
 
 def get_policy_from_role_args(
     *,  # kwargs only
@@ -48,4 +83,45 @@ def get_policy_from_role_args(
             _role, BaseRole
         ), "all roles must be instantiated (`Foo()` instead of `Foo`)"
 
-    return policy
+    return intern_policy(policy)
+
+
+# (evaluation logic, applied to, role intern keys...)
+PolicyKey = tuple[str, str, tuple[Hashable, ...]]
+
+# PolicyKey -> the canonical policy for that key
+_interned_policies: dict[PolicyKey, FancyAuthPolicy] = {}
+_interned_policies_lock = threading.Lock()
+
+
+def get_policy_key(policy: FancyAuthPolicy) -> PolicyKey:
+    return (
+        policy.evaluation_logic,
+        policy.applied_to,
+        tuple(role.get_intern_key() for role in policy.roles),
+    )
+
+
+def intern_policy(policy: FancyAuthPolicy) -> FancyAuthPolicy:
+    """
+    Returns the canonical instance of `policy` - i.e. the first policy seen with the same roles (see
+    `BaseRole.get_intern_key`), evaluation logic and target.
+
+    Large schemas tend to repeat the same handful of policies on thousands of fields and types. Sharing one instance
+    (and its directive/description, see `directives.py`) keeps memory flat, and lets the per-request decision cache
+    reuse decisions between fields.
+    """
+    key = get_policy_key(policy)
+
+    interned = _interned_policies.get(key)
+    if interned is not None:
+        return interned
+
+    with _interned_policies_lock:
+        return _interned_policies.setdefault(key, policy)
+
+
+def clear_interned_policies() -> None:
+    """Forgets all interned policies (e.g. after changing a role class's attributes in tests)"""
+    with _interned_policies_lock:
+        _interned_policies.clear()
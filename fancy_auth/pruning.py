@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from strawberry.extensions import SchemaExtension
+
+from fancy_auth.auth_plan import AUTH_PLAN_CACHE
+from fancy_auth.auth_plan import AuthPlanCache
+from fancy_auth.request_state import get_request_state
+
+
+class FancyAuthPruningExtension(SchemaExtension):
+    """
+    Decides, before execution, every selected field that the viewer can never access - i.e. whose policy is already
+    denied by its roles' context-only prechecks (see `BaseRole.precheck`), whatever object is being returned.
+
+    Those fields are then denied without doing any per-field work (no resolver, no role evaluation, nothing below them
+    in the selection set), with exactly the same errors as without this extension.
+
+        schema = strawberry.Schema(query=Query, extensions=[FancyAuthPruningExtension])
+
+    The fields (and policies) an operation touches are worked out once per document, and cached in `plan_cache` (see
+    `AuthPlan`) - so repeated (e.g. persisted) queries skip straight to evaluating the prechecks.
+
+    This is optional - it pays off for anonymous / low privilege traffic (e.g. bots) hitting protected fields.
+    """
+
+    plan_cache: AuthPlanCache = AUTH_PLAN_CACHE
+
+    def on_execute(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        document = execution_context.graphql_document
+        context = execution_context.context
+
+        if document is not None and context is not None:
+            plan = self.plan_cache.get_plan(
+                execution_context.schema._schema, document, execution_context.query
+            )
+
+            state = get_request_state(context)
+
+            for extension in plan.prunable_extensions:
+                decision = extension.get_precheck_decision(context)
+                if decision is not None:
+                    state.planned_decisions[id(extension)] = decision
+
+        yield
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Iterator
+
+from strawberry.extensions import SchemaExtension
+
+from fancy_auth.comparison_loader import ComparisonKeyBatcher
+
+if TYPE_CHECKING:
+    from fancy_auth.batching import RoleBatcher
+    from fancy_auth.comparison_loader import ComparisonKeyLoader
+    from fancy_auth.base_role import BaseRole
+    from fancy_auth.base_role import RoleDenial
+    from fancy_auth.scopes import ScopeIndex
+
+
+@dataclass
+class DecisionCacheStats:
+    """Hit/miss counters for the per-request access decision cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class ObjectDecision:
+    """The outcome of a type-level policy for a single object."""
+
+    # We hold on to the object so that its id() can't be reused by another object during the request.
+    source: Any
+    # None while the decision is still being made (by an async resolver)
+    did_pass: bool | None
+    # resolved once `did_pass` has been set (or the decision was abandoned)
+    pending: asyncio.Future[None] | None = None
+
+
+# Running totals across every request served by this process (e.g. to export as a metric).
+DECISION_CACHE_STATS = DecisionCacheStats()
+_decision_cache_stats_lock = threading.Lock()
+
+
+class RequestState:
+    """
+    Scratch space for FancyAuth that lives exactly as long as a single request.
+
+    We key this off the request's context object. With FancyAuthRequestExtension installed, the state is created when
+    the operation starts executing and thrown away as soon as it finishes. Otherwise, it's thrown away once the context
+    is garbage collected. Either way, there's nothing to invalidate by hand.
+    """
+
+    def __init__(self) -> None:
+        # (policy identity, per-role cache keys...) -> (did_pass, failures)
+        self.decisions: dict[Hashable, Any] = {}
+        # (id(source), id(type policy)) -> ObjectDecision
+        self.object_decisions: dict[tuple[int, int], ObjectDecision] = {}
+        self.stats = DecisionCacheStats()
+        # id(role) -> RoleBatcher
+        self.role_batchers: dict[int, RoleBatcher] = {}
+        # id(ComparisonKeyLoader) -> ComparisonKeyBatcher
+        self.comparison_key_batchers: dict[int, ComparisonKeyBatcher] = {}
+        # role intern key -> result of `role.precheck`
+        self.prechecks: dict[Hashable, RoleDenial | None] = {}
+        # id(FancyAuthExtension) -> decision made before execution (see `FancyAuthPruningExtension`)
+        self.planned_decisions: dict[int, tuple[bool, list[RoleDenial]]] = {}
+        # (time.monotonic) after which async roles are no longer awaited (see FancyAuthDeadlineExtension)
+        self.deadline: float | None = None
+        # id(scope index) -> (held scopes, mask)
+        self.scope_masks: dict[int, tuple[Any, int]] = {}
+        # name -> callback to run once the request has ended
+        self._end_callbacks: dict[str, Callable[[], None]] = {}
+        # ends the state when the context is garbage collected (unless FancyAuthRequestExtension ends it first)
+        self._finalizer: weakref.finalize | None = None
+        # (held while FancyAuthRequestExtension tracks the request, so its id() can't be reused meanwhile)
+        self._context: Any = None
+
+    def call_when_ended(self, name: str, callback: Callable[[], None]) -> None:
+        """Registers `callback` to be called once the request ends. (Only the first callback for `name` is kept.)"""
+        if name not in self._end_callbacks:
+            self._end_callbacks[name] = callback
+
+    def end(self) -> None:
+        for callback in self._end_callbacks.values():
+            try:
+                callback()
+            except Exception:
+                # (this runs from a finalizer, there's nobody to report the error to)
+                pass
+
+    def get_role_batcher(self, role: BaseRole) -> RoleBatcher:
+        batcher = self.role_batchers.get(id(role))
+
+        if batcher is None:
+            # (imported here - batching imports base_role, which imports us)
+            from fancy_auth.batching import RoleBatcher
+
+            batcher = self.role_batchers[id(role)] = RoleBatcher(role)
+
+        return batcher
+
+    def get_comparison_key_batcher(
+        self, loader: ComparisonKeyLoader
+    ) -> ComparisonKeyBatcher:
+        batcher = self.comparison_key_batchers.get(id(loader))
+
+        if batcher is None:
+            batcher = self.comparison_key_batchers[id(loader)] = (
+                ComparisonKeyBatcher(loader)
+            )
+
+        return batcher
+
+    def get_precheck(self, role: BaseRole, context: Any) -> RoleDenial | None:
+        """
+        Returns the result of `role.precheck`, which is only evaluated once per request for each role configuration
+        (see `BaseRole.get_intern_key`)
+        """
+        key = role.get_intern_key()
+
+        if key in self.prechecks:
+            return self.prechecks[key]
+
+        denial = self.prechecks[key] = role.precheck(
+            scopes=role._scopes_applied, context=context
+        )
+        return denial
+
+    def get_scope_mask(self, index: ScopeIndex, held_scopes: Any) -> int:
+        """Returns `index.get_mask(held_scopes)` - which is only worked out once per request"""
+        entry = self.scope_masks.get(id(index))
+
+        if entry is not None and entry[0] is held_scopes:
+            return entry[1]
+
+        mask = index.get_mask(held_scopes)
+        self.scope_masks[id(index)] = (held_scopes, mask)
+        return mask
+
+    def get_decision(self, key: Hashable) -> Any | None:
+        decision = self.decisions.get(key)
+
+        if decision is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+
+        with _decision_cache_stats_lock:
+            if decision is None:
+                DECISION_CACHE_STATS.misses += 1
+            else:
+                DECISION_CACHE_STATS.hits += 1
+
+        return decision
+
+    def set_decision(self, key: Hashable, decision: Any) -> None:
+        self.decisions[key] = decision
+
+
+# id(context) -> RequestState
+_request_states: dict[int, RequestState] = {}
+
+
+def _end_request(key: int, state: RequestState) -> None:
+    # (only if it's still the current state for this id - it may have been ended already, and the id reused)
+    if _request_states.get(key) is state:
+        del _request_states[key]
+
+    state._context = None
+    state.end()
+
+
+def get_request_state(context: Any) -> RequestState:
+    """Returns the RequestState for the request that `context` belongs to (creating it if necessary)."""
+    key = id(context)
+    state = _request_states.get(key)
+
+    if state is not None:
+        return state
+
+    state = RequestState()
+
+    try:
+        # Drop the state as soon as the context goes away. This also guarantees that `id(context)` can't be reused
+        # by another request's context while we still have an entry for it.
+        state._finalizer = weakref.finalize(context, _end_request, key, state)
+    except TypeError:
+        # The context can't be weakly referenced (e.g. it's a plain dict), so we'd have no way of telling when the
+        # request ends. Hand back a throwaway state instead - nothing will be shared between fields. (Install
+        # FancyAuthRequestExtension to support these contexts.)
+        return state
+
+    _request_states[key] = state
+    return state
+
+
+class FancyAuthRequestExtension(SchemaExtension):
+    """
+    Ties FancyAuth's per-request state (see RequestState) to the execution of each operation: it's created when the
+    operation starts, and thrown away (running e.g. the decision sink's `end_request`) as soon as it finishes - rather
+    than whenever the context object happens to be garbage collected. This also supports contexts that can't be weakly
+    referenced (e.g. plain dicts).
+
+        schema = strawberry.Schema(query=Query, extensions=[FancyAuthRequestExtension])
+
+    List it before any other FancyAuth schema extensions.
+    """
+
+    def on_execute(self) -> Iterator[None]:
+        context = self.execution_context.context
+
+        key = id(context)
+        state = _request_states.get(key)
+
+        if context is None or (state is not None and state._context is not None):
+            # (nothing to track - or the request is already being tracked, e.g. by an outer execution)
+            yield
+            return
+
+        if state is None:
+            state = _request_states[key] = RequestState()
+        elif state._finalizer is not None:
+            # (created before execution started, e.g. by another extension - we'll end it ourselves)
+            state._finalizer.detach()
+
+        state._context = context
+
+        try:
+            yield
+        finally:
+            _end_request(key, state)
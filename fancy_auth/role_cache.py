@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import NamedTuple
+
+if TYPE_CHECKING:
+    from fancy_auth.base_role import RoleDenial
+
+
+class RoleResultCacheKey(NamedTuple):
+    role_class: type
+    # how the role is configured: its scopes, input_arg and constructor arguments (see `BaseRole.get_intern_key`)
+    config: Hashable
+    # the object being checked (see `BaseRole.get_comparison_value`)
+    comparison_value: Any
+    # the values of the context attributes the role depends on (see `BaseRole.context_keys`) - i.e. who is asking
+    subject: tuple[Any, ...]
+
+
+@dataclass
+class RoleResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    # entries removed to make room for new ones
+    evictions: int = 0
+    # entries found to be past their TTL
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Passed to `invalidate` to match any value
+ANY: Any = object()
+
+
+class RoleResultCache:
+    """
+    A process-wide, size bounded (LRU) cache of role results, shared between requests. Results are only shared between
+    instances of a role that are configured the same way.
+
+    Roles opt in by setting `result_cache` (and `context_keys`, so we know who the result is for):
+
+        class UserIsInGroup(BaseRole):
+            context_keys = ("user_id",)
+            result_cache = RoleResultCache(ttl=300, negative_ttl=30)
+
+    Grants are kept for `ttl` seconds, and denials for `negative_ttl` seconds (usually shorter, so that e.g. a user
+    who was just added to a group doesn't have to wait long). Denials caused by the role raising an error are not
+    cached at all. This is safe to use from multiple threads and from asyncio.
+
+    With `stale_ttl`, expired grants are kept around for that many more seconds - they're never returned by `get`, but
+    can be served by the role's circuit breaker while its backend is down (see `CircuitBreaker.serve_stale_grants`).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 10_000,
+        ttl: float = 60.0,
+        negative_ttl: float = 5.0,
+        stale_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.stats = RoleResultCacheStats()
+
+        # key -> (expires at, result)
+        self._entries: OrderedDict[
+            RoleResultCacheKey, tuple[float, RoleDenial | None]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RoleResultCacheKey) -> tuple[bool, RoleDenial | None]:
+        """Returns (found, result)"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+
+            expires_at, result = entry
+            now = self.clock()
+            if expires_at <= now:
+                if result is not None or expires_at + self.stale_ttl <= now:
+                    del self._entries[key]
+                    self.stats.expirations += 1
+                self.stats.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, result
+
+    def get_stale(self, key: RoleResultCacheKey) -> tuple[bool, RoleDenial | None]:
+        """Like `get`, but also returns grants that expired less than `stale_ttl` seconds ago"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, result = entry
+            stale_ttl = self.stale_ttl if result is None else 0.0
+            if expires_at + stale_ttl <= self.clock():
+                return False, None
+
+            return True, result
+
+    def set(self, key: RoleResultCacheKey, result: RoleDenial | None) -> None:
+        if result is not None and result.exception is not None:
+            # (the role raised - this is likely to be a transient error rather than a real answer)
+            return
+
+        ttl = self.ttl if result is None else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, result)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(
+        self,
+        *,
+        role_class: type | None = None,
+        comparison_value: Any = ANY,
+        subject: Any = ANY,
+    ) -> int:
+        """
+        Removes all entries matching the given filters (e.g. `invalidate(subject=("abc123",))` after a user's
+        permissions change). Returns the number of entries removed.
+        """
+        with self._lock:
+            matching = [
+                key
+                for key in self._entries
+                if (role_class is None or key.role_class is role_class)
+                and (comparison_value is ANY or key.comparison_value == comparison_value)
+                and (subject is ANY or key.subject == subject)
+            ]
+
+            for key in matching:
+                del self._entries[key]
+
+        return len(matching)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def approximate_memory_bytes(self) -> int:
+        """A rough estimate of the memory used by the cache's entries (for monitoring)"""
+        with self._lock:
+            entries = list(self._entries.items())
+
+        total = sys.getsizeof(self._entries)
+        for key, entry in entries:
+            total += sys.getsizeof(key) + sys.getsizeof(entry)
+            total += sum(sys.getsizeof(value) for value in key.subject)
+            total += sys.getsizeof(key.comparison_value)
+            if entry[1] is not None:
+                total += sys.getsizeof(entry[1]) + sys.getsizeof(entry[1].message)
+
+        return total
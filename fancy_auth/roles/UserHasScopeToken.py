@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fancy_auth.context import Context
+from fancy_auth.base_role import BaseRole
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.scope_token import ScopeTokenError
+from fancy_auth.scope_token import ScopeTokenVerifier
+
+POSSIBLE_SCOPES = {
+    "billing:read:invoices",
+    "billing:write:invoices",
+    "reviews:read",
+    "reviews:write",
+    "users:read:email",
+}
+
+
+class UserHasScopeToken(BaseRole):
+    """
+    Tests if the user's signed scope token (`context.scope_token`) grants any of the role's scopes.
+
+    Tokens are HMAC signed (see `sign_scope_token`), and verified against the keys of `UserHasScopeToken.verifier` -
+    which the application configures at startup:
+
+        UserHasScopeToken.verifier = ScopeTokenVerifier({"2024-01": signing_key})
+
+    The token's subject must be the logged in user (`context.user_id`) - or, for anonymous requests, empty. A token is
+    only verified once (until it expires), no matter how many requests it's sent with.
+    """
+
+    role_owner = "MyTeamName"
+    comparison_key = None  # the token alone decides
+    possible_scopes = POSSIBLE_SCOPES
+    context_keys = ("scope_token", "user_id")
+    cost = 2  # (the token is usually in the verification cache)
+
+    # (no keys configured - every token is rejected)
+    verifier = ScopeTokenVerifier()
+
+    def precheck(
+        self, scopes: set[str] | None, context: Context
+    ) -> RoleDenial | None:
+        if not scopes:
+            # (let check_role report the misconfiguration)
+            return None
+
+        if not context.scope_token:
+            return self.deny("no_scope_token", "user has no scope token")
+
+        try:
+            token = self.verifier.verify(context.scope_token)
+        except ScopeTokenError as e:
+            return self.deny("invalid_scope_token", str(e))
+
+        # (a token issued to a user can't be used anonymously - anonymous requests need a token without a subject)
+        if token.subject != context.user_id:
+            return self.deny(
+                "wrong_token_subject", "scope token was issued to a different user"
+            )
+
+        # multiple defined `scopes` are evaluated with OR logic (and either side may use wildcards).
+        if self.holds_any_scope(scopes, token.scopes, context):
+            return None
+        else:
+            return self.deny("no_matching_scopes", "no matching scopes")
+
+    def check_role(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> RoleDenial | None:
+        if not scopes:
+            raise ValueError(
+                "UserHasScopeToken requires at least one scope to be defined"
+            )
+
+        # (the token alone decides - see `precheck`)
+        return None
+
+    def is_role_valid(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> bool:
+        return self.raise_for_denial(
+            self.precheck(scopes=scopes, context=context)
+            or self.check_role(
+                scopes=scopes, source=source, context=context, input_arg=input_arg
+            )
+        )
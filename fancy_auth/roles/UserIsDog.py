@@ -4,6 +4,7 @@ from typing import Any
 
 from fancy_auth.context import Context
 from fancy_auth.base_role import BaseRole
+from fancy_auth.base_role import RoleDenial
 
 POSSIBLE_SCOPES = {
     "BARKS_AT_MAILMAN",
@@ -25,10 +26,34 @@ class UserIsDog(BaseRole):
     role_owner = "MyTeamName"
     comparison_key = "fancy_auth_user_mammal_type"
     possible_scopes = POSSIBLE_SCOPES
+    context_keys = ("dog_scopes",)
 
-    def is_role_valid(
+    def precheck(
+        self, scopes: set[str] | None, context: Context
+    ) -> RoleDenial | None:
+        if not scopes:
+            # (let check_role report the misconfiguration)
+            return None
+
+        # (for real roles, you might want need to make a request to some external identity provider)
+        dog_scopes_from_context = context.dog_scopes
+
+        # e.g. we expect something like {'IS_A_GOOD_BOY', 'CHEWS_CABLES'}
+        if type(dog_scopes_from_context) is not set:
+            return self.deny(
+                "no_dog_scopes", "context.dog_scopes must be a set of strings"
+            )
+
+        # check if the access paths contain any of the required scopes.
+        # multiple defined `scopes` are evaluated with OR logic.
+        if self.holds_any_scope(scopes, dog_scopes_from_context, context):
+            return None
+        else:
+            return self.deny("no_matching_scopes", "no matching scopes")
+
+    def check_role(
         self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
-    ) -> bool:
+    ) -> RoleDenial | None:
         if not scopes:
             raise ValueError(
                 "UserIsDog requires at least one scope to be defined"
@@ -39,20 +64,18 @@ class UserIsDog(BaseRole):
         # - a dynamic input argument (e.g. in the case of mutations)
         mammal_type = input_arg or source.__getattribute__(self.comparison_key)
 
-        # we're only interested in dog users
-        assert mammal_type == "dog", "user must be a dog"
-
-        # (for real roles, you might want need to make a request to some external identity provider)
-        dog_scopes_from_context = context.dog_scopes
+        # we're only interested in dog users. (the viewer's scopes have already been checked - see `precheck`)
+        if mammal_type != "dog":
+            return self.deny("not_a_dog", "user must be a dog")
 
-        # e.g. we expect something like {'IS_A_GOOD_BOY', 'CHEWS_CABLES'}
-        assert (
-            type(dog_scopes_from_context) is set
-        ), "context.dog_scopes must be a set of strings"
+        return None
 
-        # check if the access paths contain any of the required scopes.
-        # multiple defined `scopes` are evaluated with OR logic.
-        if any(scope in dog_scopes_from_context for scope in scopes):
-            return True
-        else:
-            raise Exception("no matching scopes")
+    def is_role_valid(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> bool:
+        return self.raise_for_denial(
+            self.precheck(scopes=scopes, context=context)
+            or self.check_role(
+                scopes=scopes, source=source, context=context, input_arg=input_arg
+            )
+        )
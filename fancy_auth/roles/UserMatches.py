@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+from itertools import repeat
+from operator import eq
 from typing import Any
 
 from fancy_auth.context import Context
 from fancy_auth.base_role import BaseRole
+from fancy_auth.base_role import RoleDenial
 
 
 class UserMatches(BaseRole):
@@ -14,12 +18,21 @@ class UserMatches(BaseRole):
     role_owner = "My Team Name"
     comparison_key = "fancy_auth_user_owner_id"
     possible_scopes = None  # this role does not accept any scopes
+    context_keys = ("user_id",)
+    cost = 1  # just a comparison of two ids
 
-    def is_role_valid(
-        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
-    ) -> bool:
+    def precheck(
+        self, scopes: set[str] | None, context: Context
+    ) -> RoleDenial | None:
         if not context.user_id:
-            raise Exception("user is not logged in")
+            return self.deny("not_logged_in", "user is not logged in")
+
+        return None
+
+    def check_role(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> RoleDenial | None:
+        # (the user is logged in - see `precheck`)
 
         # recieve the user_id of the user object being returned either as:
         # - a property of the object being returned, or;
@@ -27,6 +40,31 @@ class UserMatches(BaseRole):
         user_id = input_arg or source.__getattribute__(self.comparison_key)
 
         if user_id != context.user_id:
-            raise Exception("logged in user does not match")
+            return self.deny("user_mismatch", "logged in user does not match")
+
+        return None
 
-        return True
+    def is_role_valid_vectorized(
+        self, scopes: set[str] | None, comparison_values: Sequence[Any], context: Context
+    ) -> Sequence[bool]:
+        user_id = context.user_id
+        if not user_id:
+            return [False] * len(comparison_values)
+
+        # (converting a list of strings to a NumPy array costs more than the comparison saves - compare them in C)
+        return list(map(eq, comparison_values, repeat(user_id)))
+
+    def get_vectorized_denial(
+        self, scopes: set[str] | None, context: Context
+    ) -> RoleDenial:
+        return self.deny("user_mismatch", "logged in user does not match")
+
+    def is_role_valid(
+        self, scopes: set[str] | None, source: Any, context: Context, input_arg: Any
+    ) -> bool:
+        return self.raise_for_denial(
+            self.precheck(scopes=scopes, context=context)
+            or self.check_role(
+                scopes=scopes, source=source, context=context, input_arg=input_arg
+            )
+        )
@@ -1,7 +1,9 @@
+from fancy_auth.roles.UserHasScopeToken import UserHasScopeToken
 from fancy_auth.roles.UserIsDog import UserIsDog
 from fancy_auth.roles.UserMatches import UserMatches
 
 __all__ = [
+    "UserHasScopeToken",
     "UserIsDog",
     "UserMatches",
 ]
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+from typing import Mapping
+
+
+class ScopeTokenError(ValueError):
+    """Raised when a scope token can't be trusted (malformed, badly signed, or expired)"""
+
+
+@dataclass(frozen=True)
+class ScopeToken:
+    """The verified claims of a scope token"""
+
+    # who the token was issued to (compared against `context.user_id`)
+    subject: str | None
+    scopes: frozenset[str]
+    # (time.time) after which the token must no longer be trusted
+    expires_at: float
+
+
+@dataclass
+class ScopeTokenCacheStats:
+    hits: int = 0
+    misses: int = 0
+    # entries removed to make room for new ones
+    evictions: int = 0
+    # entries found to be past the token's expiry
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _get_signature(key: bytes, signed: str) -> bytes:
+    return hmac.new(key, signed.encode(), hashlib.sha256).digest()
+
+
+def sign_scope_token(
+    *,
+    key_id: str,
+    key: bytes,
+    scopes: list[str],
+    expires_at: float,
+    subject: str | None = None,
+) -> str:
+    """
+    Issues a scope token (e.g. for tests, or local development): `<key id>.<claims>.<signature>`, where the claims are
+    base64 (url-safe) encoded JSON, and the signature is the HMAC-SHA256 of `<key id>.<claims>` (also base64 encoded).
+    """
+    claims = {"sub": subject, "scopes": sorted(scopes), "exp": expires_at}
+    signed = f"{key_id}.{_b64encode(json.dumps(claims, separators=(',', ':')).encode())}"
+    return f"{signed}.{_b64encode(_get_signature(key, signed))}"
+
+
+class ScopeTokenVerifier:
+    """
+    Verifies HMAC signed scope tokens (see `sign_scope_token`), against a set of signing keys (by key id - so keys can
+    be rotated).
+
+    Verified tokens are kept in a size bounded (LRU) cache, keyed by the token's digest, until the token expires - so
+    a token that's sent with every request is only verified once. Tokens that fail verification aren't cached, and
+    cached tokens are rejected as soon as their signing key is removed from (or replaced in) `keys`. This is safe to use
+    from multiple threads and from asyncio.
+    """
+
+    def __init__(
+        self,
+        keys: Mapping[str, bytes] | None = None,
+        *,
+        max_size: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.keys = dict(keys or {})
+        self.max_size = max_size
+        self.clock = clock
+        self.stats = ScopeTokenCacheStats()
+
+        # sha256(token) -> (the key it was signed with, verified token)
+        self._entries: OrderedDict[bytes, tuple[bytes, ScopeToken]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> ScopeToken:
+        """Returns the token's verified claims. Raises ScopeTokenError if the token can't be trusted."""
+        digest = hashlib.sha256(token.encode()).digest()
+        now = self.clock()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+
+            if entry is not None:
+                key, verified = entry
+
+                if verified.expires_at <= now:
+                    del self._entries[digest]
+                    self.stats.expirations += 1
+                elif self.keys.get(token.split(".", 1)[0]) != key:
+                    # (the key has been revoked or rotated since - verify the token again, against the current keys)
+                    del self._entries[digest]
+                else:
+                    self._entries.move_to_end(digest)
+                    self.stats.hits += 1
+                    return verified
+
+            self.stats.misses += 1
+
+        # (verified outside the lock - other threads can keep hitting the cache meanwhile)
+        key, verified = self._verify_signature(token)
+
+        if verified.expires_at <= now:
+            raise ScopeTokenError("scope token has expired")
+
+        with self._lock:
+            self._entries[digest] = (key, verified)
+            self._entries.move_to_end(digest)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+        return verified
+
+    def _verify_signature(self, token: str) -> tuple[bytes, ScopeToken]:
+        """Returns the key the token was signed with, and its claims"""
+        try:
+            key_id, encoded_claims, encoded_signature = token.split(".")
+        except ValueError:
+            raise ScopeTokenError("scope token is malformed") from None
+
+        key = self.keys.get(key_id)
+        if key is None:
+            raise ScopeTokenError(f"scope token was signed with an unknown key ({key_id!r})")
+
+        try:
+            signature = _b64decode(encoded_signature)
+        except (binascii.Error, ValueError):
+            raise ScopeTokenError("scope token is malformed") from None
+
+        if not hmac.compare_digest(
+            signature, _get_signature(key, f"{key_id}.{encoded_claims}")
+        ):
+            raise ScopeTokenError("scope token signature is invalid")
+
+        # (the claims can be trusted from here on)
+        try:
+            claims: Any = json.loads(_b64decode(encoded_claims))
+            return key, ScopeToken(
+                subject=claims.get("sub"),
+                scopes=frozenset(claims["scopes"]),
+                expires_at=float(claims["exp"]),
+            )
+        except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+            raise ScopeTokenError("scope token claims are malformed") from None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from collections.abc import Collection
+from collections.abc import Iterable
+
+from fancy_auth.request_state import get_request_state
+
+# Scopes are hierarchical, e.g. "billing:read:invoices"
+SCOPE_SEPARATOR = ":"
+# "billing:*" matches every scope below "billing" (and "*" matches every scope)
+WILDCARD = "*"
+
+
+class ScopeIndex:
+    """
+    Assigns each of a role's `possible_scopes` a bit, so that sets of scopes can be stored as an int mask - and
+    "does the viewer hold any of the required scopes?" becomes a single AND.
+
+    Wildcards are expanded ahead of time: for every prefix of every possible scope, we precompute the mask of the
+    scopes below it (e.g. "billing:*" -> billing:read | billing:read:invoices | ...). Converting a scope - concrete or
+    wildcard - to a mask is then a single lookup, however many scopes the wildcard covers.
+    """
+
+    def __init__(self, possible_scopes: Iterable[str]):
+        # (sorted, so the bits are stable between processes)
+        self.bits: dict[str, int] = {
+            scope: 1 << position for position, scope in enumerate(sorted(possible_scopes))
+        }
+
+        # scope or wildcard -> mask
+        self.masks: dict[str, int] = dict(self.bits)
+
+        for scope, bit in self.bits.items():
+            segments = scope.split(SCOPE_SEPARATOR)
+            for depth in range(len(segments)):
+                wildcard = SCOPE_SEPARATOR.join([*segments[:depth], WILDCARD])
+                self.masks[wildcard] = self.masks.get(wildcard, 0) | bit
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def __contains__(self, scope: object) -> bool:
+        return scope in self.masks
+
+    def get_unknown_scopes(self, scopes: Iterable[str]) -> list[str]:
+        """Returns the scopes that aren't possible scopes, or wildcards matching at least one possible scope"""
+        return [scope for scope in scopes if scope not in self.masks]
+
+    def get_mask(self, scopes: Iterable[str]) -> int:
+        """Returns the mask for `scopes` (which may include wildcards). Scopes the role doesn't know about are ignored."""
+        masks = self.masks
+        mask = 0
+
+        for scope in scopes:
+            mask |= masks.get(scope, 0)
+
+        return mask
+
+    def get_scopes(self, mask: int) -> set[str]:
+        return {scope for scope, bit in self.bits.items() if mask & bit}
+
+
+def get_held_scope_mask(
+    index: ScopeIndex, held_scopes: Collection[str], context: object
+) -> int:
+    """
+    Returns `index.get_mask(held_scopes)`, converting the viewer's scopes (e.g. from the context) only once per
+    request.
+    """
+    return get_request_state(context).get_scope_mask(index, held_scopes)
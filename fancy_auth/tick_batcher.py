@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABC
+from abc import abstractmethod
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Generic
+from typing import Hashable
+from typing import TypeVar
+
+if TYPE_CHECKING:
+    from fancy_auth.context import Context
+
+T = TypeVar("T")
+
+
+class TickBatcher(ABC, Generic[T]):
+    """
+    Collects the items asked about during one event loop tick, and hands them all to a single `_run_batch` call (a la
+    DataLoader) - which must resolve each item's future (see `get_future`).
+
+    Results are remembered for the rest of the request, so each item (by `get_key`) is only loaded once.
+    """
+
+    def __init__(self) -> None:
+        # key -> (item, result). (We hold on to the item, so e.g. its id() can't be reused during the request.)
+        self._futures: dict[Hashable, tuple[Any, asyncio.Future[T]]] = {}
+        # items waiting for the next dispatch
+        self._queue: list[Any] = []
+        # (only held until the next dispatch, so we don't keep the request's context alive)
+        self._context: Context | None = None
+        # batches that are still running (the event loop only keeps a weak reference to tasks)
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def get_key(self, item: Any) -> Hashable:
+        return item
+
+    def get_future(self, item: Any) -> asyncio.Future[T]:
+        return self._futures[self.get_key(item)][1]
+
+    def load(self, item: Any, context: Context) -> asyncio.Future[T]:
+        key = self.get_key(item)
+        entry = self._futures.get(key)
+        if entry is not None:
+            return entry[1]
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[T] = loop.create_future()
+        self._futures[key] = (item, future)
+
+        if not self._queue:
+            # The first item of this tick - everyone else asking during this tick is included in the same batch.
+            loop.call_soon(self._dispatch)
+
+        self._queue.append(item)
+        self._context = context
+
+        return future
+
+    def _dispatch(self) -> None:
+        items, self._queue = self._queue, []
+        context, self._context = self._context, None
+        task = asyncio.ensure_future(self._run_batch(items, context))  # type: ignore[arg-type]
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @abstractmethod
+    async def _run_batch(self, items: list[Any], context: Context) -> None: ...
@@ -1,8 +1,10 @@
+from types import SimpleNamespace
 from typing import Optional
 
 import strawberry
 
 from fancy_auth.context import Context
+from fancy_auth import FancyAuthExtension
 from fancy_auth import fancy_auth
 from fancy_auth.roles import UserIsDog
 from fancy_auth.roles import UserMatches
@@ -88,3 +90,61 @@ def test_or_logic():
     )
     assert result.data
     assert result.data["foo"] == {"foo": "access granted"}
+
+
+SOURCE = SimpleNamespace(
+    fancy_auth_user_owner_id="abc123", fancy_auth_user_mammal_type="dog"
+)
+
+
+def test_roles_are_evaluated_cheapest_first():
+    extension = FancyAuthExtension(
+        match_all=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()]
+    )
+
+    assert [role.__class__.__name__ for role in extension.policy.roles] == [
+        "UserIsDog",
+        "UserMatches",
+    ]
+    assert [
+        role.__class__.__name__ for role in extension.policy.evaluation_order
+    ] == ["UserMatches", "UserIsDog"]
+
+
+def test_and_logic_short_circuits():
+    extension = FancyAuthExtension(
+        match_all=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()]
+    )
+    info = SimpleNamespace(context=Context(trace_id="aaa", user_id=None, dog_scopes=None))
+
+    # UserMatches fails first, so there's no need to evaluate UserIsDog
+    failures = extension.evaluate_roles(SOURCE, info, {})
+    assert [denial.role_name for denial in failures] == ["UserMatches"]
+
+
+def test_or_logic_short_circuits(monkeypatch):
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("UserIsDog should not be evaluated")  # pragma: no cover
+
+    monkeypatch.setattr(UserIsDog, "check_role", fail_if_called)
+
+    extension = FancyAuthExtension(
+        match_any=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()]
+    )
+    info = SimpleNamespace(context=Context(trace_id="aaa", user_id="abc123"))
+
+    assert extension.evaluate_policy(SOURCE, info, {}) == (True, [])
+
+
+def test_detailed_reasons_collects_all_failures():
+    extension = FancyAuthExtension(
+        match_all=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()],
+        detailed_reasons=True,
+    )
+    info = SimpleNamespace(context=Context(trace_id="aaa", user_id=None, dog_scopes=None))
+
+    failures = extension.evaluate_roles(SOURCE, info, {})
+    assert [(denial.role_name, denial.reason) for denial in failures] == [
+        ("UserMatches", "not_logged_in"),
+        ("UserIsDog", "no_dog_scopes"),
+    ]
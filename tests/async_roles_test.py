@@ -0,0 +1,170 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.context import Context
+from fancy_auth import FancyAuthExtension
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+
+@pytest.fixture
+def async_user_is_dog(monkeypatch):
+    """Turns UserIsDog into an async role (e.g. one that asks an identity provider for the user's scopes)"""
+    calls = SimpleNamespace(started=0, cancelled=0)
+    sync_check_role = UserIsDog.check_role
+
+    async def check_role(
+        self, scopes: Optional[set[str]], source: Any, context: Context, input_arg: Any
+    ) -> Optional[RoleDenial]:
+        calls.started += 1
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            calls.cancelled += 1
+            raise
+
+        return sync_check_role(self, scopes, source, context, input_arg)
+
+    monkeypatch.setattr(UserIsDog, "check_role", check_role)
+    monkeypatch.setattr(UserIsDog, "is_async", True)
+    return calls
+
+
+@pytest.fixture
+def async_user_matches(monkeypatch):
+    sync_check_role = UserMatches.check_role
+
+    async def check_role(
+        self, scopes: Optional[set[str]], source: Any, context: Context, input_arg: Any
+    ) -> Optional[RoleDenial]:
+        await asyncio.sleep(0.01)
+        return sync_check_role(self, scopes, source, context, input_arg)
+
+    monkeypatch.setattr(UserMatches, "check_role", check_role)
+    monkeypatch.setattr(UserMatches, "is_async", True)
+
+
+SOURCE = SimpleNamespace(
+    fancy_auth_user_owner_id="abc123", fancy_auth_user_mammal_type="dog"
+)
+
+
+def evaluate(extension, context):
+    return asyncio.run(
+        extension.evaluate_policy_async(SOURCE, SimpleNamespace(context=context), {})
+    )
+
+
+def test_async_role_with_access(async_user_is_dog):
+    extension = FancyAuthExtension(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+    context = Context(trace_id="aaa", dog_scopes={"IS_A_GOOD_BOY"})
+
+    assert evaluate(extension, context) == (True, [])
+
+
+def test_async_role_without_access(async_user_is_dog):
+    extension = FancyAuthExtension(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+    context = Context(trace_id="aaa", dog_scopes={"CHEWS_CABLES"})
+
+    did_pass, denials = evaluate(extension, context)
+    assert did_pass is False
+    assert [denial.reason for denial in denials] == ["no_matching_scopes"]
+
+
+def test_sync_role_decides_before_async_role_starts(async_user_is_dog):
+    # UserMatches fails, so there's no need to even start UserIsDog
+    extension = FancyAuthExtension(
+        match_all=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()]
+    )
+    context = Context(trace_id="aaa", user_id=None, dog_scopes={"IS_A_GOOD_BOY"})
+
+    assert evaluate(extension, context)[0] is False
+    assert async_user_is_dog.started == 0
+
+
+def test_async_roles_are_evaluated_concurrently(async_user_is_dog, async_user_matches):
+    extension = FancyAuthExtension(
+        match_all=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()],
+        detailed_reasons=True,
+    )
+    context = Context(trace_id="aaa", user_id="abc123", dog_scopes={"IS_A_GOOD_BOY"})
+
+    assert evaluate(extension, context) == (True, [])
+    assert async_user_is_dog.started == 1
+
+
+def test_async_roles_short_circuit(async_user_is_dog, async_user_matches):
+    # UserMatches (the quicker role) passes, so UserIsDog is cancelled
+    extension = FancyAuthExtension(
+        match_any=[UserIsDog(scopes=["IS_A_GOOD_BOY"]), UserMatches()]
+    )
+    context = Context(trace_id="aaa", user_id="abc123", dog_scopes={"IS_A_GOOD_BOY"})
+
+    assert evaluate(extension, context) == (True, [])
+    assert async_user_is_dog.started == 1
+    assert async_user_is_dog.cancelled == 1
+
+
+def get_schema():
+    @fancy_auth(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+    @strawberry.type
+    class Dog:
+        fancy_auth_user_mammal_type: strawberry.Private[str]
+        name: Optional[str]
+        breed: Optional[str]
+
+        @strawberry.field
+        async def favorite_toy(self) -> Optional[str]:
+            return "squeaky duck"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def dog(self) -> Dog:
+            return Dog(fancy_auth_user_mammal_type="dog", name="Rex", breed="lab")
+
+    return strawberry.Schema(query=Query)
+
+
+def test_async_role_in_schema(async_user_is_dog):
+    schema = get_schema()
+
+    result = asyncio.run(
+        schema.execute(
+            "{ dog { name breed favoriteToy } }",
+            context_value=Context(trace_id="aaa", dog_scopes={"IS_A_GOOD_BOY"}),
+        )
+    )
+    assert not result.errors
+    assert result.data == {
+        "dog": {"name": "Rex", "breed": "lab", "favoriteToy": "squeaky duck"}
+    }
+    # sibling fields waited for the first field's decision
+    assert async_user_is_dog.started == 1
+
+    result = asyncio.run(
+        schema.execute(
+            "{ dog { name breed favoriteToy } }",
+            context_value=Context(trace_id="aaa", dog_scopes={"CHEWS_CABLES"}),
+        )
+    )
+    assert len(result.errors) == 1
+    assert result.data == {"dog": {"name": None, "breed": None, "favoriteToy": None}}
+
+
+def test_async_role_in_sync_resolver(async_user_is_dog):
+    extension = FancyAuthExtension(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+
+    with pytest.raises(TypeError) as e:
+        extension.check_policy(
+            SOURCE, SimpleNamespace(context=Context(trace_id="aaa", dog_scopes=set()))
+        )
+
+    assert "Cannot evaluate async role(s) UserIsDog from a sync resolver" in str(e.value)
@@ -0,0 +1,118 @@
+from typing import Optional
+
+import strawberry
+
+from fancy_auth.auth_plan import AuthPlanCache
+from fancy_auth.context import Context
+from fancy_auth.decision_log import DecisionSink
+from fancy_auth.decision_log import get_decision_sink
+from fancy_auth.decision_log import set_decision_sink
+from fancy_auth import fancy_auth
+from fancy_auth.pruning import FancyAuthPruningExtension
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+
+class ListSink(DecisionSink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def get_schema(plan_cache):
+    class PruningExtension(FancyAuthPruningExtension):
+        pass
+
+    PruningExtension.plan_cache = plan_cache
+
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        fancy_auth_user_mammal_type: strawberry.Private[str]
+        email: Optional[str]
+
+        @fancy_auth(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+        @strawberry.field
+        def dog_name(self) -> Optional[str]:
+            return "Rex"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def user(self) -> User:
+            return User(
+                fancy_auth_user_owner_id="abc123",
+                fancy_auth_user_mammal_type="dog",
+                email="a@b.c",
+            )
+
+        @fancy_auth(UserMatches(input_arg="user_id"))
+        @strawberry.field
+        def secret(self, user_id: str) -> Optional[str]:
+            return "shh"
+
+    return strawberry.Schema(
+        query=Query, extensions=[PruningExtension] if plan_cache is not None else []
+    )
+
+
+QUERY = '{ user { email contact: email dogName } secret(userId: "abc123") }'
+
+
+def test_plan_is_built_once_per_document():
+    plan_cache = AuthPlanCache()
+    schema = get_schema(plan_cache)
+
+    for _ in range(3):
+        context = Context(trace_id="aaa", user_id="abc123")
+        result = schema.execute_sync(QUERY, variable_values=None, context_value=context)
+        assert result.data["user"]["contact"] == "a@b.c"
+
+    assert plan_cache.stats.misses == 1
+    assert plan_cache.stats.hits == 2
+
+    (plan,) = plan_cache._plans.values()
+    # (`User.email` and `User.dogName` each get the type's policy. `Query.secret`'s role reads an input argument - so
+    # its precheck can't decide it ahead of time.)
+    assert sorted(
+        type(extension.policy.roles[0]).__name__
+        for extension in plan.prunable_extensions
+    ) == ["UserIsDog", "UserMatches", "UserMatches"]
+
+
+def test_plans_are_evicted():
+    plan_cache = AuthPlanCache(max_size=1)
+    schema = get_schema(plan_cache)
+
+    for query in ["{ user { email } }", "{ user { dogName } }", "{ user { email } }"]:
+        schema.execute_sync(
+            query, variable_values=None, context_value=Context(trace_id="aaa")
+        )
+
+    assert len(plan_cache) == 1
+    assert plan_cache.stats.misses == 3
+    assert plan_cache.stats.evictions == 2
+
+
+def test_logged_coordinates_are_unchanged():
+    sink = ListSink()
+    previous = get_decision_sink()
+    set_decision_sink(sink)
+
+    try:
+        for plan_cache in [None, AuthPlanCache()]:
+            get_schema(plan_cache).execute_sync(
+                QUERY,
+                variable_values=None,
+                context_value=Context(trace_id="aaa", user_id="abc123"),
+            )
+    finally:
+        set_decision_sink(previous)
+
+    coordinates = [record.schema_coordinate for record in sink.records]
+    half = len(coordinates) // 2
+    assert coordinates[:half] == coordinates[half:]
+    assert sorted(coordinates[:half]) == ["Query.secret", "User.dogName", "User.email"]
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Optional
 
 import pytest
@@ -94,10 +95,10 @@ def test_basic_type_different_viewer(schema):
         context_value=context,
     )
 
-    # Each field will error individually.
+    # The policy is evaluated once for the whole object, so there's only one error.
+    assert len(result.errors) == 1
     assert "Access denied to field" in str(result.errors[0])
-    assert "Access denied to field" in str(result.errors[1])
-    assert "Access denied to field" in str(result.errors[2])
+    assert ["user", "savedCreditCard", "longNumber"] == result.errors[0].path
 
     assert result.data["user"] == {
         "id": "abc123",
@@ -107,3 +108,89 @@ def test_basic_type_different_viewer(schema):
             "ccv": None,
         },
     }
+
+
+def test_basic_type_decided_once_per_object(monkeypatch):
+    evaluations = []
+    original = UserMatches.check_role
+
+    def counting_check_role(self, **kwargs):
+        evaluations.append(kwargs["source"])
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(UserMatches, "check_role", counting_check_role)
+    # make sure we're measuring per-object decisions (rather than the decision cache)
+    monkeypatch.setattr(UserMatches, "context_keys", None)
+
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class CreditCardDetails:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        long_number: Optional[str]
+        expiry: Optional[str]
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def cards(self) -> list[CreditCardDetails]:
+            return [
+                CreditCardDetails(
+                    fancy_auth_user_owner_id=owner_id,
+                    long_number="4111 1111 1111 1111",
+                    expiry="12/24",
+                )
+                for owner_id in ["abc123", "bar456", "bar456"]
+            ]
+
+    schema = strawberry.Schema(query=Query)
+
+    result = schema.execute_sync(
+        "{ cards { longNumber expiry } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert len(evaluations) == 3
+
+    # one error per denied object (rather than per field)
+    assert [error.path for error in result.errors] == [
+        ["cards", 1, "longNumber"],
+        ["cards", 2, "longNumber"],
+    ]
+    assert result.data["cards"] == [
+        {"longNumber": "4111 1111 1111 1111", "expiry": "12/24"},
+        {"longNumber": None, "expiry": None},
+        {"longNumber": None, "expiry": None},
+    ]
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_type_policy_with_input_arg_is_decided_per_field(is_async):
+    @fancy_auth(UserMatches(input_arg="user_id"))
+    @strawberry.type
+    class Query:
+        if is_async:
+
+            @strawberry.field
+            async def drafts(self, user_id: str) -> Optional[str]:
+                return f"drafts of {user_id}"
+
+        else:
+
+            @strawberry.field
+            def drafts(self, user_id: str) -> Optional[str]:
+                return f"drafts of {user_id}"
+
+    schema = strawberry.Schema(query=Query)
+    query = '{ a: drafts(userId: "abc123") b: drafts(userId: "def456") }'
+    context = Context(trace_id="aaa", user_id="abc123")
+
+    result = (
+        asyncio.run(schema.execute(query, context_value=context))
+        if is_async
+        else schema.execute_sync(query, context_value=context)
+    )
+
+    # (the grant for `a` doesn't carry over to `b`, which was passed someone else's id)
+    assert result.data == {"a": "drafts of abc123", "b": None}
+    assert [error.path for error in result.errors] == [["b"]]
@@ -0,0 +1,126 @@
+import asyncio
+import gc
+from typing import Any
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.batching import RoleBatcher
+from fancy_auth.roles import UserMatches
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Gives UserMatches a batched implementation (e.g. asking an ownership service about many objects at once)"""
+    batches = []
+
+    async def batch_is_role_valid(self, keys: list[Any], context: Context):
+        batches.append(keys)
+        await asyncio.sleep(0)
+        return [
+            None if key == context.user_id else self.deny("user_mismatch", "nope")
+            for key in keys
+        ]
+
+    monkeypatch.setattr(UserMatches, "batch_is_role_valid", batch_is_role_valid)
+    monkeypatch.setattr(UserMatches, "supports_batching", True)
+    return batches
+
+
+def get_schema(owner_ids):
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class Review:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        body: Optional[str]
+        rating: Optional[int]
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def draft_reviews(self) -> list[Review]:
+            return [
+                Review(fancy_auth_user_owner_id=owner_id, body="yum", rating=5)
+                for owner_id in owner_ids
+            ]
+
+    return strawberry.Schema(query=Query)
+
+
+def test_sibling_objects_are_batched(batches):
+    schema = get_schema(["abc123", "def456", "abc123", "ghi789"])
+
+    result = asyncio.run(
+        schema.execute(
+            "{ draftReviews { body rating } }",
+            context_value=Context(trace_id="aaa", user_id="abc123"),
+        )
+    )
+
+    # one lookup for all of the (distinct) owners
+    assert batches == [["abc123", "def456", "ghi789"]]
+
+    assert result.data["draftReviews"] == [
+        {"body": "yum", "rating": 5},
+        {"body": None, "rating": None},
+        {"body": "yum", "rating": 5},
+        {"body": None, "rating": None},
+    ]
+    assert len(result.errors) == 2
+
+
+def test_batch_errors_deny_access(batches, monkeypatch):
+    async def broken_batch_is_role_valid(self, keys: list[Any], context: Context):
+        raise ConnectionError("ownership service is down")
+
+    monkeypatch.setattr(UserMatches, "batch_is_role_valid", broken_batch_is_role_valid)
+    schema = get_schema(["abc123", "abc123"])
+
+    result = asyncio.run(
+        schema.execute(
+            "{ draftReviews { body } }",
+            context_value=Context(trace_id="aaa", user_id="abc123"),
+        )
+    )
+
+    assert result.data["draftReviews"] == [{"body": None}, {"body": None}]
+    assert "Access denied to field" in str(result.errors[0])
+
+
+def test_batch_with_wrong_number_of_results(monkeypatch):
+    def batch_is_role_valid(self, keys: list[Any], context: Context):
+        return []
+
+    monkeypatch.setattr(UserMatches, "batch_is_role_valid", batch_is_role_valid)
+    monkeypatch.setattr(UserMatches, "supports_batching", True)
+    schema = get_schema(["abc123"])
+
+    result = asyncio.run(
+        schema.execute(
+            "{ draftReviews { body } }",
+            context_value=Context(trace_id="aaa", user_id="abc123"),
+        )
+    )
+
+    assert result.data["draftReviews"] == [{"body": None}]
+
+
+def test_running_batches_are_kept_alive(batches):
+    batcher = RoleBatcher(UserMatches())
+    context = Context(trace_id="aaa", user_id="abc123")
+
+    async def load():
+        future = batcher.load("abc123", context)
+        await asyncio.sleep(0)  # (dispatch)
+
+        # nothing else references the running batch
+        assert len(batcher._tasks) == 1
+        gc.collect()
+
+        return await future
+
+    assert asyncio.run(load()) is None
+    assert batcher._tasks == set()
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.circuit_breaker import CircuitBreaker
+from fancy_auth.context import Context
+from fancy_auth import FancyAuthExtension
+from fancy_auth.role_cache import RoleResultCache
+from fancy_auth.roles import UserMatches
+
+FAILURE = RoleDenial.from_exception("UserMatches", RuntimeError("backend is down"))
+DENIAL = RoleDenial("UserMatches", "user_mismatch", "logged in user does not match")
+
+
+@pytest.fixture
+def clock():
+    return SimpleNamespace(now=0.0)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Makes UserMatches depend on a backend that can be taken down"""
+    backend = SimpleNamespace(up=True, calls=0)
+    original = UserMatches.check_role
+
+    def check_role(self, **kwargs):
+        backend.calls += 1
+        if not backend.up:
+            raise RuntimeError("backend is down")
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(UserMatches, "check_role", check_role)
+    return backend
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cool_down=10, clock=lambda: clock.now)
+
+    for denial in [FAILURE, FAILURE, None, FAILURE, FAILURE]:
+        assert breaker.allow_call()
+        breaker.record(denial)
+
+    assert breaker.state == "closed"
+
+    assert breaker.allow_call()
+    breaker.record(FAILURE)
+
+    assert breaker.state == "open"
+    assert not breaker.allow_call()
+    assert breaker.stats.rejected == 1
+    assert breaker.stats.times_opened == 1
+
+
+def test_ordinary_denials_are_not_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=1, clock=lambda: clock.now)
+    breaker.record(DENIAL)
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_trial_call(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cool_down=10, clock=lambda: clock.now)
+    breaker.record(FAILURE)
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+
+    # a single trial call is let through
+    assert breaker.allow_call()
+    assert not breaker.allow_call()
+
+    # ...which re-opens the circuit if it fails
+    breaker.record(FAILURE)
+    assert breaker.state == "open"
+    assert breaker.stats.times_opened == 2
+
+    clock.now = 20
+    assert breaker.allow_call()
+    breaker.record(None)
+    assert breaker.state == "closed"
+    assert breaker.allow_call()
+
+
+def evaluate(extension, user_id="abc123"):
+    info = SimpleNamespace(context=Context(trace_id="aaa", user_id=user_id))
+    source = SimpleNamespace(fancy_auth_user_owner_id="abc123")
+    return extension.evaluate_policy(source, info, {})
+
+
+def test_role_is_not_called_while_the_circuit_is_open(backend, clock, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, cool_down=10, clock=lambda: clock.now)
+    monkeypatch.setattr(UserMatches, "circuit_breaker", breaker)
+    extension = FancyAuthExtension(UserMatches())
+
+    backend.up = False
+    for _ in range(5):
+        did_pass, denials = evaluate(extension)
+        assert not did_pass
+
+    assert backend.calls == 2
+    assert denials[0].reason == "circuit_open"
+
+    # once the backend recovers, the next call after the cool down closes the circuit again
+    backend.up = True
+    clock.now = 10
+    assert evaluate(extension) == (True, [])
+    assert breaker.state == "closed"
+
+
+def test_serves_stale_grants_while_the_circuit_is_open(backend, clock, monkeypatch):
+    cache = RoleResultCache(ttl=1, stale_ttl=60, clock=lambda: clock.now)
+    breaker = CircuitBreaker(
+        failure_threshold=1,
+        cool_down=120,
+        serve_stale_grants=True,
+        clock=lambda: clock.now,
+    )
+    monkeypatch.setattr(UserMatches, "result_cache", cache)
+    monkeypatch.setattr(UserMatches, "circuit_breaker", breaker)
+    extension = FancyAuthExtension(UserMatches())
+
+    assert evaluate(extension) == (True, [])
+
+    # the grant has expired, and the backend goes down
+    clock.now = 2
+    backend.up = False
+    assert not evaluate(extension)[0]
+    assert breaker.state == "open"
+
+    # the expired grant is served while the circuit is open...
+    assert evaluate(extension) == (True, [])
+    assert breaker.stats.stale_grants_served == 1
+
+    # ...but not once it's too old
+    clock.now = 62
+    assert evaluate(extension)[1][0].reason == "circuit_open"
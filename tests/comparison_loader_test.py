@@ -0,0 +1,137 @@
+import asyncio
+import gc
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.comparison_loader import ComparisonKeyBatcher
+from fancy_auth.comparison_loader import ComparisonKeyLoader
+from fancy_auth.context import Context
+from fancy_auth import comparison_key_loader
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserMatches
+
+OWNERS = {"1": "abc123", "2": "def456", "3": "abc123", "4": "ghi789"}
+
+
+def get_schema(loads, fail=False, list_mode=None):
+    async def load_owner_ids(reviews, context):
+        loads.append([review.id for review in reviews])
+        await asyncio.sleep(0)
+        if fail:
+            raise RuntimeError("database is down")
+        return [OWNERS[review.id] for review in reviews]
+
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class Review:
+        id: Optional[str]
+        body: Optional[str]
+        fancy_auth_user_owner_id = comparison_key_loader(load_owner_ids)
+
+    def get_reviews() -> list[Review]:
+        return [Review(id=review_id, body=f"review {review_id}") for review_id in OWNERS]
+
+    if list_mode is None:
+
+        @strawberry.type
+        class Query:
+            @strawberry.field
+            def reviews(self) -> list[Review]:
+                return get_reviews()
+
+    else:
+
+        @strawberry.type
+        class Query:
+            @fancy_auth(list_mode=list_mode)
+            @strawberry.field
+            def reviews(self) -> list[Review]:
+                return get_reviews()
+
+    return strawberry.Schema(query=Query)
+
+
+def execute(schema, query="{ reviews { id body } }", user_id="abc123"):
+    return asyncio.run(
+        schema.execute(query, context_value=Context(trace_id="aaa", user_id=user_id))
+    )
+
+
+def test_objects_are_loaded_in_one_batch():
+    loads = []
+    result = execute(get_schema(loads))
+
+    assert result.data["reviews"] == [
+        {"id": "1", "body": "review 1"},
+        {"id": None, "body": None},
+        {"id": "3", "body": "review 3"},
+        {"id": None, "body": None},
+    ]
+    assert len(result.errors) == 2
+
+    # every object in a single call - and only once, however many protected fields are selected
+    assert loads == [["1", "2", "3", "4"]]
+
+
+def test_loads_are_not_shared_between_requests():
+    loads = []
+    schema = get_schema(loads)
+
+    execute(schema)
+    execute(schema)
+
+    assert len(loads) == 2
+
+
+def test_failed_load_denies_access():
+    result = execute(get_schema([], fail=True))
+
+    assert result.data["reviews"] == [{"id": None, "body": None}] * 4
+    assert {error.message for error in result.errors} == {"Access denied to field"}
+
+
+def test_loaders_work_with_list_mode():
+    loads = []
+    result = execute(get_schema(loads, list_mode="drop"))
+
+    assert not result.errors
+    assert result.data["reviews"] == [
+        {"id": "1", "body": "review 1"},
+        {"id": "3", "body": "review 3"},
+    ]
+    assert loads == [["1", "2", "3", "4"]]
+
+
+def test_loaded_values_cannot_be_read_directly():
+    schema = get_schema([])
+    review_type = schema.get_type_by_name("Review").origin
+
+    assert isinstance(review_type.fancy_auth_user_owner_id, ComparisonKeyLoader)
+
+    with pytest.raises(TypeError, match="fancy_auth_user_owner_id is loaded asynchronously"):
+        review_type(id="1", body="").fancy_auth_user_owner_id
+
+
+def test_running_batches_are_kept_alive():
+    async def load_owner_ids(reviews, context):
+        await asyncio.sleep(0)
+        return [OWNERS[review.id] for review in reviews]
+
+    batcher = ComparisonKeyBatcher(ComparisonKeyLoader(load_owner_ids))
+    review = SimpleNamespace(id="1")
+
+    async def load():
+        future = batcher.load(review, Context(trace_id="aaa", user_id="abc123"))
+        await asyncio.sleep(0)  # (dispatch)
+
+        # nothing else references the running batch
+        assert len(batcher._tasks) == 1
+        gc.collect()
+
+        return await future
+
+    assert asyncio.run(load()) == "abc123"
+    assert batcher._tasks == set()
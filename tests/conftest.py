@@ -0,0 +1,11 @@
+import pytest
+
+from fancy_auth.policy import clear_interned_policies
+
+
+@pytest.fixture(autouse=True)
+def _clear_interned_policies():
+    # Some tests monkeypatch role classes (e.g. to make them async), which changes the policies built from them.
+    clear_interned_policies()
+    yield
+    clear_interned_policies()
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.context import Context
+from fancy_auth.deadlines import ROLE_TIMINGS
+from fancy_auth.decision_log import DecisionSink
+from fancy_auth.decision_log import get_decision_sink
+from fancy_auth.decision_log import set_decision_sink
+from fancy_auth.role_cache import RoleResultCache
+from fancy_auth import FancyAuthDeadlineExtension
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserMatches
+
+
+class ListSink(DecisionSink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def list_sink():
+    previous = get_decision_sink()
+    sink = ListSink()
+    set_decision_sink(sink)
+    yield sink
+    set_decision_sink(previous)
+
+
+@pytest.fixture
+def role_delay(monkeypatch):
+    """Turns UserMatches into an async role that takes `role_delay[0]` seconds (e.g. a slow identity provider)"""
+    delay = [0.0]
+    sync_check_role = UserMatches.check_role
+
+    async def check_role(
+        self, scopes: Optional[set[str]], source: Any, context: Context, input_arg: Any
+    ) -> Optional[RoleDenial]:
+        await asyncio.sleep(delay[0])
+        return sync_check_role(self, scopes, source, context, input_arg)
+
+    monkeypatch.setattr(UserMatches, "check_role", check_role)
+    monkeypatch.setattr(UserMatches, "is_async", True)
+    return delay
+
+
+def get_schema(extensions=()):
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+
+        @fancy_auth(UserMatches())
+        @strawberry.field
+        async def email(self) -> Optional[str]:
+            return "bruce@wayne.com"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def user(self) -> User:
+            return User(fancy_auth_user_owner_id="abc123")
+
+    return strawberry.Schema(query=Query, extensions=list(extensions))
+
+
+def execute(schema):
+    return asyncio.run(
+        schema.execute(
+            "{ user { email } }", context_value=Context(trace_id="aaa", user_id="abc123")
+        )
+    )
+
+
+def test_role_timeout(role_delay, list_sink, monkeypatch):
+    role_delay[0] = 1
+    monkeypatch.setattr(UserMatches, "timeout", 0.01)
+    before = ROLE_TIMINGS.get("UserMatches")
+    deadlines_before = before.deadlines_exceeded if before is not None else 0
+
+    result = execute(get_schema())
+
+    assert result.data == {"user": {"email": None}}
+    assert list_sink.records[0].reasons_denied == [
+        (
+            "UserMatches",
+            "deadline_exceeded",
+            "UserMatches did not finish within its deadline (0.01s)",
+        )
+    ]
+    assert ROLE_TIMINGS["UserMatches"].deadlines_exceeded == deadlines_before + 1
+
+
+def test_roles_within_their_timeout_pass(role_delay, monkeypatch):
+    monkeypatch.setattr(UserMatches, "timeout", 1)
+
+    result = execute(get_schema())
+
+    assert not result.errors
+    assert result.data == {"user": {"email": "bruce@wayne.com"}}
+
+
+def test_request_deadline(role_delay, list_sink):
+    role_delay[0] = 1
+
+    result = execute(get_schema([FancyAuthDeadlineExtension(seconds=0.01)]))
+
+    assert result.data == {"user": {"email": None}}
+    assert list_sink.records[0].reasons_denied[0][1] == "deadline_exceeded"
+
+
+def test_roles_are_not_started_after_the_request_deadline(role_delay, list_sink):
+    result = execute(get_schema([FancyAuthDeadlineExtension(seconds=0)]))
+
+    assert result.data == {"user": {"email": None}}
+    assert list_sink.records[0].reasons_denied[0][1] == "deadline_exceeded"
+
+
+def test_deadline_denials_are_not_cached(role_delay, monkeypatch):
+    cache = RoleResultCache()
+    role_delay[0] = 1
+    monkeypatch.setattr(UserMatches, "timeout", 0.01)
+    monkeypatch.setattr(UserMatches, "result_cache", cache)
+
+    execute(get_schema())
+
+    assert len(cache) == 0
@@ -0,0 +1,164 @@
+import gc
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.field_extension import FancyAuthExtension
+from fancy_auth.request_state import DECISION_CACHE_STATS
+from fancy_auth.request_state import FancyAuthRequestExtension
+from fancy_auth.request_state import _request_states
+from fancy_auth.request_state import get_request_state
+from fancy_auth.roles import UserMatches
+
+
+@pytest.fixture
+def role_calls(monkeypatch):
+    calls = []
+    original = UserMatches.check_role
+
+    def counting_check_role(self, **kwargs):
+        calls.append(kwargs)
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(UserMatches, "check_role", counting_check_role)
+    return calls
+
+
+@pytest.fixture
+def schema():
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        email: Optional[str]
+        phone: Optional[str]
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def users(self) -> list[User]:
+            return [
+                User(fancy_auth_user_owner_id=owner_id, email="a@b.c", phone="555")
+                for owner_id in ["abc123", "abc123", "abc123", "def456"]
+            ]
+
+    return strawberry.Schema(query=Query)
+
+
+def test_decisions_are_reused_within_a_request(schema, role_calls):
+    context = Context(trace_id="aaa", user_id="abc123")
+
+    result = schema.execute_sync(
+        "{ users { email phone } }", variable_values=None, context_value=context
+    )
+
+    assert result.data["users"] == [
+        {"email": "a@b.c", "phone": "555"},
+        {"email": "a@b.c", "phone": "555"},
+        {"email": "a@b.c", "phone": "555"},
+        {"email": None, "phone": None},
+    ]
+
+    # 4 objects, but only two distinct owners
+    assert len(role_calls) == 2
+
+    stats = get_request_state(context).stats
+    assert stats.misses == 2
+    assert stats.hits == 2
+
+
+def test_decisions_are_not_shared_between_requests(schema, role_calls):
+    hits_before = DECISION_CACHE_STATS.hits
+
+    for _ in range(2):
+        schema.execute_sync(
+            "{ users { email } }",
+            variable_values=None,
+            context_value=Context(trace_id="aaa", user_id="abc123"),
+        )
+
+    assert len(role_calls) == 4
+    assert DECISION_CACHE_STATS.hits - hits_before == 4
+
+
+def test_cache_is_dropped_when_request_ends():
+    context = Context(trace_id="aaa", user_id="abc123")
+    get_request_state(context).set_decision("foo", (True, []))
+    assert id(context) in _request_states
+
+    context_id = id(context)
+    del context
+    gc.collect()
+
+    assert context_id not in _request_states
+
+
+def test_different_context_values_are_not_shared():
+    role = UserMatches()
+    source = SimpleNamespace(fancy_auth_user_owner_id="abc123")
+
+    assert role.get_decision_cache_key(
+        source, Context(trace_id="aaa", user_id="abc123"), None
+    ) != role.get_decision_cache_key(
+        source, Context(trace_id="aaa", user_id="def456"), None
+    )
+
+
+class SlottedContext:
+    """A context that can't be weakly referenced"""
+
+    __slots__ = ("trace_id", "user_id", "dog_scopes", "scope_token")
+
+    def __init__(self, trace_id, user_id):
+        self.trace_id = trace_id
+        self.user_id = user_id
+        self.dog_scopes = None
+        self.scope_token = None
+
+
+def test_state_is_dropped_when_execution_ends():
+    context = Context(trace_id="aaa", user_id="abc123")
+    ended = []
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def ping(self, info: strawberry.Info) -> str:
+            get_request_state(info.context).call_when_ended("test", lambda: ended.append(True))
+            return "pong"
+
+    strawberry.Schema(query=Query, extensions=[FancyAuthRequestExtension]).execute_sync(
+        "{ ping }", context_value=context
+    )
+
+    # (while the context is still alive)
+    assert ended == [True]
+    assert id(context) not in _request_states
+
+
+def test_decisions_are_reused_for_contexts_that_cant_be_weakly_referenced(
+    schema, role_calls
+):
+    context = SlottedContext(trace_id="aaa", user_id="abc123")
+    schema = strawberry.Schema(query=schema.query, extensions=[FancyAuthRequestExtension])
+
+    result = schema.execute_sync("{ users { email } }", context_value=context)
+
+    assert len(result.data["users"]) == 4
+    assert len(role_calls) == 2
+    assert id(context) not in _request_states
+
+
+def test_detailed_reasons_are_not_shared():
+    source = SimpleNamespace(fancy_auth_user_owner_id="abc123")
+    info = SimpleNamespace(context=Context(trace_id="aaa", user_id="abc123"))
+    extension = FancyAuthExtension(UserMatches())
+    detailed = FancyAuthExtension.from_policy(extension.policy, detailed_reasons=True)
+
+    assert extension.get_decision_cache_key(
+        source, info, None
+    ) != detailed.get_decision_cache_key(source, info, None)
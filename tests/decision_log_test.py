@@ -0,0 +1,363 @@
+import gc
+import io
+import json
+import threading
+import time
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.decision_log import AggregatingSink
+from fancy_auth.decision_log import DecisionRecord
+from fancy_auth.decision_log import DecisionSink
+from fancy_auth.decision_log import DecisionSummary
+from fancy_auth.decision_log import NDJSONWriter
+from fancy_auth.decision_log import QueuedSink
+from fancy_auth.decision_log import SampledSink
+from fancy_auth.decision_log import get_decision_sink
+from fancy_auth.decision_log import set_decision_sink
+from fancy_auth.request_state import FancyAuthRequestExtension
+from fancy_auth.roles import UserMatches
+
+
+def make_record(decision="granted", trace_id="aaa"):
+    return DecisionRecord(
+        trace_id=trace_id,
+        schema_coordinate="User.password",
+        roles=[("UserMatches", None)],
+        policy_eval_logic="all",
+        decision=decision,
+        reasons_denied=None,
+    )
+
+
+class ListSink(DecisionSink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def list_sink():
+    previous = get_decision_sink()
+    sink = ListSink()
+    set_decision_sink(sink)
+    yield sink
+    set_decision_sink(previous)
+
+
+@pytest.fixture
+def schema():
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+
+        @fancy_auth(UserMatches())
+        @strawberry.field
+        def password(self) -> Optional[str]:
+            return "hunter2"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def users(self) -> list[User]:
+            return [
+                User(fancy_auth_user_owner_id=owner_id)
+                for owner_id in ["abc123", "abc123", "def456", "abc123"]
+            ]
+
+    return strawberry.Schema(query=Query)
+
+
+def test_queued_sink_writes_ndjson():
+    stream = io.StringIO()
+    sink = QueuedSink(NDJSONWriter(stream))
+
+    for _ in range(3):
+        sink.emit(make_record())
+    sink.close()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0]) == {
+        "trace_id": "aaa",
+        "schema_coordinate": "User.password",
+        "roles": [["UserMatches", None]],
+        "policy_eval_logic": "all",
+        "decision": "granted",
+        "reasons_denied": None,
+    }
+    assert sink.written == 3
+    assert sink.dropped == 0
+    # (streams we didn't open are left open)
+    assert not stream.closed
+
+
+def test_queued_sink_writes_to_file(tmp_path):
+    path = tmp_path / "decisions.ndjson"
+    writer = NDJSONWriter(str(path))
+    sink = QueuedSink(writer)
+    sink.emit(make_record())
+    sink.close()
+
+    assert json.loads(path.read_text())["schema_coordinate"] == "User.password"
+    assert writer.stream.closed
+
+
+def test_queued_sink_drops_when_full():
+    batches = []
+    unblock = threading.Event()
+
+    def slow_writer(batch):
+        unblock.wait()
+        batches.append(batch)
+
+    sink = QueuedSink(slow_writer, max_queue_size=2, batch_size=1, overflow="drop")
+
+    for _ in range(10):
+        sink.emit(make_record())
+
+    # (the writer thread may or may not have taken the first record off the queue yet)
+    assert sink.dropped in (7, 8)
+    assert sink.emitted + sink.dropped == 10
+
+    unblock.set()
+    sink.close()
+    assert sum(len(batch) for batch in batches) == sink.emitted
+
+
+def test_queued_sink_blocks_when_full():
+    written = []
+    sink = QueuedSink(written.extend, max_queue_size=1, overflow="block")
+
+    for _ in range(50):
+        sink.emit(make_record())
+    sink.flush()
+
+    assert len(written) == 50
+    assert sink.dropped == 0
+    sink.close()
+
+
+def test_queued_sink_survives_writer_errors():
+    def broken_writer(batch):
+        raise OSError("disk full")
+
+    sink = QueuedSink(broken_writer)
+    sink.emit(make_record())
+    sink.flush()
+
+    assert sink.write_errors == 1
+    sink.close()
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        QueuedSink(print, overflow="explode")
+
+
+def test_decisions_are_sent_to_sink(list_sink):
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+
+        @fancy_auth(UserMatches())
+        @strawberry.field
+        def password(self) -> Optional[str]:
+            return "hunter2"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def user(self) -> User:
+            return User(fancy_auth_user_owner_id="abc123")
+
+    schema = strawberry.Schema(query=Query)
+    schema.execute_sync(
+        "{ user { password } }", context_value=Context(trace_id="aaa", user_id=None)
+    )
+
+    assert list_sink.records == [
+        DecisionRecord(
+            trace_id="aaa",
+            schema_coordinate="User.password",
+            roles=[("UserMatches", None)],
+            policy_eval_logic="all",
+            decision="denied",
+            reasons_denied=[("UserMatches", "not_logged_in", "user is not logged in")],
+        )
+    ]
+
+
+def test_sampled_sink_keeps_all_denials_and_samples_grants():
+    inner = ListSink()
+    draws = iter([0.5, 0.005, 0.5, 0.0001])
+    sink = SampledSink(
+        inner,
+        grant_sample_rate=0.01,
+        grant_sample_rates={"User.email": 0.001},
+        rng=lambda: next(draws),
+    )
+
+    assert sink.should_emit("User.password", "denied")
+    assert not sink.should_emit("User.password", "granted")  # 0.5
+    assert sink.should_emit("User.password", "granted")  # 0.005
+    assert not sink.should_emit("User.email", "granted")  # 0.5
+    assert sink.should_emit("User.email", "granted")  # 0.0001
+
+
+def test_sampled_sink_skips_building_records(list_sink, schema):
+    set_decision_sink(SampledSink(list_sink, grant_sample_rate=0))
+
+    schema.execute_sync(
+        "{ users { password } }",
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    # only the denial (for def456's password) was logged
+    assert [record.decision for record in list_sink.records] == ["denied"]
+
+
+def test_aggregating_sink_per_window():
+    inner = ListSink()
+    now = [1000.0]
+    sink = AggregatingSink(inner, window_seconds=60, clock=lambda: now[0])
+
+    for _ in range(5):
+        sink.emit(make_record())
+    sink.emit(make_record("denied"))
+
+    # the denial is passed through straight away
+    assert [record.decision for record in inner.records] == ["denied"]
+
+    now[0] += 61
+    sink.emit(make_record())
+
+    summaries = [r for r in inner.records if isinstance(r, DecisionSummary)]
+    assert sorted((s.decision, s.count) for s in summaries) == [
+        ("denied", 1),
+        ("granted", 5),
+    ]
+    assert summaries[0].window_start == 1000.0
+    assert summaries[0].window_end == 1061.0
+
+    inner.records.clear()
+    sink.flush()
+    assert [(s.decision, s.count) for s in inner.records] == [("granted", 1)]
+
+
+def test_aggregating_sink_per_request(list_sink, schema):
+    set_decision_sink(AggregatingSink(list_sink, per_request=True, keep_denials=False))
+
+    context = Context(trace_id="aaa", user_id="abc123")
+    result = schema.execute_sync("{ users { password } }", context_value=context)
+    assert list_sink.records == []
+
+    del context, result
+    gc.collect()
+
+    assert sorted(
+        (record.trace_id, record.decision, record.count)
+        for record in list_sink.records
+    ) == [("aaa", "denied", 1), ("aaa", "granted", 3)]
+
+
+def test_aggregating_sink_flushes_windows_on_a_timer():
+    inner = ListSink()
+    sink = AggregatingSink(inner, window_seconds=0.05)
+    sink.emit(make_record())
+
+    deadline = time.time() + 5
+    while not inner.records and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert [(s.decision, s.count) for s in inner.records] == [("granted", 1)]
+    sink.close()
+
+
+def test_sinks_are_closed_at_exit(monkeypatch):
+    exit_handlers = []
+    monkeypatch.setattr(
+        "fancy_auth.decision_log.atexit.register",
+        lambda func, *args: exit_handlers.append((func, args)),
+    )
+    written = []
+    sink = AggregatingSink(QueuedSink(written.extend), window_seconds=60)
+
+    for _ in range(3):
+        sink.emit(make_record())
+
+    for func, args in reversed(exit_handlers):
+        func(*args)
+
+    # (the window hadn't closed yet - but its summary was still written)
+    assert [(s.decision, s.count) for s in written] == [("granted", 3)]
+
+
+def test_aggregating_sink_end_request_during_emit():
+    inner = ListSink()
+    sink = AggregatingSink(inner, per_request=True)
+    sink.emit(make_record())
+
+    # e.g. the request's context was garbage collected while this thread was in the middle of `emit`
+    with sink._locked():
+        sink.end_request("aaa")
+
+    assert inner.records == []
+
+    sink.emit(make_record(trace_id="bbb"))
+    assert [(s.trace_id, s.count) for s in inner.records] == [("aaa", 1)]
+
+
+class SlottedContext:
+    """A context that can't be weakly referenced"""
+
+    __slots__ = ("trace_id", "user_id", "dog_scopes", "scope_token")
+
+    def __init__(self, trace_id, user_id):
+        self.trace_id = trace_id
+        self.user_id = user_id
+        self.dog_scopes = None
+        self.scope_token = None
+
+
+def test_aggregating_sink_per_request_with_extension(list_sink, schema):
+    set_decision_sink(AggregatingSink(list_sink, per_request=True, keep_denials=False))
+    schema = strawberry.Schema(query=schema.query, extensions=[FancyAuthRequestExtension])
+
+    schema.execute_sync(
+        "{ users { password } }", context_value=SlottedContext("aaa", "abc123")
+    )
+
+    assert sorted(
+        (record.trace_id, record.decision, record.count)
+        for record in list_sink.records
+    ) == [("aaa", "denied", 1), ("aaa", "granted", 3)]
+
+
+def test_aggregating_sink_per_request_without_end(list_sink, schema):
+    now = [1000.0]
+    sink = AggregatingSink(
+        list_sink, per_request=True, keep_denials=False, clock=lambda: now[0]
+    )
+    set_decision_sink(sink)
+
+    # (without FancyAuthRequestExtension, there's no way of telling when this request ends)
+    schema.execute_sync(
+        "{ users { password } }", context_value=SlottedContext("aaa", "abc123")
+    )
+    assert list_sink.records == []
+
+    now[0] += 61
+    sink._flush_expired()
+
+    assert sorted(
+        (record.trace_id, record.decision, record.count)
+        for record in list_sink.records
+    ) == [("aaa", "denied", 1), ("aaa", "granted", 3)]
+    assert sink._counts == {}
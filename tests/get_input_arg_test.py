@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+
+import pytest
+
+from fancy_auth.get_input_arg import compile_input_arg_getter
+from fancy_auth.get_input_arg import get_input_arg_from_field
+
+
+@dataclass
+class Address:
+    zip_code: str
+    tags: list[str]
+
+
+@dataclass
+class UpdateAddressInput:
+    user_id: str
+    address: Address
+
+
+INPUTS = {
+    "input": UpdateAddressInput(
+        user_id="abc123", address=Address(zip_code="94107", tags=["home"])
+    )
+}
+
+
+def test_input_arg():
+    assert compile_input_arg_getter("input.user_id")(INPUTS) == "abc123"
+    assert get_input_arg_from_field("input.user_id", INPUTS) == "abc123"
+
+
+def test_nested_input_arg():
+    assert compile_input_arg_getter("input.address.zip_code")(INPUTS) == "94107"
+
+
+def test_input_arg_is_not_copied():
+    assert compile_input_arg_getter("input.address.tags")(INPUTS) is (
+        INPUTS["input"].address.tags
+    )
+
+
+def test_input_arg_from_dict():
+    inputs = {"input": {"address": {"zip_code": "94107"}}}
+    assert compile_input_arg_getter("input.address.zip_code")(inputs) == "94107"
+
+
+def test_raw_field_argument():
+    assert compile_input_arg_getter("user_id")({"user_id": "abc123"}) == "abc123"
+
+
+@pytest.mark.parametrize(
+    "input_arg", ["input.oops_i_dont_exist", "input.address.nope", "input.__init__"]
+)
+def test_missing_input_arg(input_arg):
+    get_input_arg = compile_input_arg_getter(input_arg)
+
+    with pytest.raises(KeyError) as e:
+        get_input_arg(INPUTS)
+
+    expected_key = input_arg.split(".", 1)[1]
+    assert f'Could not find "{expected_key}" as a resolver argument' in str(e.value)
+
+
+def test_missing_raw_field_argument():
+    get_input_arg = compile_input_arg_getter("i_dont_exist")
+
+    with pytest.raises(AssertionError) as e:
+        get_input_arg({"user_id": "abc123"})
+
+    assert "make sure to prefix `input_arg`" in str(e.value)
@@ -0,0 +1,179 @@
+import asyncio
+from typing import Any
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth.decision_log import DecisionSink
+from fancy_auth.decision_log import get_decision_sink
+from fancy_auth.decision_log import set_decision_sink
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserMatches
+
+OWNER_IDS = ["abc123", "def456", "abc123", "ghi789"]
+
+
+class ListSink(DecisionSink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def list_sink():
+    previous = get_decision_sink()
+    sink = ListSink()
+    set_decision_sink(sink)
+    yield sink
+    set_decision_sink(previous)
+
+
+@pytest.fixture
+def role_calls(monkeypatch):
+    calls = []
+    original = UserMatches.check_role
+
+    def counting_check_role(self, **kwargs):
+        calls.append(kwargs)
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(UserMatches, "check_role", counting_check_role)
+    return calls
+
+
+def get_schema():
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class Review:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        body: Optional[str]
+        rating: Optional[int]
+
+    def get_reviews() -> list[Review]:
+        return [
+            Review(fancy_auth_user_owner_id=owner_id, body=f"by {owner_id}", rating=5)
+            for owner_id in OWNER_IDS
+        ]
+
+    @strawberry.type
+    class Query:
+        @fancy_auth(list_mode="drop")
+        @strawberry.field
+        def reviews(self) -> list[Review]:
+            return get_reviews()
+
+        @fancy_auth(list_mode="null")
+        @strawberry.field
+        def reviews_or_null(self) -> list[Optional[Review]]:
+            return get_reviews()
+
+        @fancy_auth(list_mode="drop")
+        @strawberry.field
+        async def async_reviews(self) -> list[Review]:
+            return get_reviews()
+
+    return strawberry.Schema(query=Query)
+
+
+def test_denied_items_are_dropped(role_calls, list_sink):
+    result = get_schema().execute_sync(
+        "{ reviews { body rating } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert not result.errors
+    assert result.data["reviews"] == [
+        {"body": "by abc123", "rating": 5},
+        {"body": "by abc123", "rating": 5},
+    ]
+
+    # the items are decided in one vectorized pass - and the fields of the items that were kept don't check again
+    assert len(role_calls) == 0
+    assert [record.decision for record in list_sink.records] == [
+        "granted",
+        "denied",
+        "granted",
+        "denied",
+    ]
+    assert {record.schema_coordinate for record in list_sink.records} == {"Query.reviews"}
+
+
+def test_denied_items_are_nulled():
+    result = get_schema().execute_sync(
+        "{ reviewsOrNull { body } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert not result.errors
+    assert result.data["reviewsOrNull"] == [
+        {"body": "by abc123"},
+        None,
+        {"body": "by abc123"},
+        None,
+    ]
+
+
+def test_async_list_items_are_authorized_in_one_batch(monkeypatch):
+    batches = []
+
+    async def batch_is_role_valid(self, keys: list[Any], context: Context):
+        batches.append(keys)
+        await asyncio.sleep(0)
+        return [
+            None if key == context.user_id else self.deny("user_mismatch", "nope")
+            for key in keys
+        ]
+
+    monkeypatch.setattr(UserMatches, "batch_is_role_valid", batch_is_role_valid)
+    monkeypatch.setattr(UserMatches, "supports_batching", True)
+
+    result = asyncio.run(
+        get_schema().execute(
+            "{ asyncReviews { body } }",
+            context_value=Context(trace_id="aaa", user_id="def456"),
+        )
+    )
+
+    assert not result.errors
+    assert result.data["asyncReviews"] == [{"body": "by def456"}]
+    assert batches == [["abc123", "def456", "ghi789"]]
+
+
+def test_list_mode_validation():
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class Review:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        body: str
+
+    @strawberry.type
+    class Unprotected:
+        body: str
+
+    def schema_with(field_type, list_mode):
+        @strawberry.type
+        class Query:
+            @fancy_auth(list_mode=list_mode)
+            @strawberry.field
+            def items(self) -> field_type:
+                return []  # pragma: no cover
+
+        return strawberry.Schema(query=Query)
+
+    with pytest.raises(TypeError, match="can only be used on list fields"):
+        schema_with(Review, "drop")
+
+    with pytest.raises(TypeError, match="requires the items of items to be nullable"):
+        schema_with(list[Review], "null")
+
+    with pytest.raises(TypeError, match="can only be used on lists of types protected"):
+        schema_with(list[Unprotected], "drop")
+
+    with pytest.raises(ValueError, match="don't pass roles as well"):
+        fancy_auth(UserMatches(), list_mode="drop")(strawberry.field(lambda: []))
@@ -0,0 +1,171 @@
+import asyncio
+import pickle
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth.offload import RoleExecutor
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserMatches
+
+CONTEXT = Context(trace_id="aaa", user_id="abc123")
+
+
+@pytest.fixture
+def blocking_role(monkeypatch):
+    """Makes UserMatches a blocking role, evaluated by a pool of 2 threads. Records where each evaluation ran."""
+    executor = RoleExecutor(max_workers=2)
+    calls = SimpleNamespace(threads=[], barrier=None, delay=0.0)
+    sync_check_role = UserMatches.check_role
+
+    def check_role(self, scopes, source, context, input_arg):
+        calls.threads.append(threading.current_thread().name)
+        if calls.barrier is not None:
+            calls.barrier.wait()
+        time.sleep(calls.delay)
+        return sync_check_role(self, scopes, source, context, input_arg)
+
+    monkeypatch.setattr(UserMatches, "check_role", check_role)
+    monkeypatch.setattr(UserMatches, "executor", executor)
+    calls.executor = executor
+
+    yield calls
+
+    executor.shutdown()
+
+
+def get_schema(is_async: bool):
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+
+        if is_async:
+
+            @fancy_auth(UserMatches())
+            @strawberry.field
+            async def email(self) -> Optional[str]:
+                return f"{self.fancy_auth_user_owner_id}@example.com"
+
+        else:
+
+            @fancy_auth(UserMatches())
+            @strawberry.field
+            def email(self) -> Optional[str]:
+                return f"{self.fancy_auth_user_owner_id}@example.com"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def users(self) -> list[User]:
+            return [
+                User(fancy_auth_user_owner_id="abc123"),
+                User(fancy_auth_user_owner_id="def456"),
+            ]
+
+    return strawberry.Schema(query=Query)
+
+
+def test_async_resolvers_offload_blocking_roles(blocking_role):
+    # Both evaluations have to be running at the same time to get past the barrier - i.e. neither is blocking the
+    # event loop
+    blocking_role.barrier = threading.Barrier(2, timeout=5)
+
+    result = asyncio.run(
+        get_schema(is_async=True).execute(
+            "{ users { email } }", context_value=CONTEXT
+        )
+    )
+
+    assert result.data == {
+        "users": [{"email": "abc123@example.com"}, {"email": None}]
+    }
+    assert [error.message for error in result.errors] == ["Access denied to field"]
+    assert all(name.startswith("fancy-auth-role") for name in blocking_role.threads)
+    assert blocking_role.executor.stats.calls == 2
+
+
+def test_sync_execution_evaluates_blocking_roles_inline(blocking_role):
+    result = get_schema(is_async=False).execute_sync(
+        "{ users { email } }", context_value=CONTEXT
+    )
+
+    assert result.data == {
+        "users": [{"email": "abc123@example.com"}, {"email": None}]
+    }
+    assert blocking_role.threads == [threading.current_thread().name] * 2
+    assert blocking_role.executor.stats.calls == 0
+
+
+def test_queue_wait_is_measured_separately(blocking_role):
+    blocking_role.delay = 0.05
+    executor = RoleExecutor(max_workers=1)
+    role = UserMatches()
+    source = SimpleNamespace(fancy_auth_user_owner_id="abc123")
+
+    async def check_twice():
+        return await asyncio.gather(
+            executor.check_role(role, source, CONTEXT, None),
+            executor.check_role(role, source, CONTEXT, None),
+        )
+
+    assert asyncio.run(check_twice()) == [None, None]
+
+    # (the second evaluation had to wait for the first one to finish)
+    assert executor.stats.calls == 2
+    assert executor.stats.max_queue_seconds >= 0.04
+    assert executor.stats.total_run_seconds >= 0.1
+    executor.shutdown()
+
+
+def test_errors_deny_access(blocking_role, monkeypatch):
+    def check_role(self, scopes, source, context, input_arg):
+        raise RuntimeError("SDK is down")
+
+    monkeypatch.setattr(UserMatches, "check_role", check_role)
+    source = SimpleNamespace(fancy_auth_user_owner_id="abc123")
+
+    denial = asyncio.run(
+        blocking_role.executor.check_role(UserMatches(), source, CONTEXT, None)
+    )
+
+    assert denial.reason == "raised"
+    assert str(denial.exception) == "SDK is down"
+
+
+def test_process_pool():
+    executor = RoleExecutor(max_workers=1, kind="process")
+    role = UserMatches()
+
+    async def check(owner_id):
+        source = SimpleNamespace(fancy_auth_user_owner_id=owner_id)
+        return await executor.check_role(role, source, CONTEXT, None)
+
+    try:
+        assert asyncio.run(check("abc123")) is None
+        assert asyncio.run(check("def456")).reason == "user_mismatch"
+        assert executor.stats.calls == 2
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_arguments_must_be_picklable():
+    executor = RoleExecutor(max_workers=1, kind="process")
+    source = SimpleNamespace(fancy_auth_user_owner_id=lambda: "abc123")
+
+    try:
+        denial = asyncio.run(executor.check_role(UserMatches(), source, CONTEXT, None))
+    finally:
+        executor.shutdown()
+
+    assert denial.reason == "raised"
+
+
+def test_roles_with_input_args_can_be_pickled():
+    role = pickle.loads(pickle.dumps(UserMatches(input_arg="input.user_id")))
+
+    assert role._input_arg_getter({"input": {"user_id": "abc123"}}) == "abc123"
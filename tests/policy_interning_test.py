@@ -0,0 +1,165 @@
+import sys
+from dataclasses import dataclass
+
+import pytest
+import strawberry
+
+from fancy_auth.base_role import BaseRole
+from fancy_auth import FancyAuthExtension
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+
+def _extensions(strawberry_type):
+    return [
+        extension
+        for field in strawberry_type.__strawberry_definition__.fields
+        for extension in field.extensions
+        if isinstance(extension, FancyAuthExtension)
+    ]
+
+
+def test_fields_of_a_type_share_one_policy():
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class CreditCardDetails:
+        long_number: str
+        expiry: str
+        ccv: str
+
+    extensions = _extensions(CreditCardDetails)
+    assert len(extensions) == 3
+
+    first = extensions[0]
+    for extension in extensions:
+        assert extension.policy is first.policy
+        assert extension.type_policy is first.type_policy
+        assert extension.directive is first.directive
+        assert extension.description is first.description
+
+
+def test_identical_policies_are_interned_across_types():
+    @fancy_auth(match_any=[UserMatches(), UserIsDog(scopes=["BARKS_AT_MAILMAN"])])
+    @strawberry.type
+    class A:
+        foo: str
+
+    @fancy_auth(match_any=[UserMatches(), UserIsDog(scopes=["BARKS_AT_MAILMAN"])])
+    @strawberry.type
+    class B:
+        bar: str
+
+    @strawberry.type
+    class C:
+        @fancy_auth(match_any=[UserMatches(), UserIsDog(scopes=["BARKS_AT_MAILMAN"])])
+        @strawberry.field
+        def baz(self) -> str:
+            return "baz"
+
+    (a,) = _extensions(A)
+    (b,) = _extensions(B)
+    (c,) = _extensions(C)
+
+    assert a.type_policy is b.type_policy
+    assert a.policy is b.policy is c.policy
+    assert a.directive is b.directive is c.directive
+
+
+def test_different_policies_are_not_interned():
+    policies = [
+        FancyAuthExtension(UserMatches()).policy,
+        FancyAuthExtension(UserIsDog(scopes=["BARKS_AT_MAILMAN"])).policy,
+        FancyAuthExtension(UserIsDog(scopes=["CAN_EAT_BONES"])).policy,
+        FancyAuthExtension(
+            match_any=[UserMatches(), UserIsDog(scopes=["BARKS_AT_MAILMAN"])]
+        ).policy,
+        FancyAuthExtension(
+            match_all=[UserMatches(), UserIsDog(scopes=["BARKS_AT_MAILMAN"])]
+        ).policy,
+        FancyAuthExtension(UserMatches(input_arg="id")).policy,
+    ]
+
+    assert len({id(policy) for policy in policies}) == len(policies)
+
+
+class UserInGroup(BaseRole):
+    role_owner = "tests"
+    comparison_key = None
+    possible_scopes = None
+    context_keys = ("groups",)
+
+    def __init__(self, group: str, **kwargs):
+        super().__init__(**kwargs)
+        self.group = group
+
+    def check_role(self, scopes, source, context, input_arg):
+        if self.group not in context.groups:
+            return self.deny("not_in_group", f"user is not in {self.group}")
+        return None
+
+    def is_role_valid(self, scopes, source, context, input_arg):
+        return self.raise_for_denial(
+            self.check_role(scopes, source, context, input_arg)
+        )
+
+
+@dataclass(frozen=True)
+class GroupContext:
+    trace_id: str
+    groups: frozenset
+
+
+def test_differently_configured_roles_are_not_interned(monkeypatch):
+    # (UserInGroup isn't a registered role, so it can't be described in the schema)
+    monkeypatch.setattr(
+        sys.modules[FancyAuthExtension.__module__],
+        "get_fancy_auth_directive_from_policy",
+        lambda policy: None,
+    )
+
+    @strawberry.type
+    class Query:
+        @fancy_auth(UserInGroup("users"))
+        @strawberry.field
+        def user_secret(self) -> str:
+            return "secret"
+
+        @fancy_auth(UserInGroup("admins"))
+        @strawberry.field
+        def admin_secret(self) -> str:
+            return "TOP SECRET"
+
+    assert (
+        FancyAuthExtension(UserInGroup("users")).policy
+        is not FancyAuthExtension(UserInGroup("admins")).policy
+    )
+
+    result = strawberry.Schema(query=Query).execute_sync(
+        "{ userSecret adminSecret }",
+        context_value=GroupContext(trace_id="aaa", groups=frozenset({"users"})),
+    )
+
+    assert result.data is None
+    assert [error.path for error in result.errors] == [["adminSecret"]]
+
+
+def test_roles_with_unhashable_configuration_are_never_shared():
+    class UserInAnyGroup(UserInGroup):
+        def __init__(self, groups: dict, **kwargs):
+            super().__init__(group="", **kwargs)
+            self.groups = groups
+
+    first = UserInAnyGroup({"users": True})
+    second = UserInAnyGroup({"users": True})
+
+    assert first.get_intern_key() != second.get_intern_key()
+    assert first.get_intern_key() == first.get_intern_key()
+
+
+@pytest.mark.parametrize("scopes", [["BARKS_AT_MAILMAN"], ["CAN_EAT_BONES", "BARKS_AT_MAILMAN"]])
+def test_intern_key_ignores_derived_state(scopes):
+    assert (
+        UserIsDog(scopes=scopes).get_intern_key()
+        == UserIsDog(scopes=list(reversed(scopes))).get_intern_key()
+    )
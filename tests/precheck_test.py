@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = SimpleNamespace(precheck=0, check_role=0)
+    original_precheck = UserMatches.precheck
+    original_check_role = UserMatches.check_role
+
+    def counting_precheck(self, **kwargs):
+        calls.precheck += 1
+        return original_precheck(self, **kwargs)
+
+    def counting_check_role(self, **kwargs):
+        calls.check_role += 1
+        return original_check_role(self, **kwargs)
+
+    monkeypatch.setattr(UserMatches, "precheck", counting_precheck)
+    monkeypatch.setattr(UserMatches, "check_role", counting_check_role)
+    return calls
+
+
+@pytest.fixture
+def schema():
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        email: Optional[str]
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def users(self) -> list[User]:
+            return [
+                User(fancy_auth_user_owner_id=owner_id, email="a@b.c")
+                for owner_id in ["abc123", "def456", "ghi789"]
+            ]
+
+    return strawberry.Schema(query=Query)
+
+
+def test_anonymous_requests_are_denied_by_the_precheck(schema, calls):
+    result = schema.execute_sync(
+        "{ users { email } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id=None),
+    )
+
+    assert result.data["users"] == [{"email": None}] * 3
+    assert calls.precheck == 1
+    assert calls.check_role == 0
+
+
+def test_check_role_runs_once_the_precheck_passes(schema, calls):
+    result = schema.execute_sync(
+        "{ users { email } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert result.data["users"] == [{"email": "a@b.c"}, {"email": None}, {"email": None}]
+    assert calls.check_role == 3
+    # (check_role doesn't repeat the precheck for each object)
+    assert calls.precheck == 1
+
+
+def test_is_role_valid_still_runs_the_precheck():
+    with pytest.raises(Exception) as err:
+        UserMatches().is_role_valid(
+            scopes=None,
+            source=SimpleNamespace(fancy_auth_user_owner_id="abc123"),
+            context=Context(trace_id="aaa", user_id=None),
+            input_arg=None,
+        )
+
+    assert "user is not logged in" in str(err.value)
+
+
+def test_precheck_is_memoized_per_scopes():
+    from fancy_auth.request_state import RequestState
+
+    state = RequestState()
+    context = Context(trace_id="aaa", dog_scopes={"IS_A_GOOD_BOY"})
+
+    assert state.get_precheck(UserIsDog(scopes=["IS_A_GOOD_BOY"]), context) is None
+    denial = state.get_precheck(UserIsDog(scopes=["CHEWS_CABLES"]), context)
+    assert denial is not None and denial.reason == "no_matching_scopes"
+
+    # (another instance of the same role + scopes reuses the result)
+    assert state.get_precheck(UserIsDog(scopes=["CHEWS_CABLES"]), context) is denial
+    assert len(state.prechecks) == 2
+
+
+class UserIsInTeam(UserMatches):
+    """(a role whose precheck depends on its own constructor argument)"""
+
+    def __init__(self, team: str, **kwargs):
+        super().__init__(**kwargs)
+        self.team = team
+
+    def precheck(self, scopes, context):
+        if context.trace_id != self.team:
+            return self.deny("not_in_team", f"user is not in {self.team}")
+        return None
+
+
+def test_differently_configured_roles_do_not_share_prechecks():
+    from fancy_auth.request_state import RequestState
+
+    state = RequestState()
+    context = Context(trace_id="users", user_id="abc123")
+
+    assert state.get_precheck(UserIsInTeam("users"), context) is None
+    assert state.get_precheck(UserIsInTeam("admins"), context).reason == "not_in_team"
+    assert state.get_precheck(UserIsInTeam("users"), context) is None
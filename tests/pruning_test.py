@@ -0,0 +1,117 @@
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.pruning import FancyAuthPruningExtension
+from fancy_auth.request_state import get_request_state
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+QUERY = """
+{
+    users {
+        email
+        bestFriend { name }
+        dogName
+    }
+}
+"""
+
+
+def get_schema(calls, extensions):
+    @strawberry.type
+    class Friend:
+        name: str
+
+    @fancy_auth(UserMatches())
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        fancy_auth_user_mammal_type: strawberry.Private[str]
+        email: Optional[str]
+
+        @strawberry.field
+        def best_friend(self) -> Optional[Friend]:
+            calls.append("best_friend")
+            return Friend(name="Fido")
+
+        @fancy_auth(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+        @strawberry.field
+        def dog_name(self) -> Optional[str]:
+            calls.append("dog_name")
+            return "Rex"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def users(self) -> list[User]:
+            return [
+                User(
+                    fancy_auth_user_owner_id=owner_id,
+                    fancy_auth_user_mammal_type="dog",
+                    email="a@b.c",
+                )
+                for owner_id in ["abc123", "def456"]
+            ]
+
+    return strawberry.Schema(query=Query, extensions=extensions)
+
+
+def _execute(extensions, context):
+    calls = []
+    result = get_schema(calls, extensions).execute_sync(
+        QUERY, variable_values=None, context_value=context
+    )
+    errors = sorted((tuple(error.path), error.message) for error in result.errors or [])
+    return result.data, errors, calls
+
+
+@pytest.mark.parametrize(
+    "viewer",
+    [
+        dict(user_id=None, dog_scopes=None),
+        dict(user_id="abc123", dog_scopes=None),
+        dict(user_id="abc123", dog_scopes={"IS_A_GOOD_BOY"}),
+    ],
+)
+def test_same_result_with_and_without_pruning(viewer):
+    # (a fresh context for each execution, so nothing cached on it by the first run can leak into the second)
+    pruned = _execute([FancyAuthPruningExtension], Context(trace_id="aaa", **viewer))
+    unpruned = _execute([], Context(trace_id="aaa", **viewer))
+    assert pruned == unpruned
+
+
+def test_denied_fields_are_decided_before_execution(monkeypatch):
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("check_role should not be called")  # pragma: no cover
+
+    monkeypatch.setattr(UserMatches, "check_role", fail_if_called)
+    monkeypatch.setattr(UserIsDog, "check_role", fail_if_called)
+
+    context = Context(trace_id="aaa", user_id=None, dog_scopes=None)
+    data, errors, calls = _execute([FancyAuthPruningExtension], context)
+
+    assert data == {
+        "users": [
+            {"email": None, "bestFriend": None, "dogName": None},
+            {"email": None, "bestFriend": None, "dogName": None},
+        ]
+    }
+    assert errors == [
+        (("users", 0, "email"), "Access denied to field"),
+        (("users", 1, "email"), "Access denied to field"),
+    ]
+    assert calls == []
+
+    # User.email, User.bestFriend, User.dogName (x2 - type and field level)
+    assert len(get_request_state(context).planned_decisions) == 4
+
+
+def test_fields_that_depend_on_the_object_are_not_planned():
+    context = Context(trace_id="aaa", user_id="abc123", dog_scopes={"IS_A_GOOD_BOY"})
+    _execute([FancyAuthPruningExtension], context)
+
+    assert get_request_state(context).planned_decisions == {}
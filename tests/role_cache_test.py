@@ -0,0 +1,195 @@
+import asyncio
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.context import Context
+from fancy_auth import FancyAuthExtension
+from fancy_auth.role_cache import RoleResultCache
+from fancy_auth.role_cache import RoleResultCacheKey
+from fancy_auth.roles import UserIsDog
+
+
+def make_key(comparison_value="dog", subject=("abc123",)):
+    return RoleResultCacheKey(UserIsDog, None, comparison_value, subject)
+
+
+DENIAL = RoleDenial("UserIsDog", "not_a_dog", "user must be a dog")
+
+
+def test_ttl():
+    now = [0.0]
+    cache = RoleResultCache(ttl=10, negative_ttl=2, clock=lambda: now[0])
+    cache.set(make_key("dog"), None)
+    cache.set(make_key("cat"), DENIAL)
+
+    now[0] = 1
+    assert cache.get(make_key("dog")) == (True, None)
+    assert cache.get(make_key("cat")) == (True, DENIAL)
+
+    # negative results expire sooner
+    now[0] = 3
+    assert cache.get(make_key("dog")) == (True, None)
+    assert cache.get(make_key("cat")) == (False, None)
+
+    now[0] = 11
+    assert cache.get(make_key("dog")) == (False, None)
+
+    assert cache.stats.hits == 3
+    assert cache.stats.misses == 2
+    assert cache.stats.expirations == 2
+
+
+def test_lru_eviction():
+    cache = RoleResultCache(max_size=2)
+    cache.set(make_key("a"), None)
+    cache.set(make_key("b"), None)
+    cache.get(make_key("a"))  # "b" is now the least recently used
+    cache.set(make_key("c"), None)
+
+    assert cache.get(make_key("a"))[0] is True
+    assert cache.get(make_key("b"))[0] is False
+    assert cache.get(make_key("c"))[0] is True
+    assert cache.stats.evictions == 1
+    assert len(cache) == 2
+
+
+def test_raised_errors_are_not_cached():
+    cache = RoleResultCache()
+    cache.set(make_key(), RoleDenial.from_exception("UserIsDog", TimeoutError()))
+
+    assert len(cache) == 0
+
+
+def test_invalidate():
+    cache = RoleResultCache()
+    cache.set(make_key("dog", ("abc123",)), None)
+    cache.set(make_key("cat", ("abc123",)), DENIAL)
+    cache.set(make_key("dog", ("def456",)), None)
+
+    assert cache.invalidate(subject=("abc123",)) == 2
+    assert cache.get(make_key("dog", ("def456",)))[0] is True
+
+    assert cache.invalidate(role_class=UserIsDog, comparison_value="dog") == 1
+    assert len(cache) == 0
+
+
+def test_memory_footprint():
+    cache = RoleResultCache()
+    empty = cache.approximate_memory_bytes()
+
+    for i in range(100):
+        cache.set(make_key(f"value-{i}"), DENIAL)
+
+    assert cache.approximate_memory_bytes() > empty
+
+
+def test_thread_safety():
+    cache = RoleResultCache(max_size=50)
+
+    def worker(n):
+        for i in range(2_000):
+            cache.set(make_key(f"{n}-{i % 100}"), None)
+            cache.get(make_key(f"{n}-{(i + 1) % 100}"))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 50
+
+
+@pytest.fixture
+def cached_user_is_dog(monkeypatch):
+    cache = RoleResultCache(ttl=60, negative_ttl=5)
+    calls = []
+    original = UserIsDog.check_role
+
+    def counting_check_role(self, **kwargs):
+        calls.append(kwargs)
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(UserIsDog, "result_cache", cache)
+    monkeypatch.setattr(UserIsDog, "check_role", counting_check_role)
+    return SimpleNamespace(cache=cache, calls=calls)
+
+
+SOURCE = SimpleNamespace(fancy_auth_user_mammal_type="dog")
+
+
+def test_results_are_shared_between_requests(cached_user_is_dog):
+    extension = FancyAuthExtension(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+
+    for _ in range(3):
+        # (a new context for every "request")
+        info = SimpleNamespace(
+            context=Context(trace_id="aaa", dog_scopes={"IS_A_GOOD_BOY"})
+        )
+        assert extension.evaluate_policy(SOURCE, info, {}) == (True, [])
+
+    assert len(cached_user_is_dog.calls) == 1
+    assert cached_user_is_dog.cache.stats.hits == 2
+
+    # a different viewer isn't served someone else's result
+    info = SimpleNamespace(context=Context(trace_id="aaa", dog_scopes={"CHEWS_CABLES"}))
+    assert extension.evaluate_policy(SOURCE, info, {})[0] is False
+    # (denied by UserIsDog.precheck - check_role isn't called at all)
+    assert len(cached_user_is_dog.calls) == 1
+
+
+def test_results_are_shared_with_async_resolvers(cached_user_is_dog):
+    extension = FancyAuthExtension(UserIsDog(scopes=["IS_A_GOOD_BOY"]))
+
+    for _ in range(2):
+        info = SimpleNamespace(
+            context=Context(trace_id="aaa", dog_scopes={"IS_A_GOOD_BOY"})
+        )
+        assert asyncio.run(extension.evaluate_policy_async(SOURCE, info, {})) == (
+            True,
+            [],
+        )
+
+    assert len(cached_user_is_dog.calls) == 1
+
+
+class UserInGroup(UserIsDog):
+    """(a role configured by its own constructor argument)"""
+
+    comparison_key = None
+    possible_scopes = None
+    context_keys = ("trace_id",)
+
+    def __init__(self, group, **kwargs):
+        super().__init__(**kwargs)
+        self.group = group
+
+    def precheck(self, scopes, context):
+        return None
+
+    def check_role(self, scopes, source, context, input_arg):
+        if context.trace_id != self.group:
+            return self.deny("not_in_group", f"user is not in {self.group}")
+        return None
+
+
+def test_differently_configured_roles_do_not_share_results(monkeypatch):
+    # (UserInGroup isn't a registered role, so it can't be described in the schema)
+    monkeypatch.setattr(
+        sys.modules[FancyAuthExtension.__module__],
+        "get_fancy_auth_directive_from_policy",
+        lambda policy: None,
+    )
+    monkeypatch.setattr(UserInGroup, "result_cache", RoleResultCache(ttl=60))
+    info = SimpleNamespace(context=Context(trace_id="users"))
+
+    users = FancyAuthExtension(UserInGroup("users"))
+    admins = FancyAuthExtension(UserInGroup("admins"))
+
+    assert users.evaluate_policy(SOURCE, info, {}) == (True, [])
+    assert admins.evaluate_policy(SOURCE, info, {})[0] is False
+    assert len(UserInGroup.result_cache) == 2
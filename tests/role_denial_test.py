@@ -0,0 +1,96 @@
+import traceback
+from types import SimpleNamespace
+from typing import Any
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.base_role import BaseRole
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserMatches
+
+
+@pytest.fixture
+def raising_user_matches(monkeypatch):
+    """Turns UserMatches back into a role written the 'old' way (signalling denial by raising)"""
+
+    def is_role_valid(
+        self, scopes: Optional[set[str]], source: Any, context: Context, input_arg: Any
+    ) -> bool:
+        assert context.user_id == source.fancy_auth_user_owner_id, "nope"
+        return True
+
+    monkeypatch.setattr(UserMatches, "check_role", BaseRole.check_role)
+    monkeypatch.setattr(UserMatches, "is_role_valid", is_role_valid)
+
+
+@pytest.fixture
+def schema():
+    @strawberry.type
+    class User:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+
+        @fancy_auth(UserMatches())
+        @strawberry.field
+        def password(self) -> Optional[str]:
+            return "hunter2"
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def user(self) -> User:
+            return User(fancy_auth_user_owner_id="abc123")
+
+    return strawberry.Schema(query=Query)
+
+
+def test_raising_role_with_access(schema, raising_user_matches):
+    result = schema.execute_sync(
+        "{ user { password } }",
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert not result.errors
+    assert result.data == {"user": {"password": "hunter2"}}
+
+
+def test_raising_role_without_access(schema, raising_user_matches):
+    result = schema.execute_sync(
+        "{ user { password } }",
+        context_value=Context(trace_id="aaa", user_id="def456"),
+    )
+
+    assert "Access denied to field" in str(result.errors[0])
+    full_traceback = "".join(
+        traceback.TracebackException.from_exception(result.errors[0]).format()
+    )
+    assert "AssertionError: nope" in full_traceback
+    assert result.data == {"user": {"password": None}}
+
+
+def test_raising_role_check_role(raising_user_matches):
+    denial = UserMatches().check_role(
+        scopes=None,
+        source=SimpleNamespace(fancy_auth_user_owner_id="abc123"),
+        context=Context(trace_id="aaa", user_id="def456"),
+        input_arg=None,
+    )
+
+    assert denial is not None
+    assert denial.reason == "raised"
+    assert isinstance(denial.exception, AssertionError)
+    assert denial.to_exception() is denial.exception
+
+
+def test_denial_is_materialized_at_the_error_boundary(schema):
+    result = schema.execute_sync(
+        "{ user { password } }",
+        context_value=Context(trace_id="aaa", user_id="def456"),
+    )
+
+    full_traceback = "".join(
+        traceback.TracebackException.from_exception(result.errors[0]).format()
+    )
+    assert "RoleDeniedError: logged in user does not match" in full_traceback
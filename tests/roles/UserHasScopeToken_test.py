@@ -0,0 +1,152 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import strawberry
+
+from fancy_auth.context import Context
+from fancy_auth.scope_token import ScopeTokenVerifier
+from fancy_auth.scope_token import sign_scope_token
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserHasScopeToken
+
+KEY = b"test signing key"
+
+
+@pytest.fixture(autouse=True)
+def verifier(monkeypatch):
+    verifier = ScopeTokenVerifier({"test": KEY})
+    monkeypatch.setattr(UserHasScopeToken, "verifier", verifier)
+    return verifier
+
+
+def get_token(scopes, *, subject="abc123", expires_in=60, key=KEY):
+    return sign_scope_token(
+        key_id="test",
+        key=key,
+        scopes=scopes,
+        subject=subject,
+        expires_at=time.time() + expires_in,
+    )
+
+
+def check(scopes, context):
+    return UserHasScopeToken().is_role_valid(
+        scopes=scopes, source=SimpleNamespace(), context=context, input_arg=None
+    )
+
+
+def test_basic_access():
+    context = Context(
+        trace_id="aaa",
+        user_id="abc123",
+        scope_token=get_token(["reviews:read", "users:read:email"]),
+    )
+
+    assert check({"users:read:email"}, context) is True
+
+
+def test_wildcard_scopes():
+    context = Context(trace_id="aaa", user_id="abc123", scope_token=get_token(["billing:*"]))
+
+    assert check({"billing:read:invoices"}, context) is True
+
+
+def test_no_matching_scopes():
+    context = Context(trace_id="aaa", user_id="abc123", scope_token=get_token(["reviews:read"]))
+
+    with pytest.raises(Exception) as err:
+        check({"reviews:write"}, context)
+
+    assert "no matching scopes" in str(err.value)
+
+
+def test_no_token():
+    with pytest.raises(Exception) as err:
+        check({"reviews:read"}, Context(trace_id="aaa", user_id="abc123"))
+
+    assert "user has no scope token" in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "token, message",
+    [
+        (get_token(["reviews:read"], key=b"some other key"), "signature is invalid"),
+        (get_token(["reviews:read"], expires_in=-1), "has expired"),
+        ("not a token", "malformed"),
+    ],
+)
+def test_untrusted_tokens(token, message):
+    context = Context(trace_id="aaa", user_id="abc123", scope_token=token)
+
+    with pytest.raises(Exception) as err:
+        check({"reviews:read"}, context)
+
+    assert message in str(err.value)
+
+
+def test_token_issued_to_someone_else():
+    context = Context(
+        trace_id="aaa", user_id="def456", scope_token=get_token(["reviews:read"])
+    )
+
+    with pytest.raises(Exception) as err:
+        check({"reviews:read"}, context)
+
+    assert "issued to a different user" in str(err.value)
+
+
+def test_user_token_used_anonymously():
+    context = Context(trace_id="aaa", scope_token=get_token(["reviews:read"]))
+
+    with pytest.raises(Exception) as err:
+        check({"reviews:read"}, context)
+
+    assert "issued to a different user" in str(err.value)
+
+
+def test_anonymous_token():
+    context = Context(trace_id="aaa", scope_token=get_token(["reviews:read"], subject=None))
+
+    assert check({"reviews:read"}, context) is True
+
+    # (and it can't be used by a logged in user either)
+    with pytest.raises(Exception):
+        check({"reviews:read"}, Context(trace_id="aaa", user_id="abc123", scope_token=context.scope_token))
+
+
+def test_requires_scopes():
+    context = Context(trace_id="aaa", user_id="abc123", scope_token=get_token(["reviews:read"]))
+
+    with pytest.raises(ValueError):
+        check(None, context)
+
+
+def test_possible_scopes_are_validated():
+    with pytest.raises(ValueError) as err:
+        UserHasScopeToken(scopes=["reviews:delete"])
+
+    assert "reviews:delete is not a valid scope" in str(err.value)
+
+
+def test_token_is_verified_once(verifier):
+    @strawberry.type
+    class Query:
+        @fancy_auth(UserHasScopeToken(scopes=["reviews:read"]))
+        @strawberry.field
+        def reviews(self) -> list[str]:
+            return ["great"]
+
+    schema = strawberry.Schema(query=Query)
+    token = get_token(["reviews:read"])
+
+    for _ in range(3):
+        result = schema.execute_sync(
+            "{ reviews }",
+            context_value=Context(trace_id="aaa", user_id="abc123", scope_token=token),
+        )
+        assert result.data == {"reviews": ["great"]}
+
+    # (later requests hit the verification cache)
+    assert verifier.stats.misses == 1
+    assert verifier.stats.hits > 0
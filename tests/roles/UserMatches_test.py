@@ -64,3 +64,29 @@ def test_missing_comparison_key():
         )
 
     assert "no attribute 'fancy_auth_user_owner_id'" in str(err.value)
+
+
+def test_check_role_returns_denial():
+    denial = UserMatches().check_role(
+        scopes=None,
+        source=SimpleNamespace(fancy_auth_user_owner_id="abc123"),
+        context=Context(trace_id="aaa", user_id="def456"),
+        input_arg=None,
+    )
+
+    assert denial is not None
+    assert denial.role_name == "UserMatches"
+    assert denial.reason == "user_mismatch"
+    assert denial.exception is None
+
+
+def test_check_role_returns_none_with_access():
+    assert (
+        UserMatches().check_role(
+            scopes=None,
+            source=SimpleNamespace(fancy_auth_user_owner_id="abc123"),
+            context=Context(trace_id="aaa", user_id="abc123"),
+            input_arg=None,
+        )
+        is None
+    )
@@ -0,0 +1,122 @@
+from typing import Any
+
+import pytest
+
+from fancy_auth.base_role import BaseRole
+from fancy_auth.context import Context
+from fancy_auth.request_state import get_request_state
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+from fancy_auth.scopes import ScopeIndex
+
+
+class HasManyScopes(BaseRole):
+    role_owner = "My Team Name"
+    comparison_key = None
+    possible_scopes = {f"SCOPE_{i}" for i in range(300)}
+
+    def is_role_valid(self, scopes, source: Any, context: Any, input_arg: Any) -> bool:
+        return True  # pragma: no cover
+
+
+def test_scope_index():
+    index = ScopeIndex({"B", "A", "C"})
+
+    assert index.bits == {"A": 1, "B": 2, "C": 4}
+    assert index.get_mask(["A", "C", "NOT_A_SCOPE"]) == 5
+    assert index.get_scopes(6) == {"B", "C"}
+    assert index.get_unknown_scopes(["A", "D"]) == ["D"]
+
+
+def test_roles_get_a_scope_index():
+    assert UserMatches.scope_index is None
+    assert UserIsDog.scope_index is not None
+    assert len(UserIsDog.scope_index) == len(UserIsDog.possible_scopes)
+
+    role = UserIsDog(scopes=["CAN_EAT_BONES", "IS_A_GOOD_BOY"])
+    assert UserIsDog.scope_index.get_scopes(role._scope_mask) == {
+        "CAN_EAT_BONES",
+        "IS_A_GOOD_BOY",
+    }
+
+
+def test_invalid_scopes_are_rejected():
+    with pytest.raises(ValueError, match="SCOPE_300 is not a valid scope allowed for HasManyScopes"):
+        HasManyScopes(scopes=["SCOPE_1", "SCOPE_300"])
+
+
+def test_holds_any_scope():
+    role = HasManyScopes(scopes=["SCOPE_7", "SCOPE_250"])
+    context = Context(trace_id="aaa")
+
+    assert role.holds_any_scope(role._scopes_applied, {"SCOPE_250", "OTHER"}, context)
+    assert not role.holds_any_scope(role._scopes_applied, {"SCOPE_8", "OTHER"}, context)
+    assert not role.holds_any_scope(role._scopes_applied, set(), context)
+    # (explicitly passed scopes are respected)
+    assert role.holds_any_scope({"SCOPE_8"}, {"SCOPE_8"}, context)
+
+
+def test_held_scopes_are_converted_once_per_request():
+    context = Context(trace_id="aaa", dog_scopes={"IS_A_GOOD_BOY"})
+
+    for scope in ["IS_A_GOOD_BOY", "CHEWS_CABLES", "CAN_EAT_BONES"]:
+        role = UserIsDog(scopes=[scope])
+        role.holds_any_scope(role._scopes_applied, context.dog_scopes, context)
+
+    assert len(get_request_state(context).scope_masks) == 1
+
+
+class HasBillingScopes(BaseRole):
+    role_owner = "My Team Name"
+    comparison_key = None
+    possible_scopes = {
+        "billing:read",
+        "billing:read:invoices",
+        "billing:write:invoices",
+        "profile:read",
+    }
+
+    def is_role_valid(self, scopes, source: Any, context: Any, input_arg: Any) -> bool:
+        return True  # pragma: no cover
+
+
+def test_wildcards_expand_to_the_scopes_below_them():
+    index = HasBillingScopes.scope_index
+
+    assert index.get_scopes(index.get_mask(["billing:*"])) == {
+        "billing:read",
+        "billing:read:invoices",
+        "billing:write:invoices",
+    }
+    assert index.get_scopes(index.get_mask(["billing:read:*"])) == {
+        "billing:read:invoices"
+    }
+    assert index.get_scopes(index.get_mask(["*"])) == HasBillingScopes.possible_scopes
+    assert index.get_mask(["nothing:*"]) == 0
+
+
+@pytest.mark.parametrize(
+    "applied, held, expected",
+    [
+        (["billing:read:invoices"], {"billing:*"}, True),
+        (["billing:read:invoices"], {"billing:read:*"}, True),
+        (["billing:read:invoices"], {"billing:write:*"}, False),
+        (["billing:read:invoices"], {"billing:read"}, False),
+        (["billing:*"], {"billing:write:invoices"}, True),
+        (["billing:*"], {"profile:read"}, False),
+        (["profile:read"], {"*"}, True),
+    ],
+)
+def test_wildcard_scope_matching(applied, held, expected):
+    role = HasBillingScopes(scopes=applied)
+    assert role.holds_any_scope(role._scopes_applied, held, Context(trace_id="aaa")) is expected
+
+
+def test_wildcards_are_validated():
+    HasBillingScopes(scopes=["billing:*", "billing:write:*"])
+
+    with pytest.raises(ValueError, match="invoices:\\* is not a valid scope allowed for HasBillingScopes"):
+        HasBillingScopes(scopes=["invoices:*"])
+
+    with pytest.raises(ValueError, match="billing is not a valid scope allowed for HasBillingScopes"):
+        HasBillingScopes(scopes=["billing"])
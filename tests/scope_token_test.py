@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+import pytest
+
+from fancy_auth.scope_token import ScopeTokenError
+from fancy_auth.scope_token import ScopeTokenVerifier
+from fancy_auth.scope_token import _b64encode
+from fancy_auth.scope_token import _get_signature
+from fancy_auth.scope_token import sign_scope_token
+
+KEYS = {"2024-01": b"old key", "2024-02": b"new key"}
+
+
+@pytest.fixture
+def clock():
+    return SimpleNamespace(now=1000.0)
+
+
+@pytest.fixture
+def verifier(clock):
+    return ScopeTokenVerifier(KEYS, max_size=2, clock=lambda: clock.now)
+
+
+def sign(key_id="2024-02", scopes=("reviews:read",), expires_at=1060.0, subject="abc123"):
+    return sign_scope_token(
+        key_id=key_id,
+        key=KEYS[key_id],
+        scopes=list(scopes),
+        expires_at=expires_at,
+        subject=subject,
+    )
+
+
+def test_verify(verifier):
+    token = verifier.verify(sign())
+
+    assert token.subject == "abc123"
+    assert token.scopes == {"reviews:read"}
+    assert token.expires_at == 1060.0
+
+
+def test_keys_can_be_rotated(verifier):
+    assert verifier.verify(sign(key_id="2024-01")).scopes == {"reviews:read"}
+    assert verifier.verify(sign(key_id="2024-02")).scopes == {"reviews:read"}
+
+
+def test_verified_tokens_are_cached_until_they_expire(verifier, clock):
+    token = sign()
+    first = verifier.verify(token)
+
+    assert verifier.verify(token) is first
+    assert verifier.stats.hits == 1
+    assert verifier.stats.misses == 1
+
+    clock.now = 1060.0
+    with pytest.raises(ScopeTokenError, match="has expired"):
+        verifier.verify(token)
+
+    assert verifier.stats.expirations == 1
+
+
+def test_revoked_keys_reject_cached_tokens(verifier):
+    token = sign(key_id="2024-01")
+    verifier.verify(token)
+
+    del verifier.keys["2024-01"]
+
+    with pytest.raises(ScopeTokenError, match="unknown key"):
+        verifier.verify(token)
+
+
+def test_replaced_keys_reject_cached_tokens(verifier):
+    token = sign(key_id="2024-01")
+    verifier.verify(token)
+
+    verifier.keys["2024-01"] = b"replacement key"
+
+    with pytest.raises(ScopeTokenError, match="signature is invalid"):
+        verifier.verify(token)
+
+
+def test_least_recently_used_tokens_are_evicted(verifier):
+    tokens = [sign(subject=subject) for subject in ["a", "b", "c"]]
+
+    verifier.verify(tokens[0])
+    verifier.verify(tokens[1])
+    verifier.verify(tokens[0])
+    verifier.verify(tokens[2])
+
+    assert verifier.stats.evictions == 1
+
+    # "b" was the least recently used
+    verifier.verify(tokens[0])
+    verifier.verify(tokens[1])
+    assert verifier.stats.hits == 2
+    assert verifier.stats.misses == 4
+
+
+@pytest.mark.parametrize(
+    "tamper, message",
+    [
+        (lambda token: token.replace("2024-02.", "2024-01.", 1), "signature is invalid"),
+        (lambda token: token.replace("2024-02.", "2023-12.", 1), "unknown key"),
+        (lambda token: token[:-4], "signature is invalid"),
+        (lambda token: token + ".extra", "malformed"),
+        (lambda token: "2024-02.e30." + token.split(".")[2], "signature is invalid"),
+    ],
+)
+def test_untrusted_tokens_are_rejected(verifier, tamper, message):
+    with pytest.raises(ScopeTokenError, match=message):
+        verifier.verify(tamper(sign()))
+
+    # (and never cached)
+    assert verifier.stats.hits == 0
+    with pytest.raises(ScopeTokenError):
+        verifier.verify(tamper(sign()))
+
+
+def test_claims_must_include_scopes_and_expiry(verifier):
+    token = sign_scope_token(key_id="2024-02", key=KEYS["2024-02"], scopes=[], expires_at=1060.0)
+    assert verifier.verify(token).scopes == frozenset()
+
+    # (a correctly signed token, without an expiry)
+    signed = "2024-02.e30"  # base64 of "{}"
+    with pytest.raises(ScopeTokenError, match="claims are malformed"):
+        verifier.verify(f"{signed}.{_b64encode(_get_signature(KEYS['2024-02'], signed))}")
+
+
+def test_no_keys():
+    with pytest.raises(ScopeTokenError, match="unknown key"):
+        ScopeTokenVerifier().verify(sign())
@@ -58,6 +58,20 @@ TEST_CASES = [
         scopes_from_context={"LIKES_TUMMY_RUBS"},
         expected_error="no matching scopes",
     ),
+    TestCase(
+        id="test_scopes_wildcard_grant",
+        mammal_type="dog",
+        scopes_applied={"IS_A_GOOD_BOY"},
+        scopes_from_context={"*"},
+        expected_error=None,
+    ),
+    TestCase(
+        id="test_scopes_wildcard_applied",
+        mammal_type="dog",
+        scopes_applied={"*"},
+        scopes_from_context={"CHEWS_CABLES"},
+        expected_error=None,
+    ),
     TestCase(
         id="test_scopes_empty_scope_set",
         mammal_type="dog",
@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.base_role import RoleDenial
+from fancy_auth.context import Context
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserMatches
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Turns UserMatches into a (slow) async role, and records when it starts and finishes"""
+    events = []
+    sync_check_role = UserMatches.check_role
+
+    async def check_role(
+        self, scopes: Optional[set[str]], source: Any, context: Context, input_arg: Any
+    ) -> Optional[RoleDenial]:
+        events.append("role started")
+        await asyncio.sleep(0.01)
+        events.append("role finished")
+        return sync_check_role(self, scopes, source, context, input_arg)
+
+    monkeypatch.setattr(UserMatches, "check_role", check_role)
+    monkeypatch.setattr(UserMatches, "is_async", True)
+    return events
+
+
+def get_schema(events, speculative=True, fail=False):
+    async def resolve_secret() -> str:
+        events.append("resolver started")
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            events.append("resolver cancelled")
+            raise
+
+        if fail:
+            raise RuntimeError("backend is down")
+
+        events.append("resolver finished")
+        return "hunter2"
+
+    @strawberry.type
+    class Query:
+        @fancy_auth(UserMatches(input_arg="user_id"), speculative=speculative)
+        @strawberry.field
+        async def secret(self, user_id: str) -> Optional[str]:
+            return await resolve_secret()
+
+    @strawberry.type
+    class Mutation:
+        @fancy_auth(UserMatches(input_arg="user_id"), speculative=speculative)
+        @strawberry.mutation
+        async def rotate_secret(self, user_id: str) -> Optional[str]:
+            return await resolve_secret()
+
+    return strawberry.Schema(query=Query, mutation=Mutation)
+
+
+def execute(schema, query, user_id="abc123"):
+    return asyncio.run(
+        schema.execute(query, context_value=Context(trace_id="aaa", user_id=user_id))
+    )
+
+
+def test_resolver_runs_alongside_the_policy_check(events):
+    result = execute(get_schema(events), '{ secret(userId: "abc123") }')
+
+    assert not result.errors
+    assert result.data == {"secret": "hunter2"}
+    assert events.index("resolver started") < events.index("role finished")
+
+
+def test_policy_is_checked_first_by_default(events):
+    result = execute(get_schema(events, speculative=False), '{ secret(userId: "abc123") }')
+
+    assert result.data == {"secret": "hunter2"}
+    assert events == [
+        "role started",
+        "role finished",
+        "resolver started",
+        "resolver finished",
+    ]
+
+
+def test_resolver_is_cancelled_when_access_is_denied(events):
+    result = execute(get_schema(events), '{ secret(userId: "def456") }')
+
+    assert result.data == {"secret": None}
+    assert [error.message for error in result.errors] == ["Access denied to field"]
+    assert "resolver cancelled" in events
+    assert "resolver finished" not in events
+
+
+def test_resolver_errors_are_hidden_when_access_is_denied(events):
+    result = execute(get_schema(events, fail=True), '{ secret(userId: "def456") }')
+
+    assert [error.message for error in result.errors] == ["Access denied to field"]
+
+
+def test_resolver_errors_are_reported_when_access_is_granted(events):
+    result = execute(get_schema(events, fail=True), '{ secret(userId: "abc123") }')
+
+    assert [error.message for error in result.errors] == ["backend is down"]
+
+
+def test_mutations_are_always_checked_first(events):
+    result = execute(get_schema(events), 'mutation { rotateSecret(userId: "def456") }')
+
+    assert result.data == {"rotateSecret": None}
+    assert events == ["role started", "role finished"]
+
+
+def test_sync_resolvers_are_checked_first(events):
+    @strawberry.type
+    class Query:
+        @fancy_auth(UserMatches(input_arg="user_id"), speculative=True)
+        @strawberry.field
+        def secret(self, user_id: str) -> Optional[str]:
+            events.append("resolver ran")
+            raise RuntimeError("backend is down")
+
+    result = execute(strawberry.Schema(query=Query), '{ secret(userId: "def456") }')
+
+    # (the resolver never ran - and so its error can't leak)
+    assert [error.message for error in result.errors] == ["Access denied to field"]
+    assert events == ["role started", "role finished"]
+
+
+def test_list_mode_cannot_be_speculative():
+    def get_secrets() -> list[str]:  # pragma: no cover
+        return []
+
+    with pytest.raises(ValueError, match="speculative"):
+        fancy_auth(list_mode="drop", speculative=True)(
+            strawberry.field(resolver=get_secrets)
+        )
@@ -0,0 +1,151 @@
+import sys
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+import strawberry
+
+from fancy_auth.base_role import MISSING
+from fancy_auth.base_role import BaseRole
+from fancy_auth.context import Context
+from fancy_auth import FancyAuthExtension
+from fancy_auth import fancy_auth
+from fancy_auth.roles import UserIsDog
+from fancy_auth.roles import UserMatches
+
+OWNER_IDS = ["abc123", "def456", "abc123", "ghi789"] * 100
+
+
+def get_schema(role: BaseRole):
+    @fancy_auth(role)
+    @strawberry.type
+    class Review:
+        fancy_auth_user_owner_id: strawberry.Private[str]
+        body: Optional[str]
+
+    @strawberry.type
+    class Query:
+        @fancy_auth(list_mode="drop")
+        @strawberry.field
+        def reviews(self) -> list[Review]:
+            return [
+                Review(fancy_auth_user_owner_id=owner_id, body=f"by {owner_id}")
+                for owner_id in OWNER_IDS
+            ]
+
+    return strawberry.Schema(query=Query)
+
+
+def test_user_matches_vectorized():
+    values = ["abc123", "def456", "ghi789", None]
+    mask = UserMatches().is_role_valid_vectorized(
+        None, values, Context(trace_id="aaa", user_id="abc123")
+    )
+
+    assert list(mask) == [value == "abc123" for value in values]
+
+
+def test_comparison_values():
+    sources = [SimpleNamespace(fancy_auth_user_owner_id="abc123"), SimpleNamespace()]
+    values = UserMatches().get_comparison_values(sources)
+
+    assert values == ["abc123", MISSING]
+
+
+def test_only_roles_that_implement_it_are_vectorized():
+    assert UserMatches.supports_vectorized
+    assert not UserIsDog.supports_vectorized
+
+
+def test_list_is_filtered_in_one_pass(monkeypatch):
+    calls = []
+    original = UserMatches.is_role_valid_vectorized
+
+    def counting(self, scopes, comparison_values, context):
+        calls.append(len(comparison_values))
+        return original(self, scopes, comparison_values, context)
+
+    monkeypatch.setattr(UserMatches, "is_role_valid_vectorized", counting)
+
+    result = get_schema(UserMatches()).execute_sync(
+        "{ reviews { body } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert not result.errors
+    assert result.data["reviews"] == [{"body": "by abc123"}] * 200
+    assert calls == [len(OWNER_IDS)]
+
+
+def test_failed_precheck_denies_every_item():
+    result = get_schema(UserMatches()).execute_sync(
+        "{ reviews { body } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id=None),
+    )
+
+    assert not result.errors
+    assert result.data["reviews"] == []
+
+
+def test_vectorized_errors_deny_every_item(monkeypatch):
+    def broken(self, scopes, comparison_values, context):
+        return [True]
+
+    monkeypatch.setattr(UserMatches, "is_role_valid_vectorized", broken)
+
+    result = get_schema(UserMatches()).execute_sync(
+        "{ reviews { body } }",
+        variable_values=None,
+        context_value=Context(trace_id="aaa", user_id="abc123"),
+    )
+
+    assert not result.errors
+    assert result.data["reviews"] == []
+
+
+class UserIsEditor(BaseRole):
+    comparison_key = "fancy_auth_user_owner_id"
+    possible_scopes = None
+
+    def check_role(self, scopes, source, context, input_arg):
+        if source.fancy_auth_user_owner_id.startswith("d"):
+            return None
+        return self.deny("not_editor", "not an editor")
+
+    def is_role_valid(self, scopes, source, context, input_arg):
+        return self.raise_for_denial(
+            self.check_role(scopes, source, context, input_arg)
+        )
+
+    def is_role_valid_vectorized(self, scopes, comparison_values, context):
+        return [value.startswith("d") for value in comparison_values]
+
+    def get_vectorized_denial(self, scopes, context):
+        return self.deny("not_editor", "not an editor")
+
+
+@pytest.mark.parametrize("detailed_reasons", [False, True])
+@pytest.mark.parametrize("logic", ["match_any", "match_all"])
+def test_matches_per_object_decisions(logic, detailed_reasons, monkeypatch):
+    # (UserIsEditor isn't a registered role, so it can't be described in the schema)
+    monkeypatch.setattr(
+        sys.modules[FancyAuthExtension.__module__],
+        "get_fancy_auth_directive_from_policy",
+        lambda policy: None,
+    )
+
+    extension = FancyAuthExtension(
+        **{logic: [UserMatches(), UserIsEditor()]},
+        detailed_reasons=detailed_reasons,
+    )
+    sources = [
+        SimpleNamespace(fancy_auth_user_owner_id=owner_id) for owner_id in OWNER_IDS[:4]
+    ]
+    info = SimpleNamespace(context=Context(trace_id="aaa", user_id="abc123"))
+
+    assert extension.can_vectorize()
+    assert extension.get_decisions_vectorized(sources, info) == [
+        extension.evaluate_policy(source, info, {}) for source in sources
+    ]